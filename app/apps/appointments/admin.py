@@ -2,8 +2,11 @@ from django.contrib import admin
 from .models import (
     ProviderAvailability,
     ProviderAvailabilityException,
+    ProviderBreak,
     AppointmentSlot,
+    AppointmentSeries,
     Appointment,
+    WaitlistEntry,
 )
 
 
@@ -14,10 +17,24 @@ class ProviderAvailabilityAdmin(admin.ModelAdmin):
     search_fields = ("provider__user__username",)
 
 
+@admin.register(ProviderBreak)
+class ProviderBreakAdmin(admin.ModelAdmin):
+    list_display = ("provider", "day_of_week", "start_time", "end_time")
+    list_filter = ("day_of_week",)
+    search_fields = ("provider__user__username",)
+
+
 @admin.register(ProviderAvailabilityException)
 class ProviderAvailabilityExceptionAdmin(admin.ModelAdmin):
-    list_display = ("provider", "exception_date", "exception_type", "reason")
-    list_filter = ("exception_type", "exception_date")
+    list_display = (
+        "provider",
+        "exception_date",
+        "end_date",
+        "recurrence",
+        "exception_type",
+        "reason",
+    )
+    list_filter = ("exception_type", "recurrence", "exception_date")
     search_fields = ("provider__user__username", "reason")
 
 
@@ -28,6 +45,23 @@ class AppointmentSlotAdmin(admin.ModelAdmin):
     search_fields = ("provider__user__username",)
 
 
+@admin.register(AppointmentSeries)
+class AppointmentSeriesAdmin(admin.ModelAdmin):
+    list_display = (
+        "client",
+        "provider",
+        "service",
+        "scheduled_for",
+        "interval_weeks",
+        "occurrences",
+    )
+    search_fields = (
+        "client__user__username",
+        "provider__user__username",
+        "service__name",
+    )
+
+
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
     list_display = (
@@ -47,3 +81,22 @@ class AppointmentAdmin(admin.ModelAdmin):
         "service__name",
     )
     date_hierarchy = "scheduled_for"
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = (
+        "client",
+        "provider",
+        "service",
+        "window_start",
+        "window_end",
+        "status",
+        "notified_at",
+    )
+    list_filter = ("status",)
+    search_fields = (
+        "client__user__username",
+        "provider__user__username",
+        "service__name",
+    )
@@ -0,0 +1,1237 @@
+# apps/appointments/benchmarks.py
+"""
+Benchmark scenarios for the scheduling code paths.
+
+Every scenario seeds its own data inside a transaction that is rolled back,
+so it can be run against any database without leaving rows behind:
+
+    python manage.py benchmark_appointments slots
+
+Scenarios that need several connections (rollback = False) commit their
+data and delete it again when they finish.
+"""
+import random
+import threading
+import time as perf_time
+import tracemalloc
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, List
+from urllib.parse import parse_qs, urlsplit
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from apps.core.geo import bounding_box, geohash_encode, haversine_km
+from apps.core.timezones import to_epoch_minutes
+from apps.services.controllers import get_all_services, search_services
+from apps.services.models import Service, ServiceCategory
+from apps.services.search import refresh_search_vectors
+from apps.services.serializers import ServiceSerializer
+from apps.users.controllers import get_nearby_providers
+from apps.users.models import Profile, User
+from .controllers import (
+    AppointmentController,
+    AvailabilityController,
+    CalendarController,
+    SlotController,
+)
+from .intervals import BusySweep
+from .models import Appointment, ProviderAvailability
+from .occupancy import DayOccupancy
+
+
+def measure(func, *args, **kwargs):
+    """Run func once and return (result, query_count, elapsed_ms)"""
+    with CaptureQueriesContext(connection) as queries:
+        started = perf_time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed_ms = (perf_time.perf_counter() - started) * 1000
+    return result, len(queries), round(elapsed_ms, 2)
+
+
+def create_profile(role="client"):
+    """Create a throwaway user and return its profile"""
+    suffix = uuid.uuid4().hex[:12]
+    user = User(
+        username=f"bench_{suffix}",
+        first_name="Bench",
+        last_name=role.title(),
+        email=f"bench_{suffix}@example.com",
+        role=role,
+    )
+    # Skips password hashing, which would dominate seeding many providers
+    user.set_unusable_password()
+    user.save()
+    return user.profile
+
+
+def seed_provider(
+    days: int,
+    bookings_per_day: int = 4,
+    start_hour: int = 8,
+    end_hour: int = 18,
+    service_minutes: int = 60,
+):
+    """
+    Create a provider working start_hour-end_hour every day, a service and
+    bookings_per_day appointments per day starting tomorrow.
+    Returns (provider, client, service, first_day).
+    """
+    provider = create_profile(role="provider")
+    client = create_profile(role="client")
+    category = ServiceCategory.objects.create(name=f"Bench {uuid.uuid4().hex[:6]}")
+    service = Service.objects.create(
+        provider=provider,
+        category=category,
+        name="Bench service",
+        duration=timedelta(minutes=service_minutes),
+        price=Decimal("5000"),
+    )
+
+    ProviderAvailability.objects.bulk_create(
+        ProviderAvailability(
+            provider=provider,
+            day_of_week=day_of_week,
+            start_time=time(start_hour),
+            end_time=time(end_hour),
+        )
+        for day_of_week in range(7)
+    )
+
+    first_day = timezone.localdate() + timedelta(days=1)
+    working_minutes = (end_hour - start_hour) * 60
+    step = max(working_minutes // max(bookings_per_day, 1), 1)
+    appointments = []
+
+    for day_offset in range(days):
+        day_start = timezone.make_aware(
+            datetime.combine(first_day + timedelta(days=day_offset), time(start_hour))
+        )
+        for booking in range(bookings_per_day):
+            scheduled_for = day_start + timedelta(minutes=booking * step)
+            appointments.append(
+                Appointment(
+                    client=client,
+                    provider=provider,
+                    service=service,
+                    scheduled_for=scheduled_for,
+                    scheduled_until=scheduled_for
+                    + timedelta(minutes=min(service_minutes, step)),
+                    amount=service.price,
+                    status="confirmed",
+                )
+            )
+
+    Appointment.objects.bulk_create(appointments)
+    return provider, client, service, first_day
+
+
+def legacy_generate_available_slots(
+    provider, service, start_date: date, end_date: date
+):
+    """
+    The previous per-day / per-candidate implementation, kept here as the
+    baseline: two availability queries per day and one overlap query per
+    candidate slot.
+    """
+    slots = []
+    current_date = start_date
+
+    while current_date <= end_date:
+        availability = AvailabilityController.get_provider_availability_for_date(
+            provider, current_date
+        )
+        if availability["available"]:
+            slot_start = SlotController._localize(
+                current_date, availability["start_time"]
+            )
+            day_end = SlotController._localize(current_date, availability["end_time"])
+            while slot_start + service.duration <= day_end:
+                slot_end = slot_start + service.duration
+                if slot_start > timezone.now() and SlotController.is_slot_available(
+                    provider, slot_start, slot_end
+                ):
+                    slots.append({"start_time": slot_start, "end_time": slot_end})
+                slot_start += SlotController.BASE_SLOT_DURATION
+        current_date += timedelta(days=1)
+
+    return slots
+
+
+def benchmark_slot_generation(**options):
+    """Query count and latency of slot generation for 1, 7 and 30 day ranges"""
+    rows = []
+    provider, _, service, first_day = seed_provider(days=30)
+
+    for days in (1, 7, 30):
+        end_day = first_day + timedelta(days=days - 1)
+        legacy, legacy_queries, legacy_ms = measure(
+            legacy_generate_available_slots, provider, service, first_day, end_day
+        )
+        current, current_queries, current_ms = measure(
+            SlotController.generate_available_slots,
+            provider,
+            service,
+            first_day,
+            end_day,
+        )
+        rows.append(
+            {
+                "days": days,
+                "slots": len(current),
+                "before_queries": legacy_queries,
+                "before_ms": legacy_ms,
+                "after_queries": current_queries,
+                "after_ms": current_ms,
+                "same_result": [s["start_time"] for s in legacy]
+                == [s["start_time"] for s in current],
+            }
+        )
+
+    return rows
+
+
+def legacy_monthly_availability_overview(provider, year: int, month: int):
+    """
+    The previous calendar implementation: availability and appointments are
+    queried per day and each booked appointment lazily loads its client and
+    service. Days are the provider's and every chair counts, as in the
+    current implementation, so both give the same result.
+    """
+    start_date = date(year, month, 1)
+    end_date = (start_date + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    overview = {}
+    current_date = start_date
+
+    while current_date <= end_date:
+        availability = AvailabilityController.get_provider_availability_for_date(
+            provider, current_date
+        )
+        if not availability["available"]:
+            overview[current_date] = "full"
+        else:
+            AvailabilityController.get_provider_availability_for_date(
+                provider, current_date
+            )
+            booked_minutes = 0
+            # __date is evaluated in the current time zone
+            with timezone.override(provider.tzinfo):
+                appointments = list(
+                    Appointment.objects.filter(
+                        provider=provider,
+                        scheduled_for__date=current_date,
+                        status__in=["pending", "confirmed"],
+                    )
+                )
+            for appointment in appointments:
+                booked_minutes += (
+                    appointment.scheduled_until - appointment.scheduled_for
+                ).total_seconds() / 60
+                appointment.client.user.get_fullname, appointment.service.name
+            overview[current_date] = CalendarController._get_availability_level(
+                CalendarController._get_occupancy_percentage(
+                    current_date, availability, booked_minutes, provider.capacity
+                )
+            )
+        current_date += timedelta(days=1)
+
+    return overview
+
+
+def benchmark_monthly_calendar(**options):
+    """Query count and latency of the monthly calendar overview"""
+    provider, _, _, first_day = seed_provider(days=31, bookings_per_day=6)
+
+    legacy, legacy_queries, legacy_ms = measure(
+        legacy_monthly_availability_overview, provider, first_day.year, first_day.month
+    )
+    current, current_queries, current_ms = measure(
+        CalendarController.get_monthly_availability_overview,
+        provider,
+        first_day.year,
+        first_day.month,
+    )
+
+    return [
+        {
+            "month": f"{first_day.year}-{first_day.month:02d}",
+            "before_queries": legacy_queries,
+            "before_ms": legacy_ms,
+            "after_queries": current_queries,
+            "after_ms": current_ms,
+            "same_result": legacy == current,
+        }
+    ]
+
+
+OCCUPANCY_DURATIONS = (30, 60, 90, 120)
+
+
+def loop_day_occupancy(target_date, availability, busy_intervals):
+    """
+    Loop-based occupancy, largest free block and bookable start times (for
+    each of OCCUPANCY_DURATIONS) for one day
+    """
+    if not availability["available"]:
+        return 0, 0, {}
+
+    window_start = SlotController._localize(target_date, availability["start_time"])
+    window_end = SlotController._localize(target_date, availability["end_time"])
+    booked_minutes = 0
+    free_blocks = []
+    cursor = window_start
+
+    for start, end in sorted(busy_intervals):
+        start, end = max(start, window_start), min(end, window_end)
+        if end <= cursor:
+            continue
+        if start > cursor:
+            free_blocks.append((cursor, start))
+        booked_minutes += (end - max(start, cursor)).total_seconds() / 60
+        cursor = end
+    if cursor < window_end:
+        free_blocks.append((cursor, window_end))
+
+    total_minutes = (window_end - window_start).total_seconds() / 60
+    largest = max(
+        ((end - start).total_seconds() / 60 for start, end in free_blocks), default=0
+    )
+
+    free_starts = {}
+    for duration in OCCUPANCY_DURATIONS:
+        sweep = BusySweep(busy_intervals)
+        candidate = window_start
+        starts = []
+        while candidate + timedelta(minutes=duration) <= window_end:
+            if sweep.is_free(candidate, candidate + timedelta(minutes=duration)):
+                starts.append(candidate)
+            candidate += SlotController.BASE_SLOT_DURATION
+        free_starts[duration] = len(starts)
+
+    return int(booked_minutes * 100 / total_minutes), largest, free_starts
+
+
+def benchmark_occupancy(repeat: int = 20, **options):
+    """Loop-based vs bitmap occupancy for a month of 60 bookings a day"""
+    days = 30
+    provider, _, _, first_day = seed_provider(
+        days=days, bookings_per_day=60, start_hour=8, end_hour=18, service_minutes=5
+    )
+    last_day = first_day + timedelta(days=days - 1)
+
+    availability_by_date = AvailabilityController.get_provider_availability_for_range(
+        provider, first_day, last_day
+    )
+    busy_intervals = SlotController.get_busy_intervals(
+        provider,
+        SlotController._localize(first_day, time.min),
+        SlotController._localize(last_day + timedelta(days=1), time.min),
+    )
+    intervals_by_date = {}
+    for start, end in busy_intervals:
+        intervals_by_date.setdefault(timezone.localtime(start).date(), []).append(
+            (start, end)
+        )
+
+    def loop_based():
+        return {
+            day: loop_day_occupancy(day, availability, intervals_by_date.get(day, []))
+            for day, availability in availability_by_date.items()
+        }
+
+    def bitmap_based():
+        results = {}
+        for day, availability in availability_by_date.items():
+            occupancy = DayOccupancy.from_schedule(
+                day, availability, intervals_by_date.get(day, [])
+            )
+            start, end = occupancy.largest_free_block()
+            results[day] = (
+                occupancy.occupancy_percentage,
+                end - start,
+                {
+                    duration: len(occupancy.free_starts(duration))
+                    for duration in OCCUPANCY_DURATIONS
+                },
+            )
+        return results
+
+    def best_of(func):
+        timings = [measure(func)[2] for _ in range(repeat)]
+        return func(), min(timings)
+
+    loop, loop_ms = best_of(loop_based)
+    bitmap, bitmap_ms = best_of(bitmap_based)
+
+    return [
+        {
+            "days": days,
+            "bookings_per_day": 60,
+            "loop_ms": loop_ms,
+            "bitmap_ms": bitmap_ms,
+            "same_result": loop == bitmap,
+        }
+    ]
+
+
+EARLIEST_SLOTS_TARGET_MS = 150
+
+
+def legacy_earliest_category_slots(
+    category, start_date, end_date, limit, latitude, longitude, radius_km
+):
+    """
+    The per-service approach: one get_available_slots call per service in
+    the category, then filter by distance and sort
+    """
+    slots = []
+    for service in Service.objects.filter(category=category, is_active=True):
+        provider = service.provider
+        distance_km = haversine_km(
+            latitude, longitude, float(provider.latitude), float(provider.longitude)
+        )
+        if distance_km > radius_km:
+            continue
+        for slot in SlotController.generate_available_slots(
+            provider, service, start_date, end_date
+        ):
+            slots.append((slot["start_time"], distance_km, service.id))
+
+    return [(start_time, service_id) for start_time, _, service_id in sorted(slots)][
+        :limit
+    ]
+
+
+def benchmark_earliest_slots(
+    providers: int = 100, repeat: int = 10, limit: int = 50, **options
+):
+    """
+    Earliest slots across a category of providers spread around Bamenda,
+    checked against a latency target (p95 over repeat runs)
+    """
+    latitude, longitude = 5.9597, 10.1460
+    category = ServiceCategory.objects.bulk_create(
+        [ServiceCategory(name=f"Bench {uuid.uuid4().hex[:6]}")]
+    )[0]
+    start_date = timezone.localdate() + timedelta(days=1)
+    end_date = start_date + timedelta(days=6)
+
+    for index in range(providers):
+        provider, _, service, _ = seed_provider(days=7, bookings_per_day=4)
+        # ~0.5 km steps north-east, so roughly half are within 20 km
+        provider.latitude = Decimal(str(round(latitude + index * 0.003, 6)))
+        provider.longitude = Decimal(str(round(longitude + index * 0.003, 6)))
+        provider.save(update_fields=["latitude", "longitude"])
+        Service.objects.filter(pk=service.pk).update(category=category)
+
+    arguments = (category, start_date, end_date, limit, latitude, longitude, 20)
+
+    def run_current():
+        return SlotController.get_earliest_slots_for_category(
+            category,
+            start_date,
+            end_date,
+            limit,
+            latitude=latitude,
+            longitude=longitude,
+            radius_km=20,
+        )
+
+    def p95(func):
+        timings = sorted(measure(func)[2] for _ in range(repeat))
+        return timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+
+    legacy, legacy_queries, _ = measure(legacy_earliest_category_slots, *arguments)
+    current, current_queries, _ = measure(run_current)
+    current_p95 = p95(run_current)
+
+    return [
+        {
+            "providers": providers,
+            "limit": limit,
+            "before_queries": legacy_queries,
+            "before_p95_ms": p95(lambda: legacy_earliest_category_slots(*arguments)),
+            "after_queries": current_queries,
+            "after_p95_ms": current_p95,
+            "target_ms": EARLIEST_SLOTS_TARGET_MS,
+            "within_target": current_p95 <= EARLIEST_SLOTS_TARGET_MS,
+            "same_result": legacy
+            == [(slot["start_time"], slot["service_id"]) for slot in current],
+        }
+    ]
+
+
+def legacy_create_appointment(client, service, scheduled_for, scheduled_until, amount):
+    """
+    The previous booking path: the availability check and the insert run as
+    separate autocommit statements, so two requests can both pass the check
+    """
+    if not SlotController.is_slot_available(
+        service.provider, scheduled_for, scheduled_until
+    ):
+        raise ValueError("Selected time slot is no longer available")
+
+    return Appointment.objects.create(
+        client=client,
+        provider=service.provider,
+        service=service,
+        scheduled_for=scheduled_for,
+        scheduled_until=scheduled_until,
+        amount=amount,
+        status="pending",
+        payment_status="pending",
+    )
+
+
+def count_double_bookings(provider) -> int:
+    """Pairs of active appointments of provider that overlap in time"""
+    intervals = sorted(
+        Appointment.objects.filter(
+            provider=provider, status__in=["pending", "confirmed"]
+        ).values_list("scheduled_for", "scheduled_until")
+    )
+    overlaps = 0
+    for index, (start, end) in enumerate(intervals):
+        for other_start, _ in intervals[index + 1 :]:
+            if other_start >= end:
+                break
+            overlaps += 1
+    return overlaps
+
+
+def benchmark_booking_storm(
+    threads: int = 8, attempts: int = 25, slots: int = 4, **options
+):
+    """
+    threads clients concurrently try to book the same few slots, with the
+    unguarded check-then-insert path and with AppointmentController
+    """
+    provider = create_profile(role="provider")
+    clients = [create_profile(role="client") for _ in range(threads)]
+
+    # bulk_create skips the translation signals, which would call out to the
+    # network once this data is committed
+    category = ServiceCategory.objects.bulk_create(
+        [ServiceCategory(name=f"Bench {uuid.uuid4().hex[:6]}")]
+    )[0]
+    service = Service.objects.bulk_create(
+        [
+            Service(
+                provider=provider,
+                category=category,
+                name="Bench service",
+                duration=timedelta(minutes=30),
+                price=Decimal("5000"),
+            )
+        ]
+    )[0]
+    service.provider = provider
+
+    paths = {
+        "unguarded": legacy_create_appointment,
+        "guarded": AppointmentController.create_appointment,
+    }
+    rows = []
+
+    try:
+        for day_offset, (label, create) in enumerate(paths.items(), start=1):
+            day_start = timezone.make_aware(
+                datetime.combine(
+                    timezone.localdate() + timedelta(days=day_offset), time(9)
+                )
+            )
+            candidates = [
+                day_start + timedelta(minutes=30 * index) for index in range(slots)
+            ]
+            outcome = {"booked": 0, "rejected": 0, "errors": 0}
+            lock = threading.Lock()
+            barrier = threading.Barrier(threads)
+
+            def worker(client):
+                barrier.wait()
+                try:
+                    for attempt in range(attempts):
+                        scheduled_for = candidates[attempt % slots]
+                        try:
+                            create(
+                                client,
+                                service,
+                                scheduled_for,
+                                scheduled_for + service.duration,
+                                service.price,
+                            )
+                            result = "booked"
+                        except ValueError:
+                            result = "rejected"
+                        except OperationalError:
+                            result = "errors"
+                        with lock:
+                            outcome[result] += 1
+                finally:
+                    connection.close()
+
+            workers = [
+                threading.Thread(target=worker, args=(client,)) for client in clients
+            ]
+            started = perf_time.perf_counter()
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            elapsed = perf_time.perf_counter() - started
+
+            overlaps = count_double_bookings(provider)
+            Appointment.objects.filter(provider=provider).delete()
+            rows.append(
+                {
+                    "path": label,
+                    "threads": threads,
+                    "attempts": threads * attempts,
+                    "booked": outcome["booked"],
+                    "rejected": outcome["rejected"],
+                    "errors": outcome["errors"],
+                    "double_bookings": overlaps,
+                    "attempts_per_s": round(threads * attempts / elapsed, 1),
+                }
+            )
+    finally:
+        User.objects.filter(profile__in=[provider, *clients]).delete()
+        category.delete()
+
+    return rows
+
+
+benchmark_booking_storm.rollback = False
+
+
+def provider_then_client_conflict(provider, client, start_time, end_time):
+    """The provider check followed by a separate client check: two queries"""
+    if not SlotController.is_slot_available(provider, start_time, end_time):
+        return "provider"
+    if Appointment.objects.filter(
+        client=client,
+        scheduled_for__lt=end_time,
+        scheduled_until__gt=start_time,
+        status__in=["pending", "confirmed"],
+    ).exists():
+        return "client"
+    return None
+
+
+def benchmark_conflict_check(days: int = 30, other_providers: int = 5, **options):
+    """
+    Booking-time conflict checks for every hour of a month: today's
+    provider-only check, provider and client checked with two queries, and
+    the combined single-query check
+    """
+    provider, client, service, first_day = seed_provider(days=days)
+
+    # The client also has a daily appointment with other providers, which
+    # the provider-only check cannot see
+    others = [create_profile(role="provider") for _ in range(other_providers)]
+    Appointment.objects.bulk_create(
+        Appointment(
+            client=client,
+            provider=others[day_offset % other_providers],
+            service=service,
+            scheduled_for=SlotController._localize(
+                first_day + timedelta(days=day_offset), time(12)
+            ),
+            scheduled_until=SlotController._localize(
+                first_day + timedelta(days=day_offset), time(13)
+            ),
+            amount=service.price,
+            status="confirmed",
+        )
+        for day_offset in range(days)
+    )
+
+    candidates = [
+        SlotController._localize(first_day + timedelta(days=day_offset), time(hour))
+        for day_offset in range(days)
+        for hour in range(8, 18)
+    ]
+
+    paths = {
+        "provider_only": lambda start, end: (
+            None
+            if SlotController.is_slot_available(provider, start, end)
+            else "provider"
+        ),
+        "provider_then_client": lambda start, end: provider_then_client_conflict(
+            provider, client, start, end
+        ),
+        "combined": lambda start, end: SlotController.find_conflict(
+            provider, start, end, client=client
+        ),
+    }
+
+    measured = {
+        label: measure(
+            lambda: [check(start, start + service.duration) for start in candidates]
+        )
+        for label, check in paths.items()
+    }
+    expected = measured["provider_then_client"][0]
+
+    return [
+        {
+            "path": label,
+            "checks": len(candidates),
+            "queries_per_check": round(queries / len(candidates), 2),
+            "ms_per_check": round(elapsed_ms / len(candidates), 3),
+            "provider_conflicts": conflicts.count("provider"),
+            "client_conflicts": conflicts.count("client"),
+            "same_result": conflicts == expected,
+        }
+        for label, (conflicts, queries, elapsed_ms) in measured.items()
+    ]
+
+
+def legacy_capacity_slots(provider, service, start_date: date, end_date: date):
+    """
+    Remaining capacity computed per candidate slot: one query for the
+    overlapping appointments, then the peak number of them running at once
+    (a plain COUNT would overstate it when they do not overlap each other)
+    """
+    slots = []
+    current_date = start_date
+
+    while current_date <= end_date:
+        availability = AvailabilityController.get_provider_availability_for_date(
+            provider, current_date
+        )
+        if availability["available"]:
+            slot_start = SlotController._localize(
+                current_date, availability["start_time"]
+            )
+            day_end = SlotController._localize(current_date, availability["end_time"])
+            while slot_start + service.duration <= day_end:
+                slot_end = slot_start + service.duration
+                overlapping = list(
+                    Appointment.objects.filter(
+                        provider=provider,
+                        scheduled_for__lt=slot_end,
+                        scheduled_until__gt=slot_start,
+                        status__in=["pending", "confirmed"],
+                    ).values_list("scheduled_for", "scheduled_until")
+                )
+                booked = max(
+                    (
+                        sum(start <= moment < end for start, end in overlapping)
+                        for moment in [slot_start]
+                        + [start for start, _ in overlapping if start > slot_start]
+                    ),
+                    default=0,
+                )
+                if slot_start > timezone.now() and booked < provider.capacity:
+                    slots.append(
+                        {
+                            "start_time": slot_start,
+                            "remaining_capacity": provider.capacity - booked,
+                        }
+                    )
+                slot_start += SlotController.BASE_SLOT_DURATION
+        current_date += timedelta(days=1)
+
+    return slots
+
+
+def benchmark_capacity_slots(capacity: int = 3, **options):
+    """
+    Slot generation for a provider with several chairs, where overlapping
+    bookings stack up to the capacity at different times of the day
+    """
+    rows = []
+    provider, client, service, first_day = seed_provider(days=30, bookings_per_day=8)
+    provider.capacity = capacity
+    provider.save(update_fields=["capacity"])
+
+    # Extra layers shifted by 30 minutes, so the concurrency varies from 0
+    # to the full capacity over the day
+    layers = list(Appointment.objects.filter(provider=provider))
+    Appointment.objects.bulk_create(
+        Appointment(
+            client=client,
+            provider=provider,
+            service=service,
+            scheduled_for=appointment.scheduled_for + timedelta(minutes=30 * layer),
+            scheduled_until=appointment.scheduled_until + timedelta(minutes=30 * layer),
+            amount=service.price,
+            status="confirmed",
+            exclusive=False,
+        )
+        for layer in range(1, capacity)
+        for appointment in layers[:: layer + 1]
+    )
+
+    for days in (1, 7, 30):
+        end_day = first_day + timedelta(days=days - 1)
+        legacy, legacy_queries, legacy_ms = measure(
+            legacy_capacity_slots, provider, service, first_day, end_day
+        )
+        current, current_queries, current_ms = measure(
+            SlotController.generate_available_slots,
+            provider,
+            service,
+            first_day,
+            end_day,
+        )
+        rows.append(
+            {
+                "days": days,
+                "slots": len(current),
+                "before_queries": legacy_queries,
+                "before_ms": legacy_ms,
+                "after_queries": current_queries,
+                "after_ms": current_ms,
+                "same_result": [
+                    (s["start_time"], s["remaining_capacity"]) for s in legacy
+                ]
+                == [(s["start_time"], s["remaining_capacity"]) for s in current],
+            }
+        )
+
+    return rows
+
+
+def legacy_slots_for_date(
+    slot_date: date,
+    availability: Dict,
+    duration: timedelta,
+    busy_sweep: BusySweep,
+    now: datetime,
+) -> List[Dict]:
+    """
+    The previous per-day generator: aware datetimes are built and compared
+    for every candidate, and the grid is stepped on the wall clock
+    """
+    slots = []
+    duration_minutes = duration.total_seconds() / 60
+
+    for window_start, window_end in availability["windows"]:
+        current_slot_start = SlotController._localize(slot_date, window_start)
+        end_datetime = SlotController._localize(slot_date, window_end)
+
+        while current_slot_start + duration <= end_datetime:
+            current_slot_end = current_slot_start + duration
+            remaining = (
+                busy_sweep.remaining(current_slot_start, current_slot_end)
+                if current_slot_start > now
+                else 0
+            )
+            if remaining:
+                slots.append(
+                    {
+                        "start_time": current_slot_start,
+                        "end_time": current_slot_end,
+                        "date": slot_date,
+                        "duration_minutes": duration_minutes,
+                        "remaining_capacity": remaining,
+                    }
+                )
+            current_slot_start += SlotController.BASE_SLOT_DURATION
+
+    return slots
+
+
+def benchmark_slot_generator(slots: int = 10000, repeat: int = 5, **options):
+    """
+    The in-memory slot generator alone (no queries) producing about 10k
+    slots: datetime candidates vs integer epoch minutes. Reports the best
+    time and the peak memory allocated while generating.
+    """
+    duration = timedelta(minutes=60)
+    # 08:00-20:00 with a 13:00-14:00 booking leaves 20 slots a day
+    days = -(-slots // 20)
+    first_day = timezone.localdate() + timedelta(days=1)
+    tz = timezone.get_current_timezone()
+    dates = [first_day + timedelta(days=offset) for offset in range(days)]
+    availability = {"windows": [(time(8), time(20))]}
+    busy = [
+        (
+            SlotController._localize(day, time(13)),
+            SlotController._localize(day, time(14)),
+        )
+        for day in dates
+    ]
+
+    def datetime_based():
+        sweep = BusySweep(busy)
+        now = timezone.now()
+        return [
+            slot
+            for day in dates
+            for slot in legacy_slots_for_date(day, availability, duration, sweep, now)
+        ]
+
+    def epoch_minute_based():
+        sweep = SlotController._minute_sweep(busy)
+        now_minute = to_epoch_minutes(timezone.now())
+        return [
+            slot
+            for day in dates
+            for slot in SlotController._generate_slots_for_date(
+                None, day, availability, 0, sweep, now_minute, duration, tz
+            )
+        ]
+
+    def best_of(func):
+        timings = [measure(func)[2] for _ in range(repeat)]
+        tracemalloc.start()
+        result = func()
+        peak_kib = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+        return result, min(timings), peak_kib
+
+    rows = []
+    results = {}
+    for label, func in (
+        ("datetime", datetime_based),
+        ("epoch_minutes", epoch_minute_based),
+    ):
+        result, elapsed_ms, peak_kib = best_of(func)
+        results[label] = result
+        rows.append(
+            {
+                "generator": label,
+                "slots": len(result),
+                "ms": elapsed_ms,
+                "us_per_slot": round(elapsed_ms * 1000 / max(len(result), 1), 2),
+                "peak_kib": peak_kib,
+            }
+        )
+
+    for row in rows:
+        row["same_result"] = [
+            (slot["start_time"], slot["end_time"], slot["remaining_capacity"])
+            for slot in results[row["generator"]]
+        ] == [
+            (slot["start_time"], slot["end_time"], slot["remaining_capacity"])
+            for slot in results["datetime"]
+        ]
+    return rows
+
+
+# Queries a service list page may cost, whatever the size of the catalog
+CATALOG_QUERY_BUDGET = 1
+
+
+def benchmark_catalog(sizes=(100, 2000), page_size: int = 20, **options):
+    """
+    Query count and latency of the service list: the former unpaginated
+    ServiceSerializer list vs the first and the last keyset page, for
+    catalogs of increasing size. within_budget checks the page stays at
+    CATALOG_QUERY_BUDGET queries.
+    """
+    factory = APIRequestFactory()
+    rows = []
+    for size in sizes:
+        category = ServiceCategory.objects.create(name=f"Bench {uuid.uuid4().hex[:6]}")
+        providers = [create_profile("provider") for _ in range(10)]
+        now = timezone.now()
+        Service.objects.bulk_create(
+            Service(
+                provider=providers[index % len(providers)],
+                category=category,
+                name=f"Service {index % 50}",
+                name_en=f"Service {index % 50}",
+                duration=timedelta(minutes=30),
+                price=Decimal("5000.00"),
+                next_available_at=now + timedelta(minutes=index) if index % 3 else None,
+            )
+            for index in range(size)
+        )
+
+        def legacy_list():
+            services = Service.objects.filter(category=category, is_active=True)
+            return ServiceSerializer(services, many=True).data
+
+        def page(cursor=None, ordering=None):
+            params = {"category": category.pkid, "page_size": page_size}
+            if cursor:
+                params["cursor"] = cursor
+            if ordering:
+                params["ordering"] = ordering
+            return get_all_services(factory.get("/api/v1/services/", params)).data
+
+        def last_cursor(ordering=None):
+            cursor = None
+            while True:
+                next_link = page(cursor, ordering)["next"]
+                if not next_link:
+                    return cursor
+                cursor = parse_qs(urlsplit(next_link).query)["cursor"][0]
+
+        cases = [("unpaginated", legacy_list)]
+        for ordering in (None, "next_available"):
+            label = ordering or "name"
+            deep_cursor = last_cursor(ordering)
+            cases.append((f"first_page ({label})", lambda o=ordering: page(None, o)))
+            cases.append(
+                (f"last_page ({label})", lambda c=deep_cursor, o=ordering: page(c, o))
+            )
+
+        for label, func in cases:
+            data, queries, elapsed_ms = measure(func)
+            results = data if isinstance(data, list) else data["results"]
+            rows.append(
+                {
+                    "catalog": size,
+                    "endpoint": label,
+                    "rows": len(results),
+                    "queries": queries,
+                    "ms": elapsed_ms,
+                    "within_budget": queries <= CATALOG_QUERY_BUDGET,
+                }
+            )
+    return rows
+
+
+# (English, French) service names the search catalog is seeded from
+SEARCH_VOCABULARY = (
+    ("Braids", "Tresses"),
+    ("Haircut", "Coupe de cheveux"),
+    ("Manicure", "Manucure"),
+    ("Makeup", "Maquillage"),
+    ("Beard trim", "Taille de barbe"),
+    ("Massage", "Massage"),
+)
+
+
+def benchmark_service_search(
+    size: int = 200000, terms=("braids", "tresses", "brads"), **options
+):
+    """
+    The former name/description icontains filter (current language only)
+    vs the search endpoint's first ranked page, on a seeded catalog.
+    Full-text and trigram matching need PostgreSQL; on other backends the
+    endpoint runs its icontains fallback over both languages.
+    """
+    category = ServiceCategory.objects.create(name=f"Bench {uuid.uuid4().hex[:6]}")
+    providers = [create_profile("provider") for _ in range(20)]
+    batch = []
+    for index in range(size):
+        name_en, name_fr = SEARCH_VOCABULARY[index % len(SEARCH_VOCABULARY)]
+        batch.append(
+            Service(
+                provider=providers[index % len(providers)],
+                category=category,
+                name=f"{name_en} {index}",
+                name_en=f"{name_en} {index}",
+                # Half the catalog is only named in English
+                name_fr=(
+                    f"{name_fr} {index}"
+                    if index // len(SEARCH_VOCABULARY) % 2
+                    else None
+                ),
+                description_en=f"{name_en} by an experienced stylist",
+                duration=timedelta(minutes=30),
+                price=Decimal("5000.00"),
+            )
+        )
+        if len(batch) == 5000:
+            Service.objects.bulk_create(batch)
+            batch = []
+    Service.objects.bulk_create(batch)
+    refresh_search_vectors(Service.objects.filter(category=category))
+
+    factory = APIRequestFactory()
+    services = Service.objects.filter(category=category, is_active=True)
+    rows = []
+    for term in terms:
+
+        def legacy_search():
+            return list(
+                services.filter(
+                    Q(name__icontains=term) | Q(description__icontains=term)
+                ).values_list("pkid", flat=True)
+            )
+
+        def legacy_first_page():
+            return list(
+                services.filter(
+                    Q(name__icontains=term) | Q(description__icontains=term)
+                ).order_by("name")[:20]
+            )
+
+        def search_page():
+            request = factory.get("/api/v1/services/search/", {"q": term})
+            return search_services(request).data["results"]
+
+        for label, func in (
+            ("icontains (all matches)", legacy_search),
+            ("icontains (first 20)", legacy_first_page),
+            (f"search ({connection.vendor})", search_page),
+        ):
+            result, queries, elapsed_ms = measure(func)
+            rows.append(
+                {
+                    "term": term,
+                    "method": label,
+                    "rows": len(result),
+                    "queries": queries,
+                    "ms": elapsed_ms,
+                }
+            )
+    return rows
+
+
+# Latency the nearby-provider page should stay under
+NEARBY_TARGET_MS = 50
+# Cities providers cluster around
+NEARBY_CITIES = (
+    ("Bamenda", 5.9597, 10.1460),
+    ("Douala", 4.0511, 9.7679),
+    ("Yaounde", 3.8480, 11.5021),
+)
+# Where the nearby search is run from: the cities and a sparse rural area
+NEARBY_ORIGINS = NEARBY_CITIES + (("Countryside", 7.3, 13.6),)
+
+
+def legacy_nearby_providers(latitude, longitude, radius_km, page_size):
+    """
+    Bounding box on the (latitude, longitude) index, then haversine
+    distances and sorting in Python, as the earliest-slots search does
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    nearby = []
+    for provider in Profile.objects.filter(
+        user__role="provider",
+        latitude__gte=min_lat,
+        latitude__lte=max_lat,
+        longitude__gte=min_lon,
+        longitude__lte=max_lon,
+    ).only("pkid", "latitude", "longitude"):
+        distance_km = haversine_km(
+            latitude, longitude, float(provider.latitude), float(provider.longitude)
+        )
+        if distance_km <= radius_km:
+            nearby.append((distance_km, provider.pkid))
+    return sorted(nearby)[:page_size]
+
+
+def benchmark_nearby_providers(
+    providers: int = 100000, radii=(2, 10, 50), page_size: int = 20, **options
+):
+    """
+    Nearest providers to each of NEARBY_ORIGINS: the bounding box scan
+    sorted in Python vs the nearby endpoint's first page, over providers
+    seeded across Cameroon, half of them clustered around the cities.
+    within_target checks the endpoint stays under NEARBY_TARGET_MS.
+    """
+    generator = random.Random(25)
+    suffix = uuid.uuid4().hex[:8]
+    users = []
+    for index in range(providers):
+        user = User(
+            username=f"bench_near_{suffix}_{index}",
+            first_name="Bench",
+            last_name="Provider",
+            email=f"bench_near_{suffix}_{index}@example.com",
+            role="provider",
+        )
+        user.set_unusable_password()
+        users.append(user)
+    # Bulk inserts skip the signal creating profiles and Profile.save()
+    User.objects.bulk_create(users, batch_size=5000)
+
+    profiles = []
+    for index, user in enumerate(users):
+        if index % 2:
+            _, city_lat, city_lon = NEARBY_CITIES[index % len(NEARBY_CITIES)]
+            latitude = city_lat + generator.gauss(0, 0.15)
+            longitude = city_lon + generator.gauss(0, 0.15)
+        else:
+            latitude = generator.uniform(2.0, 13.0)
+            longitude = generator.uniform(8.5, 16.0)
+        latitude, longitude = round(latitude, 6), round(longitude, 6)
+        profiles.append(
+            Profile(
+                user=user,
+                latitude=Decimal(str(latitude)),
+                longitude=Decimal(str(longitude)),
+                geohash=geohash_encode(latitude, longitude),
+                is_verified_provider=index % 3 == 0,
+            )
+        )
+    Profile.objects.bulk_create(profiles, batch_size=5000)
+
+    factory = APIRequestFactory()
+    rows = []
+    for origin, latitude, longitude in NEARBY_ORIGINS:
+        for radius_km in radii:
+
+            def legacy():
+                return legacy_nearby_providers(
+                    latitude, longitude, radius_km, page_size
+                )
+
+            def endpoint():
+                request = factory.get(
+                    "/api/v1/users/providers/nearby/",
+                    {
+                        "latitude": latitude,
+                        "longitude": longitude,
+                        "radius_km": radius_km,
+                        "page_size": page_size,
+                    },
+                )
+                return get_nearby_providers(request).data["results"]
+
+            results = {}
+            for label, func in (("bounding box", legacy), ("nearby", endpoint)):
+                results[label], queries, elapsed_ms = measure(func)
+                rows.append(
+                    {
+                        "origin": origin,
+                        "radius_km": radius_km,
+                        "method": label,
+                        "rows": len(results[label]),
+                        "queries": queries,
+                        "ms": elapsed_ms,
+                        "within_target": (
+                            elapsed_ms <= NEARBY_TARGET_MS if label == "nearby" else ""
+                        ),
+                    }
+                )
+            rows[-1]["same_result"] = [
+                provider["pkid"] for provider in results["nearby"]
+            ] == [pkid for _, pkid in results["bounding box"]]
+            rows[-2]["same_result"] = ""
+    return rows
+
+
+SCENARIOS = {
+    "slots": benchmark_slot_generation,
+    "calendar": benchmark_monthly_calendar,
+    "occupancy": benchmark_occupancy,
+    "booking_storm": benchmark_booking_storm,
+    "earliest": benchmark_earliest_slots,
+    "conflict_check": benchmark_conflict_check,
+    "capacity": benchmark_capacity_slots,
+    "slot_generator": benchmark_slot_generator,
+    "catalog": benchmark_catalog,
+    "search": benchmark_service_search,
+    "nearby": benchmark_nearby_providers,
+}
+
+
+def run_scenario(name: str, **options):
+    """
+    Run a scenario inside a transaction that is always rolled back, unless it
+    opts out to commit (and clean up) its own data
+    """
+    scenario = SCENARIOS[name]
+    if not getattr(scenario, "rollback", True):
+        return scenario(**options)
+
+    with transaction.atomic():
+        rows = scenario(**options)
+        transaction.set_rollback(True)
+    return rows
@@ -0,0 +1,8 @@
+# apps/appointments/cache.py
+from django.conf import settings
+
+from apps.core.cache import VersionedCache
+
+# Scoped per provider: any write to a provider's availability, exceptions,
+# appointments or services bumps that provider's version.
+schedule_cache = VersionedCache("schedule", timeout=settings.SCHEDULE_CACHE_TIMEOUT)
@@ -1,12 +1,38 @@
 # apps/appointments/controllers.py
-from datetime import datetime, timedelta, time, date
+from datetime import datetime, timedelta, time, date, tzinfo
+from itertools import islice
+from math import ceil
+from django.conf import settings
 from django.utils import timezone
-from django.db import transaction
-from django.db.models import Q
-from typing import List, Dict, Optional
+from django.db import IntegrityError, connection, transaction
+from django.db.models import BooleanField, F, Q, Sum, Value
+from django.db.models.functions import TruncDate
+from typing import Iterable, List, Dict, Optional, Tuple
+import heapq
 import logging
-
-from .models import ProviderAvailability, ProviderAvailabilityException, Appointment
+import uuid
+
+from .models import (
+    ProviderAvailability,
+    ProviderAvailabilityException,
+    ProviderBreak,
+    Appointment,
+    AppointmentSeries,
+    AppointmentSlot,
+    WaitlistEntry,
+)
+from .holds import SlotHoldStore
+from .intervals import BusySweep, subtract_intervals
+from .occupancy import DayOccupancy
+from apps.core.geo import bounding_box, haversine_km
+from apps.core.timezones import (
+    MINUTE,
+    from_epoch_minutes,
+    get_zone,
+    to_epoch_minutes,
+    to_epoch_minutes_ceil,
+    wall_clock_minutes,
+)
 from apps.services.models import Service
 from apps.users.models import Profile
 
@@ -22,24 +48,261 @@ class AvailabilityController:
     def set_provider_availability(
         provider, day_of_week: int, start_time: time, end_time: time
     ):
-        """Set or update provider's recurring availability for a specific day"""
+        """Set provider's recurring availability for a day to a single window"""
+        availabilities, created = AvailabilityController.set_day_windows(
+            provider, day_of_week, [(start_time, end_time)]
+        )
+        return availabilities[0], created
+
+    @staticmethod
+    @transaction.atomic
+    def set_day_windows(
+        provider, day_of_week: int, windows: List[Tuple[time, time]]
+    ) -> Tuple[List[ProviderAvailability], bool]:
+        """
+        Replace the working windows of a weekday. Windows already stored
+        unchanged are kept, so re-saving a schedule only writes the
+        difference. Returns the day's windows and whether any row was created.
+        """
+        from .signals import batched_schedule_changes
+
+        windows = sorted(windows)
+        AvailabilityController._check_windows(windows)
+
         try:
-            availability, created = ProviderAvailability.objects.update_or_create(
-                provider=provider,
-                day_of_week=day_of_week,
-                defaults={
-                    "start_time": start_time,
-                    "end_time": end_time,
-                    "is_available": True,
-                },
-            )
-            return availability, created
+            existing = {
+                (availability.start_time, availability.end_time): availability
+                for availability in ProviderAvailability.objects.filter(
+                    provider=provider, day_of_week=day_of_week
+                )
+            }
+
+            stale = [
+                availability.pk
+                for key, availability in existing.items()
+                if key not in windows
+            ]
+
+            availabilities = []
+            created = False
+            with batched_schedule_changes():
+                if stale:
+                    ProviderAvailability.objects.filter(pk__in=stale).delete()
+
+                for start_time, end_time in windows:
+                    availability = existing.get((start_time, end_time))
+                    if availability is None:
+                        availability = ProviderAvailability.objects.create(
+                            provider=provider,
+                            day_of_week=day_of_week,
+                            start_time=start_time,
+                            end_time=end_time,
+                        )
+                        created = True
+                    elif not availability.is_available:
+                        availability.is_available = True
+                        availability.save(update_fields=["is_available", "updated_at"])
+                    availabilities.append(availability)
+
+            return availabilities, created
         except Exception as e:
             logger.error(
                 f"Error setting availability for provider {provider.id}: {str(e)}"
             )
             raise
 
+    @staticmethod
+    def _check_windows(windows: List[Tuple[time, time]]) -> None:
+        """Raise ValueError unless the sorted windows are valid and disjoint"""
+        for start_time, end_time in windows:
+            if start_time >= end_time:
+                raise ValueError("Window start_time must be before end_time")
+        for (_, previous_end), (start_time, _) in zip(windows, windows[1:]):
+            if start_time < previous_end:
+                raise ValueError("Working windows of a day must not overlap")
+
+    @staticmethod
+    @transaction.atomic
+    def replace_weekly_schedules(
+        provider_ids: List[int],
+        windows: Dict[int, List[Tuple[time, time]]],
+        breaks: Optional[List[Tuple[Optional[int], time, time]]] = None,
+        exceptions: Optional[List[Dict]] = None,
+    ) -> Dict[str, int]:
+        """
+        Replace the weekly windows of every provider in provider_ids with
+        `windows` (day_of_week -> [(start, end)]; missing days are off), and
+        optionally their breaks and upcoming exceptions, in one transaction.
+
+        Existing rows are diffed against the template: identical rows are
+        kept, the rest is written with bulk_create/bulk_update and one
+        delete per table, and each provider's derived data (schedule cache,
+        slots, next availability) is refreshed once. Exceptions that ended
+        before today are history and are left alone.
+        """
+        from .signals import batched_schedule_changes, schedule_changed
+
+        windows = {day: sorted(day_windows) for day, day_windows in windows.items()}
+        for day_windows in windows.values():
+            AvailabilityController._check_windows(day_windows)
+
+        stats = {"created": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        today = timezone.localdate()
+
+        wanted_windows = {
+            (provider_id, day, start_time, end_time)
+            for provider_id in provider_ids
+            for day, day_windows in windows.items()
+            for start_time, end_time in day_windows
+        }
+        existing_windows = {
+            (
+                availability.provider_id,
+                availability.day_of_week,
+                availability.start_time,
+                availability.end_time,
+            ): availability
+            for availability in ProviderAvailability.objects.filter(
+                provider_id__in=provider_ids
+            )
+        }
+        to_enable = []
+        for key, availability in existing_windows.items():
+            if key in wanted_windows and not availability.is_available:
+                availability.is_available = True
+                to_enable.append(availability)
+
+        diffs = [
+            (
+                ProviderAvailability,
+                existing_windows,
+                wanted_windows,
+                lambda provider_id, day, start_time, end_time: ProviderAvailability(
+                    provider_id=provider_id,
+                    day_of_week=day,
+                    start_time=start_time,
+                    end_time=end_time,
+                ),
+            )
+        ]
+
+        if breaks is not None:
+            diffs.append(
+                (
+                    ProviderBreak,
+                    {
+                        (
+                            provider_break.provider_id,
+                            provider_break.day_of_week,
+                            provider_break.start_time,
+                            provider_break.end_time,
+                        ): provider_break
+                        for provider_break in ProviderBreak.objects.filter(
+                            provider_id__in=provider_ids
+                        )
+                    },
+                    {
+                        (provider_id, day, start_time, end_time)
+                        for provider_id in provider_ids
+                        for day, start_time, end_time in breaks
+                    },
+                    lambda provider_id, day, start_time, end_time: ProviderBreak(
+                        provider_id=provider_id,
+                        day_of_week=day,
+                        start_time=start_time,
+                        end_time=end_time,
+                    ),
+                )
+            )
+
+        exception_fields = (
+            "exception_date",
+            "end_date",
+            "recurrence",
+            "exception_type",
+            "start_time",
+            "end_time",
+            "reason",
+        )
+        if exceptions is not None:
+            wanted_exceptions = set()
+            for exception in exceptions:
+                values = {field: exception.get(field) for field in exception_fields}
+                values["recurrence"] = values["recurrence"] or ""
+                if not values["recurrence"] and values["end_date"] is None:
+                    values["end_date"] = values["exception_date"]
+                for provider_id in provider_ids:
+                    wanted_exceptions.add(
+                        (provider_id,)
+                        + tuple(values[field] for field in exception_fields)
+                    )
+
+            diffs.append(
+                (
+                    ProviderAvailabilityException,
+                    {
+                        (exception.provider_id,)
+                        + tuple(
+                            getattr(exception, field) for field in exception_fields
+                        ): exception
+                        for exception in ProviderAvailabilityException.objects.filter(
+                            Q(end_date__isnull=True) | Q(end_date__gte=today),
+                            provider_id__in=provider_ids,
+                        )
+                    },
+                    wanted_exceptions,
+                    lambda provider_id, *values: ProviderAvailabilityException(
+                        provider_id=provider_id,
+                        **dict(zip(exception_fields, values)),
+                    ),
+                )
+            )
+
+        created_exceptions = []
+        with batched_schedule_changes():
+            for model, existing, wanted, build in diffs:
+                stale = [row.pk for key, row in existing.items() if key not in wanted]
+                new_rows = [build(*key) for key in wanted if key not in existing]
+
+                if stale:
+                    model.objects.filter(pk__in=stale).delete()
+                model.objects.bulk_create(new_rows, batch_size=500)
+                if model is ProviderAvailabilityException:
+                    created_exceptions = new_rows
+
+                stats["deleted"] += len(stale)
+                stats["created"] += len(new_rows)
+                stats["unchanged"] += len(existing) - len(stale)
+
+            ProviderAvailability.objects.bulk_update(
+                to_enable, ["is_available"], batch_size=500
+            )
+            stats["updated"] = len(to_enable)
+            stats["unchanged"] -= len(to_enable)
+
+            # bulk writes skip model signals, so report the change explicitly;
+            # deletes above already did and are merged into the same refresh
+            horizon_end = today + timedelta(
+                days=settings.SLOT_MATERIALIZATION_HORIZON_DAYS
+            )
+            for provider_id in provider_ids:
+                schedule_changed(provider_id, today, horizon_end)
+
+        to_translate = [
+            exception for exception in created_exceptions if exception.reason
+        ]
+        if to_translate:
+            from mubaku.services.translation_service import auto_translate_instance
+
+            transaction.on_commit(
+                lambda: [
+                    auto_translate_instance(exception, ["reason"])
+                    for exception in to_translate
+                ]
+            )
+
+        return stats
+
     @staticmethod
     def get_provider_availability(provider):
         """Get all availability settings for a provider"""
@@ -57,6 +320,36 @@ class AvailabilityController:
         except ProviderAvailability.DoesNotExist:
             return False
 
+    @staticmethod
+    def get_provider_breaks(provider):
+        """Get all recurring breaks for a provider"""
+        return ProviderBreak.objects.filter(provider=provider)
+
+    @staticmethod
+    def add_provider_break(
+        provider, start_time: time, end_time: time, day_of_week: int = None
+    ):
+        """Add a recurring break; without day_of_week it applies every day"""
+        try:
+            return ProviderBreak.objects.create(
+                provider=provider,
+                day_of_week=day_of_week,
+                start_time=start_time,
+                end_time=end_time,
+            )
+        except Exception as e:
+            logger.error(f"Error creating break for provider {provider.id}: {str(e)}")
+            raise
+
+    @staticmethod
+    def delete_provider_break(provider, break_id):
+        """Delete a specific break"""
+        try:
+            ProviderBreak.objects.get(id=break_id, provider=provider).delete()
+            return True
+        except ProviderBreak.DoesNotExist:
+            return False
+
     @staticmethod
     def add_availability_exception(
         provider,
@@ -65,12 +358,19 @@ class AvailabilityController:
         start_time: time = None,
         end_time: time = None,
         reason: str = None,
+        end_date: date = None,
+        recurrence: str = "",
     ):
-        """Add availability exception (unavailable day, modified hours, etc.)"""
+        """
+        Add availability exception (unavailable day, modified hours, etc.)
+        covering exception_date..end_date, or repeating from exception_date
+        """
         try:
             exception = ProviderAvailabilityException.objects.create(
                 provider=provider,
                 exception_date=exception_date,
+                end_date=end_date,
+                recurrence=recurrence,
                 exception_type=exception_type,
                 start_time=start_time,
                 end_time=end_time,
@@ -87,15 +387,22 @@ class AvailabilityController:
     def get_availability_exceptions(
         provider, start_date: date = None, end_date: date = None
     ):
-        """Get availability exceptions for a provider within date range"""
-        query = ProviderAvailabilityException.objects.filter(provider=provider)
+        """Get availability exceptions for a provider overlapping a date range"""
+        query = AvailabilityController._overlapping_exceptions(
+            ProviderAvailabilityException.objects.filter(provider=provider),
+            start_date,
+            end_date,
+        )
+        return query.order_by("exception_date")
 
+    @staticmethod
+    def _overlapping_exceptions(query, start_date: date = None, end_date: date = None):
+        """Narrow an exception queryset to rows whose span overlaps the range"""
         if start_date:
-            query = query.filter(exception_date__gte=start_date)
+            query = query.filter(Q(end_date__isnull=True) | Q(end_date__gte=start_date))
         if end_date:
             query = query.filter(exception_date__lte=end_date)
-
-        return query.order_by("exception_date")
+        return query
 
     @staticmethod
     def get_provider_availability_for_date(provider, target_date: date) -> Dict:
@@ -104,54 +411,135 @@ class AvailabilityController:
         - Regular weekly availability
         - Date-specific exceptions
         """
-        day_of_week = target_date.weekday()
+        return AvailabilityController.get_provider_availability_for_range(
+            provider, target_date, target_date
+        )[target_date]
 
-        # Get regular availability for this day of week
-        try:
-            regular_availability = ProviderAvailability.objects.get(
-                provider=provider, day_of_week=day_of_week, is_available=True
+    @staticmethod
+    def get_provider_availability_for_range(
+        provider, start_date: date, end_date: date
+    ) -> Dict[date, Dict]:
+        """
+        Resolve provider's availability for every date in [start_date, end_date]
+        using two queries in total (weekly windows and breaks + exceptions in range)
+        """
+        provider_id = getattr(provider, "pk", provider)
+        return AvailabilityController.get_availability_for_providers(
+            [provider_id], start_date, end_date
+        )[provider_id]
+
+    @staticmethod
+    def get_availability_for_providers(
+        provider_ids: List[int], start_date: date, end_date: date
+    ) -> Dict[int, Dict[date, Dict]]:
+        """
+        Resolve availability for several providers at once, keyed by
+        provider pk then date. Still two queries regardless of provider count.
+        """
+        # Windows and breaks come back in one UNION query; a break's
+        # day_of_week is None when it is taken every day
+        windows_query = (
+            ProviderAvailability.objects.filter(
+                provider_id__in=provider_ids, is_available=True
             )
-        except ProviderAvailability.DoesNotExist:
-            regular_availability = None
+            .annotate(is_break=Value(False, output_field=BooleanField()))
+            .order_by()
+            .values_list(
+                "provider_id", "day_of_week", "start_time", "end_time", "is_break"
+            )
+        )
+        breaks_query = (
+            ProviderBreak.objects.filter(provider_id__in=provider_ids)
+            .annotate(is_break=Value(True, output_field=BooleanField()))
+            .order_by()
+            .values_list(
+                "provider_id", "day_of_week", "start_time", "end_time", "is_break"
+            )
+        )
 
-        # Check for exceptions
-        try:
-            exception = ProviderAvailabilityException.objects.get(
-                provider=provider, exception_date=target_date
+        weekly_windows = {}
+        breaks = {}
+        rows = windows_query.union(breaks_query, all=True)
+        for provider_id, day_of_week, start_time, end_time, is_break in rows:
+            target = breaks if is_break else weekly_windows
+            target.setdefault((provider_id, day_of_week), []).append(
+                (start_time, end_time)
             )
 
+        # Ranges and recurring rules overlapping the window are expanded in
+        # memory; where several cover a day the most specific one wins
+        exceptions = {}
+        for exception in AvailabilityController._overlapping_exceptions(
+            ProviderAvailabilityException.objects.filter(provider_id__in=provider_ids),
+            start_date,
+            end_date,
+        ):
+            for exception_date in exception.occurrences(start_date, end_date):
+                key = (exception.provider_id, exception_date)
+                current = exceptions.get(key)
+                if current is None or exception.specificity < current.specificity:
+                    exceptions[key] = exception
+
+        availability_by_provider = {}
+        for provider_id in provider_ids:
+            availability_by_date = {}
+            current_date = start_date
+
+            while current_date <= end_date:
+                weekday = current_date.weekday()
+                availability_by_date[
+                    current_date
+                ] = AvailabilityController._resolve_availability(
+                    weekly_windows.get((provider_id, weekday), []),
+                    exceptions.get((provider_id, current_date)),
+                    breaks.get((provider_id, None), [])
+                    + breaks.get((provider_id, weekday), []),
+                )
+                current_date += timedelta(days=1)
+
+            availability_by_provider[provider_id] = availability_by_date
+
+        return availability_by_provider
+
+    @staticmethod
+    def _resolve_availability(
+        regular_windows: List[Tuple[time, time]],
+        exception,
+        breaks: List[Tuple[time, time]] = (),
+    ) -> Dict:
+        """
+        Combine a day's regular windows with its exception (if any) and cut
+        out its breaks. "windows" holds the sorted, disjoint working intervals;
+        start_time/end_time span the whole working day.
+        """
+        modified = False
+        reason = None
+
+        if exception:
             if exception.exception_type == "unavailable":
                 return {"available": False, "reason": exception.reason}
-            elif exception.exception_type == "modified_hours":
-                return {
-                    "available": True,
-                    "start_time": exception.start_time,
-                    "end_time": exception.end_time,
-                    "modified": True,
-                    "reason": exception.reason,
-                }
-            elif exception.exception_type == "available":
+            elif exception.exception_type in ("modified_hours", "available"):
                 # Override regular availability with specific hours
-                return {
-                    "available": True,
-                    "start_time": exception.start_time,
-                    "end_time": exception.end_time,
-                    "modified": True,
-                    "reason": exception.reason,
-                }
-        except ProviderAvailabilityException.DoesNotExist:
-            pass
+                regular_windows = [(exception.start_time, exception.end_time)]
+                modified = True
+                reason = exception.reason
 
-        # Return regular availability if no exceptions
-        if regular_availability:
-            return {
-                "available": True,
-                "start_time": regular_availability.start_time,
-                "end_time": regular_availability.end_time,
-                "modified": False,
-            }
+        windows = subtract_intervals(regular_windows, breaks)
+        if not windows:
+            if regular_windows:
+                return {"available": False, "reason": "No working time outside breaks"}
+            return {"available": False, "reason": "No availability set for this day"}
 
-        return {"available": False, "reason": "No availability set for this day"}
+        availability = {
+            "available": True,
+            "start_time": windows[0][0],
+            "end_time": windows[-1][1],
+            "windows": windows,
+            "modified": modified,
+        }
+        if modified:
+            availability["reason"] = reason
+        return availability
 
 
 class SlotController:
@@ -160,95 +548,804 @@ class SlotController:
     """
 
     BASE_SLOT_DURATION = timedelta(minutes=30)  # Base slot duration for generation
+    MAX_CHAIN_SERVICES = 5
 
     @staticmethod
-    def generate_available_slots(
+    def get_available_slots(
         provider, service, start_date: date, end_date: date, buffer_minutes: int = 0
     ) -> List[Dict]:
         """
-        Generate available time slots for a provider and service within a date range
+        Serve available slots from the materialized AppointmentSlot table when
+        it is enabled and covers the range, otherwise generate them on the fly
         """
+        horizon_end = timezone.localdate() + timedelta(
+            days=settings.SLOT_MATERIALIZATION_HORIZON_DAYS
+        )
+        if settings.SLOT_MATERIALIZATION_ENABLED and end_date <= horizon_end:
+            return SlotController.get_materialized_slots(
+                provider, service, start_date, end_date, buffer_minutes
+            )
+
+        return SlotController.generate_available_slots(
+            provider, service, start_date, end_date, buffer_minutes
+        )
+
+    @staticmethod
+    def get_materialized_slots(
+        provider, service, start_date: date, end_date: date, buffer_minutes: int = 0
+    ) -> List[Dict]:
+        """
+        Read available slots with a single (provider, slot_start) range scan.
+
+        A start time is offered when the service fits in consecutive available
+        slot rows and the buffer still fits inside the same working window.
+        Remaining capacity is the provider's capacity minus the busiest of
+        those rows.
+        """
+        tz = provider.tzinfo
+        rows = list(
+            AppointmentSlot.objects.filter(
+                provider=provider,
+                slot_start__gte=SlotController._localize(start_date, time.min, tz),
+                slot_start__lt=SlotController._localize(
+                    end_date + timedelta(days=1), time.min, tz
+                ),
+            )
+            .order_by("slot_start")
+            .values_list("slot_start", "slot_end", "status", "booked_count")
+        )
+
+        service_duration = service.duration
+        duration_minutes = service_duration.total_seconds() / 60
+        total_duration = service_duration + timedelta(minutes=buffer_minutes)
+        now = timezone.now()
+
         available_slots = []
-        current_date = start_date
 
-        while current_date <= end_date:
-            # Get provider availability for this date
-            availability = AvailabilityController.get_provider_availability_for_date(
-                provider, current_date
+        for index, (slot_start, _, _, _) in enumerate(rows):
+            if slot_start <= now:
+                continue
+
+            service_end = slot_start + service_duration
+            window_end = slot_start + total_duration
+            fits = False
+            cursor = index
+            previous_end = slot_start
+            peak = 0
+
+            # Walk consecutive rows until both the service and buffer are covered
+            while cursor < len(rows):
+                row_start, row_end, row_status, booked_count = rows[cursor]
+                if row_start != previous_end:
+                    break
+                if row_start < service_end:
+                    if row_status != "available":
+                        break
+                    peak = max(peak, booked_count)
+                if row_end >= window_end:
+                    fits = True
+                    break
+                previous_end = row_end
+                cursor += 1
+
+            if fits:
+                slot_start = slot_start.astimezone(tz)
+                available_slots.append(
+                    {
+                        "start_time": slot_start,
+                        "end_time": slot_start + service_duration,
+                        "date": slot_start.date(),
+                        "duration_minutes": duration_minutes,
+                        "remaining_capacity": provider.capacity - peak,
+                    }
+                )
+
+        return available_slots
+
+    @staticmethod
+    def generate_available_slots(
+        provider, service, start_date: date, end_date: date, buffer_minutes: int = 0
+    ) -> List[Dict]:
+        """
+        Generate available time slots for a provider and service within a date range.
+
+        Loads weekly availability, exceptions and active appointments for the
+        whole range up front (three queries) and sweeps the candidates against
+        the sorted busy intervals in memory. A provider with capacity > 1 is
+        busy only where that many appointments overlap. Dates and working
+        hours are read in the provider's time zone.
+        """
+        availability_by_date = (
+            AvailabilityController.get_provider_availability_for_range(
+                provider, start_date, end_date
             )
+        )
+
+        tz = provider.tzinfo
+        range_start = SlotController._localize(start_date, time.min, tz)
+        range_end = SlotController._localize(end_date + timedelta(days=1), time.min, tz)
+        busy_sweep = SlotController._minute_sweep(
+            SlotController.get_busy_intervals(provider, range_start, range_end),
+            provider.capacity,
+        )
+        now_minute = to_epoch_minutes(timezone.now())
+
+        available_slots = []
 
+        for slot_date, availability in availability_by_date.items():
             if availability["available"]:
                 slots_for_day = SlotController._generate_slots_for_date(
-                    provider, service, current_date, availability, buffer_minutes
+                    service,
+                    slot_date,
+                    availability,
+                    buffer_minutes,
+                    busy_sweep,
+                    now_minute,
+                    tz=tz,
                 )
                 available_slots.extend(slots_for_day)
 
-            current_date += timedelta(days=1)
-
         return available_slots
 
+    @staticmethod
+    def iter_available_slots(
+        provider,
+        service,
+        start_date: date,
+        end_date: date,
+        buffer_minutes: int = 0,
+        busy_intervals: List[Tuple[datetime, datetime]] = (),
+        max_window_days: int = 16,
+    ):
+        """
+        Yield available slots day by day without materializing the range.
+
+        Schedule data is loaded in windows of 1, 2, 4... days (at most
+        max_window_days), so the first slots come back after a one-day query
+        and memory stays bounded by a single window however long the range.
+        busy_intervals adds extra busy time (e.g. other clients' holds).
+        """
+        extra_busy = sorted(busy_intervals)
+        tz = provider.tzinfo
+        now_minute = to_epoch_minutes(timezone.now())
+        window_start = start_date
+        window_days = 1
+
+        while window_start <= end_date:
+            window_end = min(window_start + timedelta(days=window_days - 1), end_date)
+            range_start = SlotController._localize(window_start, time.min, tz)
+            range_end = SlotController._localize(
+                window_end + timedelta(days=1), time.min, tz
+            )
+
+            availability_by_date = (
+                AvailabilityController.get_provider_availability_for_range(
+                    provider, window_start, window_end
+                )
+            )
+            busy_sweep = SlotController._minute_sweep(
+                SlotController.get_busy_intervals(provider, range_start, range_end)
+                + [
+                    (start, end)
+                    for start, end in extra_busy
+                    if start < range_end and end > range_start
+                ],
+                provider.capacity,
+            )
+
+            for slot_date, availability in availability_by_date.items():
+                if availability["available"]:
+                    yield from SlotController._generate_slots_for_date(
+                        service,
+                        slot_date,
+                        availability,
+                        buffer_minutes,
+                        busy_sweep,
+                        now_minute,
+                        tz=tz,
+                    )
+
+            window_start = window_end + timedelta(days=1)
+            window_days = min(window_days * 2, max_window_days)
+
     @staticmethod
     def _generate_slots_for_date(
-        provider, service, slot_date: date, availability: Dict, buffer_minutes: int
+        service,
+        slot_date: date,
+        availability: Dict,
+        buffer_minutes: int,
+        busy_sweep: BusySweep,
+        now_minute: int,
+        duration: timedelta = None,
+        tz: tzinfo = None,
     ) -> List[Dict]:
-        """Generate slots for a specific date based on availability"""
+        """
+        Generate slots for a specific date based on availability.
+
+        Candidates are walked as integer epoch minutes (see _minute_sweep),
+        and aware datetimes in tz are only built for the slots returned, so
+        steps are exact across DST changes. Windows are walked in order
+        against the same busy sweep, so a day with split shifts costs
+        O(windows + candidates + appointments). The slot grid restarts at
+        the beginning of each window. duration overrides the service's own
+        (e.g. for a chain of services). Each slot carries how many more
+        clients the provider can take at that time.
+        """
+        tz = tz or timezone.get_current_timezone()
         slots = []
 
-        # Calculate service duration
-        service_duration = service.duration
-
-        # Apply buffer time
-        buffer_duration = timedelta(minutes=buffer_minutes)
-        total_duration = service_duration + buffer_duration
+        service_duration = duration or service.duration
+        duration_minutes = service_duration.total_seconds() / 60
+        # Partial minutes round up, so a candidate never overlaps busy time
+        busy_minutes = ceil(duration_minutes)
+        total_minutes = ceil(duration_minutes + buffer_minutes)
+        step = SlotController.BASE_SLOT_DURATION // MINUTE
 
-        start_datetime = datetime.combine(slot_date, availability["start_time"])
-        end_datetime = datetime.combine(slot_date, availability["end_time"])
+        for window_start, window_end in availability["windows"]:
+            first_start = wall_clock_minutes(slot_date, window_start, tz)
+            last_start = wall_clock_minutes(slot_date, window_end, tz) - total_minutes
 
-        current_slot_start = start_datetime
+            # Skip the grid points that are not in the future
+            if first_start <= now_minute:
+                first_start += ((now_minute - first_start) // step + 1) * step
 
-        while current_slot_start + total_duration <= end_datetime:
-            current_slot_end = current_slot_start + service_duration
-
-            # Check if this slot is available (not booked and not in past)
-            if current_slot_start > timezone.now() and SlotController.is_slot_available(
-                provider, current_slot_start, current_slot_end
+            for slot_start, remaining in busy_sweep.free_starts(
+                first_start, last_start, step, busy_minutes
             ):
-
+                start_time = from_epoch_minutes(slot_start, tz)
                 slots.append(
                     {
-                        "start_time": current_slot_start,
-                        "end_time": current_slot_end,
+                        "start_time": start_time,
+                        "end_time": start_time + service_duration,
                         "date": slot_date,
-                        "duration_minutes": service_duration.total_seconds() / 60,
+                        "duration_minutes": duration_minutes,
+                        "remaining_capacity": remaining,
                     }
                 )
 
-            current_slot_start += SlotController.BASE_SLOT_DURATION
-
         return slots
 
+    @staticmethod
+    def get_chain_slots(
+        provider,
+        services: List[Service],
+        start_date: date,
+        end_date: date,
+        busy_intervals: List[Tuple[datetime, datetime]] = (),
+    ) -> List[Dict]:
+        """
+        Start times at which all services fit back to back, in the given
+        order, within one working window.
+
+        The provider's schedule and bookings are loaded once and every
+        candidate is checked for the whole chain against one busy timeline,
+        so a chain costs the same queries as a single service.
+        """
+        total_duration = sum((service.duration for service in services), timedelta())
+        availability_by_date = (
+            AvailabilityController.get_provider_availability_for_range(
+                provider, start_date, end_date
+            )
+        )
+
+        tz = provider.tzinfo
+        range_start = SlotController._localize(start_date, time.min, tz)
+        range_end = SlotController._localize(end_date + timedelta(days=1), time.min, tz)
+        busy_sweep = SlotController._minute_sweep(
+            SlotController.get_busy_intervals(provider, range_start, range_end)
+            + list(busy_intervals),
+            provider.capacity,
+        )
+        now_minute = to_epoch_minutes(timezone.now())
+
+        chain_slots = []
+        for slot_date, availability in availability_by_date.items():
+            if not availability["available"]:
+                continue
+
+            for slot in SlotController._generate_slots_for_date(
+                services[0],
+                slot_date,
+                availability,
+                0,
+                busy_sweep,
+                now_minute,
+                duration=total_duration,
+                tz=tz,
+            ):
+                slot["services"] = SlotController.split_chain(
+                    services, slot["start_time"]
+                )
+                chain_slots.append(slot)
+
+        return chain_slots
+
+    @staticmethod
+    def load_chain_services(service_ids: List) -> List[Service]:
+        """
+        Active services for a chain, in the requested order (a service may
+        repeat). All of them must belong to the same provider.
+        """
+        if not 2 <= len(service_ids) <= SlotController.MAX_CHAIN_SERVICES:
+            raise ValueError(
+                f"A chain needs between 2 and {SlotController.MAX_CHAIN_SERVICES} services"
+            )
+
+        services = {
+            str(service.id): service
+            for service in Service.objects.filter(
+                id__in=service_ids, is_active=True
+            ).select_related("provider")
+        }
+        try:
+            chain = [services[str(service_id)] for service_id in service_ids]
+        except KeyError:
+            raise ValueError("Service not found or inactive")
+
+        if len({service.provider_id for service in chain}) > 1:
+            raise ValueError("All services of a chain must have the same provider")
+        return chain
+
+    @staticmethod
+    def split_chain(services: List[Service], start_time: datetime) -> List[Dict]:
+        """Consecutive (service, start, end) steps of a chain starting at start_time"""
+        steps = []
+        for service in services:
+            end_time = start_time + service.duration
+            steps.append(
+                {
+                    "service_id": service.id,
+                    "service_name": service.name,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                }
+            )
+            start_time = end_time
+        return steps
+
+    @staticmethod
+    def get_earliest_slots_for_category(
+        category,
+        start_date: date,
+        end_date: date,
+        limit: int,
+        latitude: float = None,
+        longitude: float = None,
+        radius_km: float = None,
+        client_id=None,
+    ) -> List[Dict]:
+        """
+        The limit earliest bookable slots across every active service of the
+        category, optionally restricted to providers within radius_km.
+
+        All candidate providers are handled together: the range is scanned in
+        windows of 1, 2, 4... days, each loading availability and appointments
+        for every provider with three queries, and the scan stops as soon as
+        limit slots are found. Ties are broken by distance.
+        """
+        services = Service.objects.filter(
+            category=category, is_active=True
+        ).select_related("provider__user")
+
+        if latitude is not None and longitude is not None:
+            min_lat, max_lat, min_lon, max_lon = bounding_box(
+                latitude, longitude, radius_km
+            )
+            services = services.filter(
+                provider__latitude__gte=min_lat,
+                provider__latitude__lte=max_lat,
+                provider__longitude__gte=min_lon,
+                provider__longitude__lte=max_lon,
+            )
+
+        candidates = []
+        for service in services:
+            distance_km = None
+            if latitude is not None and longitude is not None:
+                distance_km = haversine_km(
+                    latitude,
+                    longitude,
+                    float(service.provider.latitude),
+                    float(service.provider.longitude),
+                )
+                if distance_km > radius_km:
+                    continue
+            candidates.append((service, distance_km))
+
+        if not candidates:
+            return []
+
+        held_by_provider = SlotHoldStore.get_held_intervals_for_providers(
+            list({service.provider_id for service, _ in candidates}),
+            exclude_client_id=client_id,
+        )
+        now_minute = to_epoch_minutes(timezone.now())
+
+        slots = []
+        window_start = start_date
+        window_days = 1
+        while window_start <= end_date and len(slots) < limit:
+            window_end = min(window_start + timedelta(days=window_days - 1), end_date)
+            slots.extend(
+                SlotController._earliest_slots_in_window(
+                    candidates,
+                    window_start,
+                    window_end,
+                    limit - len(slots),
+                    held_by_provider,
+                    now_minute,
+                )
+            )
+            window_start = window_end + timedelta(days=1)
+            window_days *= 2
+
+        return [
+            {
+                "service_id": service.id,
+                "service_name": service.name,
+                "provider_id": service.provider.id,
+                "provider_name": service.provider.user.get_fullname,
+                "price": service.price,
+                "currency": service.currency,
+                "start_time": slot["start_time"],
+                "end_time": slot["end_time"],
+                "date": slot["date"],
+                "duration_minutes": slot["duration_minutes"],
+                "remaining_capacity": slot["remaining_capacity"],
+                "distance_km": (
+                    round(distance_km, 2) if distance_km is not None else None
+                ),
+            }
+            for slot, service, distance_km in slots
+        ]
+
+    @staticmethod
+    def _earliest_slots_in_window(
+        candidates: List[Tuple[Service, Optional[float]]],
+        start_date: date,
+        end_date: date,
+        limit: int,
+        held_by_provider: Dict[int, List[Tuple[datetime, datetime]]],
+        now_minute: int,
+    ) -> List[Tuple[Dict, Service, Optional[float]]]:
+        """
+        Merge lazily generated, start-ordered slots of every candidate service
+        and keep the first limit as (slot, service, distance_km)
+        """
+        provider_ids = list({service.provider_id for service, _ in candidates})
+        availability_by_provider = (
+            AvailabilityController.get_availability_for_providers(
+                provider_ids, start_date, end_date
+            )
+        )
+        # One day of margin on each side covers providers in other time zones
+        busy_by_provider = SlotController.get_busy_intervals_for_providers(
+            provider_ids,
+            SlotController._localize(start_date - timedelta(days=1), time.min),
+            SlotController._localize(end_date + timedelta(days=2), time.min),
+        )
+
+        def service_slots(service, distance_km):
+            sort_distance = distance_km or 0
+            for slot in SlotController._iter_service_slots(
+                service,
+                availability_by_provider[service.provider_id],
+                busy_by_provider.get(service.provider_id, [])
+                + held_by_provider.get(service.provider_id, []),
+                now_minute,
+                service.provider.capacity,
+                service.provider.tzinfo,
+            ):
+                yield (slot["start_time"], sort_distance), slot, service, distance_km
+
+        earliest = heapq.merge(
+            *(service_slots(service, distance) for service, distance in candidates),
+            key=lambda item: item[0],
+        )
+        return [item[1:] for item in islice(earliest, limit)]
+
+    @staticmethod
+    def _iter_service_slots(
+        service,
+        availability_by_date: Dict[date, Dict],
+        busy_intervals: List[Tuple[datetime, datetime]],
+        now_minute: int,
+        capacity: int = 1,
+        tz: tzinfo = None,
+    ):
+        """Lazily yield the service's available slots in start-time order"""
+        busy_sweep = SlotController._minute_sweep(busy_intervals, capacity)
+        for slot_date, availability in availability_by_date.items():
+            if availability["available"]:
+                yield from SlotController._generate_slots_for_date(
+                    service, slot_date, availability, 0, busy_sweep, now_minute, tz=tz
+                )
+
+    @staticmethod
+    def get_day_occupancies(
+        provider, start_date: date, end_date: date, resolution: int = 5
+    ) -> Dict[date, DayOccupancy]:
+        """
+        Rasterize each day of the range into a DayOccupancy (working hours,
+        exceptions and active appointments) using three queries
+        """
+        availability_by_date = (
+            AvailabilityController.get_provider_availability_for_range(
+                provider, start_date, end_date
+            )
+        )
+        tz = provider.tzinfo
+        busy_intervals = SlotController.get_busy_intervals(
+            provider,
+            SlotController._localize(start_date, time.min, tz),
+            SlotController._localize(end_date + timedelta(days=1), time.min, tz),
+        )
+
+        intervals_by_date = {}
+        for start, end in busy_intervals:
+            first_day = timezone.localtime(start, tz).date()
+            last_day = timezone.localtime(end, tz).date()
+            while first_day <= last_day:
+                intervals_by_date.setdefault(first_day, []).append((start, end))
+                first_day += timedelta(days=1)
+
+        return {
+            target_date: DayOccupancy.from_schedule(
+                target_date,
+                availability,
+                intervals_by_date.get(target_date, []),
+                resolution,
+                provider.capacity,
+                tz,
+            )
+            for target_date, availability in availability_by_date.items()
+        }
+
+    @staticmethod
+    def _localize(target_date: date, target_time: time, tz: tzinfo = None) -> datetime:
+        """Build an aware datetime in tz (the current time zone by default)"""
+        return timezone.make_aware(datetime.combine(target_date, target_time), tz)
+
+    @staticmethod
+    def in_timezone(slots: Iterable[Dict], tz: tzinfo):
+        """
+        Slots with start_time and end_time expressed in tz (e.g. the
+        client's); date stays the provider's day
+        """
+        for slot in slots:
+            yield {
+                **slot,
+                "start_time": slot["start_time"].astimezone(tz),
+                "end_time": slot["end_time"].astimezone(tz),
+            }
+
+    @staticmethod
+    def _minute_sweep(
+        busy_intervals: List[Tuple[datetime, datetime]], capacity: int = 1
+    ) -> BusySweep:
+        """
+        A BusySweep over integer epoch minutes, the unit slot generation
+        works in. Busy time is rounded outwards to whole minutes.
+        """
+        return BusySweep(
+            [
+                (to_epoch_minutes(start), to_epoch_minutes_ceil(end))
+                for start, end in busy_intervals
+            ],
+            capacity,
+        )
+
+    @staticmethod
+    def _active_overlaps(
+        provider, range_start: datetime, range_end: datetime, client=None
+    ):
+        """
+        Active appointments overlapping the range that belong to provider or,
+        when given, to client. The two sides are served by the
+        (provider, scheduled_for, scheduled_until) and
+        (client, scheduled_for, scheduled_until) indexes in one statement.
+        """
+        owners = Q(provider=provider)
+        if client is not None:
+            owners |= Q(client=client)
+
+        return Appointment.objects.filter(
+            owners,
+            scheduled_for__lt=range_end,
+            scheduled_until__gt=range_start,
+            status__in=["pending", "confirmed"],  # Only consider active appointments
+        )
+
+    @staticmethod
+    def get_busy_intervals(
+        provider,
+        range_start: datetime,
+        range_end: datetime,
+        exclude_appointment_id: str = None,
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Get (start, end) pairs of active appointments overlapping the range,
+        sorted by start time, in a single query
+        """
+        query = SlotController._active_overlaps(provider, range_start, range_end)
+
+        if exclude_appointment_id:
+            query = query.exclude(id=exclude_appointment_id)
+
+        return list(
+            query.order_by("scheduled_for").values_list(
+                "scheduled_for", "scheduled_until"
+            )
+        )
+
+    @staticmethod
+    def get_busy_intervals_for_providers(
+        provider_ids: List[int], range_start: datetime, range_end: datetime
+    ) -> Dict[int, List[Tuple[datetime, datetime]]]:
+        """Busy intervals of several providers in one query, keyed by provider pk"""
+        busy_by_provider = {}
+        for provider_id, scheduled_for, scheduled_until in (
+            Appointment.objects.filter(
+                provider_id__in=provider_ids,
+                scheduled_for__lt=range_end,
+                scheduled_until__gt=range_start,
+                status__in=["pending", "confirmed"],
+            )
+            .order_by("scheduled_for")
+            .values_list("provider_id", "scheduled_for", "scheduled_until")
+        ):
+            busy_by_provider.setdefault(provider_id, []).append(
+                (scheduled_for, scheduled_until)
+            )
+        return busy_by_provider
+
     @staticmethod
     def is_slot_available(
         provider,
         start_time: datetime,
         end_time: datetime,
         exclude_appointment_id: str = None,
+        hold_token: str = None,
+        client=None,
     ) -> bool:
         """
         Check if a time slot is available (not conflicting with existing appointments)
         exclude_appointment_id: Used when checking availability for an existing appointment (for rescheduling)
+        hold_token: The caller's own slot hold, which does not count as a conflict
+        client: Also reject the slot when it overlaps the client's own appointments
         """
-        query = Appointment.objects.filter(
-            provider=provider,
-            scheduled_for__lt=end_time,
-            scheduled_until__gt=start_time,
-            status__in=["pending", "confirmed"],  # Only consider active appointments
+        return (
+            SlotController.find_conflict(
+                provider,
+                start_time,
+                end_time,
+                exclude_appointment_id,
+                hold_token,
+                client,
+            )
+            is None
         )
 
+    @staticmethod
+    def find_conflict(
+        provider,
+        start_time: datetime,
+        end_time: datetime,
+        exclude_appointment_id: str = None,
+        hold_token: str = None,
+        client=None,
+    ) -> Optional[str]:
+        """
+        What blocks the slot: "provider" when the provider is booked or the
+        slot is held by someone else, "client" when the client already has
+        an appointment at that time with another provider, None when it is
+        free. Both sides are checked in a single query.
+
+        For a provider with capacity > 1 the overlapping rows are fetched and
+        the slot is full only where capacity bookings and holds overlap.
+        """
+        if provider.capacity > 1:
+            provider_busy, client_busy = SlotController.get_conflict_intervals(
+                provider, start_time, end_time, client, exclude_appointment_id
+            )
+            provider_busy += SlotHoldStore.held_cells(
+                provider.pk,
+                [(start_time, end_time)],
+                provider.capacity,
+                exclude_token=hold_token,
+            )
+            if not BusySweep(provider_busy, provider.capacity).is_free(
+                start_time, end_time
+            ):
+                return "provider"
+            return "client" if client_busy else None
+
+        if SlotHoldStore.is_held(provider.pk, start_time, end_time, hold_token):
+            return "provider"
+
+        query = SlotController._active_overlaps(provider, start_time, end_time, client)
+
+        if exclude_appointment_id:
+            query = query.exclude(id=exclude_appointment_id)
+
+        if client is None:
+            return "provider" if query.exists() else None
+
+        # The first overlapping row decides; without an ORDER BY the database
+        # can stop at it, so when both sides clash either may be reported
+        conflicting = list(query.values_list("provider_id", flat=True)[:1])
+        if not conflicting:
+            return None
+        return "provider" if conflicting[0] == provider.pk else "client"
+
+    @staticmethod
+    def get_conflict_intervals(
+        provider,
+        range_start: datetime,
+        range_end: datetime,
+        client=None,
+        exclude_appointment_id: str = None,
+    ) -> Tuple[List[Tuple[datetime, datetime]], List[Tuple[datetime, datetime]]]:
+        """
+        Active appointments overlapping the range, in one query: the
+        provider's (start, end) pairs and those the client has with other
+        providers
+        """
+        query = SlotController._active_overlaps(
+            provider, range_start, range_end, client
+        )
         if exclude_appointment_id:
             query = query.exclude(id=exclude_appointment_id)
 
-        return not query.exists()
+        provider_busy, client_busy = [], []
+        for provider_id, scheduled_for, scheduled_until in query.order_by(
+            "scheduled_for"
+        ).values_list("provider_id", "scheduled_for", "scheduled_until"):
+            if provider_id == provider.pk:
+                provider_busy.append((scheduled_for, scheduled_until))
+            else:
+                client_busy.append((scheduled_for, scheduled_until))
+        return provider_busy, client_busy
+
+    @staticmethod
+    def conflict_message(conflict: str) -> str:
+        """User-facing error for a find_conflict result"""
+        if conflict == "client":
+            return "You already have another appointment at this time"
+        return "Selected time slot is no longer available"
+
+    @staticmethod
+    def lock_provider_schedule(provider) -> None:
+        """
+        Serialize concurrent bookings for a provider inside the current
+        transaction where the database cannot reject overlaps by itself.
+
+        PostgreSQL enforces the appointment_provider_no_overlap exclusion
+        constraint for providers with capacity 1, and SQLite runs
+        transactions in IMMEDIATE mode so the write lock is already held;
+        otherwise the provider row is locked. The constraint only covers
+        exclusive rows, so a provider whose capacity dropped to 1 is still
+        locked while shared bookings made at the higher capacity are active.
+        """
+        if connection.vendor == "sqlite":
+            return
+        if (
+            connection.vendor == "postgresql"
+            and provider.capacity == 1
+            and not Appointment.objects.filter(
+                provider=provider,
+                exclusive=False,
+                status__in=["pending", "confirmed"],
+                scheduled_until__gt=timezone.now(),
+            ).exists()
+        ):
+            return
+
+        list(
+            Profile.objects.select_for_update()
+            .filter(pk=provider.pk)
+            .values_list("pk", flat=True)
+        )
 
 
 class AppointmentController:
@@ -265,47 +1362,323 @@ class AppointmentController:
         scheduled_until: datetime,
         amount: float,
         currency: str = "XAF",
+        hold_token: str = None,
     ):
         """
-        Create a new appointment with payment pending status
+        Create a new appointment with payment pending status.
+        With hold_token, the client's slot hold is converted into the
+        appointment and released once the booking commits.
         """
-        # Validate the slot is available
-        if not SlotController.is_slot_available(
-            service.provider, scheduled_for, scheduled_until
-        ):
-            raise ValueError("Selected time slot is no longer available")
+        if hold_token:
+            hold = SlotHoldStore.get(hold_token)
+            if (
+                hold is None
+                or hold["client_id"] != str(client.pk)
+                or hold["provider_id"] != str(service.provider.pk)
+                or scheduled_for < hold["scheduled_for"]
+                or scheduled_until > hold["scheduled_until"]
+            ):
+                raise ValueError("Slot hold has expired or does not match this booking")
 
-        # Create the appointment
-        appointment = Appointment.objects.create(
+        SlotController.lock_provider_schedule(service.provider)
+
+        # Validate the slot is free for both the provider and the client
+        conflict = SlotController.find_conflict(
+            service.provider,
+            scheduled_for,
+            scheduled_until,
+            hold_token=hold_token,
             client=client,
-            provider=service.provider,
-            service=service,
-            scheduled_for=scheduled_for,
-            scheduled_until=scheduled_until,
-            amount=amount,
-            currency=currency,
-            status="pending",  # Will be confirmed after payment
-            payment_status="pending",
         )
+        if conflict:
+            raise ValueError(SlotController.conflict_message(conflict))
+
+        # Create the appointment; a concurrent booking that got in first is
+        # rejected by the database overlap guard
+        try:
+            with transaction.atomic():
+                appointment = Appointment.objects.create(
+                    client=client,
+                    provider=service.provider,
+                    service=service,
+                    scheduled_for=scheduled_for,
+                    scheduled_until=scheduled_until,
+                    amount=amount,
+                    currency=currency,
+                    status="pending",  # Will be confirmed after payment
+                    payment_status="pending",
+                    exclusive=service.provider.capacity == 1,
+                )
+        except IntegrityError:
+            raise ValueError("Selected time slot is no longer available")
+
+        if hold_token:
+            transaction.on_commit(lambda: SlotHoldStore.release(hold_token))
 
         logger.info(f"Appointment {appointment.id} created for client {client.id}")
         return appointment
 
     @staticmethod
-    def confirm_appointment(appointment_id):
+    @transaction.atomic
+    def create_appointment_chain(
+        client,
+        services: List[Service],
+        scheduled_for: datetime,
+        currency: str = "XAF",
+        hold_token: str = None,
+    ) -> List[Appointment]:
         """
-        Confirm an appointment (after successful payment)
+        Book several services of one provider back to back, atomically.
+
+        The whole chain is checked with one overlap query and inserted with
+        one bulk_create; the appointments share a bundle_id. Each is priced
+        at its service's price.
         """
+        from .signals import schedule_changed
+
+        provider = services[0].provider
+        steps = SlotController.split_chain(services, scheduled_for)
+        scheduled_until = steps[-1]["end_time"]
+
+        if hold_token:
+            hold = SlotHoldStore.get(hold_token)
+            if (
+                hold is None
+                or hold["client_id"] != str(client.pk)
+                or hold["provider_id"] != str(provider.pk)
+                or scheduled_for < hold["scheduled_for"]
+                or scheduled_until > hold["scheduled_until"]
+            ):
+                raise ValueError("Slot hold has expired or does not match this booking")
+
+        SlotController.lock_provider_schedule(provider)
+
+        conflict = SlotController.find_conflict(
+            provider,
+            scheduled_for,
+            scheduled_until,
+            hold_token=hold_token,
+            client=client,
+        )
+        if conflict:
+            raise ValueError(SlotController.conflict_message(conflict))
+
+        bundle_id = uuid.uuid4()
+        appointments = [
+            Appointment(
+                client=client,
+                provider=provider,
+                service=service,
+                bundle_id=bundle_id,
+                scheduled_for=step["start_time"],
+                scheduled_until=step["end_time"],
+                amount=service.price,
+                currency=currency,
+                status="pending",  # Will be confirmed after payment
+                payment_status="pending",
+                exclusive=provider.capacity == 1,
+            )
+            for service, step in zip(services, steps)
+        ]
+
+        # bulk_create skips save signals, so the schedule change is reported
+        # explicitly; a racing booking is rejected by the overlap guard
         try:
-            appointment = Appointment.objects.get(id=appointment_id)
+            with transaction.atomic():
+                Appointment.objects.bulk_create(appointments)
+        except IntegrityError:
+            raise ValueError("Selected time slot is no longer available")
+
+        tz = provider.tzinfo
+        schedule_changed(
+            provider.pk,
+            timezone.localtime(scheduled_for, tz).date(),
+            timezone.localtime(scheduled_until, tz).date(),
+        )
+        if hold_token:
+            transaction.on_commit(lambda: SlotHoldStore.release(hold_token))
+
+        logger.info(
+            f"Appointment bundle {bundle_id} ({len(appointments)} services) "
+            f"created for client {client.id}"
+        )
+        return appointments
+
+    @staticmethod
+    def build_series_occurrences(
+        scheduled_for: datetime,
+        scheduled_until: datetime,
+        occurrences: int,
+        interval_weeks: int = 1,
+        tz: tzinfo = None,
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        (start, end) of every occurrence, repeating the first one's local
+        wall-clock time in tz (the provider's time zone) so a DST change
+        does not shift later occurrences
+        """
+        duration = scheduled_until - scheduled_for
+        local_start = timezone.localtime(scheduled_for, tz)
+
+        starts = [
+            SlotController._localize(
+                local_start.date() + timedelta(weeks=index * interval_weeks),
+                local_start.time(),
+                tz,
+            )
+            for index in range(occurrences)
+        ]
+        return [(start, start + duration) for start in starts]
+
+    @staticmethod
+    @transaction.atomic
+    def create_appointment_series(
+        client,
+        service,
+        scheduled_for: datetime,
+        scheduled_until: datetime,
+        occurrences: int,
+        amount: float,
+        currency: str = "XAF",
+        interval_weeks: int = 1,
+        skip_conflicts: bool = False,
+    ) -> Tuple[Optional[AppointmentSeries], List[Dict]]:
+        """
+        Book every occurrence of a recurring appointment in one pass.
+
+        The whole span is checked for conflicts with the provider's and the
+        client's own appointments in a single range query (plus one cache
+        read of the occurrences' hold cells) and the free
+        occurrences are inserted with one bulk_create. Returns the series
+        (None when nothing was booked) and one result per occurrence. Unless
+        skip_conflicts is set, any conflict books nothing.
+        """
+        from .signals import schedule_changed
+
+        provider = service.provider
+        slots = AppointmentController.build_series_occurrences(
+            scheduled_for, scheduled_until, occurrences, interval_weeks, provider.tzinfo
+        )
+
+        SlotController.lock_provider_schedule(provider)
+
+        provider_busy, client_busy = SlotController.get_conflict_intervals(
+            provider, slots[0][0], slots[-1][1], client
+        )
+        provider_sweep = BusySweep(
+            provider_busy
+            + SlotHoldStore.held_cells(
+                provider.pk, slots, provider.capacity, exclude_client_id=client.pk
+            ),
+            provider.capacity,
+        )
+        client_sweep = BusySweep(client_busy)
+
+        results = [
+            {
+                "scheduled_for": start,
+                "scheduled_until": end,
+                "status": (
+                    "booked"
+                    if provider_sweep.is_free(start, end)
+                    and client_sweep.is_free(start, end)
+                    else "conflict"
+                ),
+                "appointment_id": None,
+            }
+            for start, end in slots
+        ]
+        free = [result for result in results if result["status"] == "booked"]
+
+        if not free or (len(free) < len(results) and not skip_conflicts):
+            # Nothing is written; free occurrences are reported as bookable
+            for result in free:
+                result["status"] = "available"
+            return None, results
+
+        series = AppointmentSeries.objects.create(
+            client=client,
+            provider=provider,
+            service=service,
+            scheduled_for=slots[0][0],
+            scheduled_until=slots[0][1],
+            interval_weeks=interval_weeks,
+            occurrences=occurrences,
+        )
+        appointments = [
+            Appointment(
+                client=client,
+                provider=provider,
+                service=service,
+                series=series,
+                scheduled_for=result["scheduled_for"],
+                scheduled_until=result["scheduled_until"],
+                amount=amount,
+                currency=currency,
+                status="pending",  # Each occurrence is confirmed after payment
+                payment_status="pending",
+                exclusive=provider.capacity == 1,
+            )
+            for result in free
+        ]
+
+        # A concurrent booking that got in first is rejected by the database
+        # overlap guard; bulk_create skips save signals, so report the change
+        try:
+            with transaction.atomic():
+                Appointment.objects.bulk_create(appointments)
+        except IntegrityError:
+            raise ValueError("Selected time slots are no longer available")
+
+        for result, appointment in zip(free, appointments):
+            result["appointment_id"] = appointment.id
+
+        schedule_changed(
+            provider.pk,
+            timezone.localtime(appointments[0].scheduled_for, provider.tzinfo).date(),
+            timezone.localtime(
+                appointments[-1].scheduled_until, provider.tzinfo
+            ).date(),
+        )
+
+        logger.info(
+            f"Appointment series {series.id} created for client {client.id} "
+            f"({len(appointments)}/{occurrences} occurrences)"
+        )
+        return series, results
+
+    @staticmethod
+    def confirm_appointment(appointment_id):
+        """
+        Confirm an appointment after successful payment, holding its payment
+        in escrow.
+
+        The row is locked and must still be pending and unpaid: the expiry
+        sweep may have released it (and its slot may be booked again) since
+        the client started paying, in which case ValueError is raised and
+        the payment has to be refunded.
+        """
+        with transaction.atomic():
+            try:
+                appointment = Appointment.objects.select_for_update().get(
+                    id=appointment_id
+                )
+            except Appointment.DoesNotExist:
+                raise ValueError("Appointment not found")
+
+            if (
+                appointment.status != "pending"
+                or appointment.payment_status != "pending"
+            ):
+                raise ValueError("Appointment is no longer pending payment")
+
             appointment.status = "confirmed"
+            appointment.payment_status = "held_in_escrow"
             appointment.confirmed_at = timezone.now()
             appointment.save()
 
-            logger.info(f"Appointment {appointment.id} confirmed")
-            return appointment
-        except Appointment.DoesNotExist:
-            raise ValueError("Appointment not found")
+        logger.info(f"Appointment {appointment.id} confirmed")
+        return appointment
 
     @staticmethod
     def cancel_appointment(appointment_id, cancelled_by: str, reason: str = None):
@@ -346,6 +1719,83 @@ class AppointmentController:
         except Appointment.DoesNotExist:
             raise ValueError("Appointment not found")
 
+    @staticmethod
+    def expire_stale_pending_appointments(
+        max_age_minutes: int = None, chunk_size: int = 500
+    ) -> Dict[str, int]:
+        """
+        Expire unpaid pending appointments created more than max_age_minutes
+        ago so they stop blocking their slots.
+
+        Works in chunks of one transaction each: rows are locked with
+        SKIP LOCKED so appointments whose payment is being confirmed right now
+        are left alone, then released with a single UPDATE per chunk.
+        """
+        from .signals import schedule_changed
+        from .waitlist import WaitlistMatcher
+
+        max_age_minutes = max_age_minutes or settings.PENDING_APPOINTMENT_EXPIRY_MINUTES
+        cutoff = timezone.now() - timedelta(minutes=max_age_minutes)
+        stats = {"expired": 0, "chunks": 0}
+
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    Appointment.objects.select_for_update(skip_locked=True)
+                    .filter(
+                        status="pending",
+                        payment_status="pending",
+                        created_at__lt=cutoff,
+                    )
+                    .order_by("pkid")
+                    .values_list(
+                        "pkid", "provider_id", "scheduled_for", "scheduled_until"
+                    )[:chunk_size]
+                )
+                if not rows:
+                    break
+
+                now = timezone.now()
+                expired = Appointment.objects.filter(
+                    pkid__in=[row[0] for row in rows], status="pending"
+                ).update(status="expired", cancelled_at=now, updated_at=now)
+
+                # Each affected provider gets one cache bump / slot refresh,
+                # over the days of its own time zone
+                zones = {
+                    pk: get_zone(zone)
+                    for pk, zone in Profile.objects.filter(
+                        pk__in={row[1] for row in rows}
+                    ).values_list("pk", "timezone")
+                }
+                affected_dates = {}
+                for _, provider_id, scheduled_for, scheduled_until in rows:
+                    tz = zones.get(provider_id)
+                    dates = affected_dates.setdefault(provider_id, set())
+                    dates.add(timezone.localtime(scheduled_for, tz).date())
+                    dates.add(timezone.localtime(scheduled_until, tz).date())
+                for provider_id, dates in affected_dates.items():
+                    schedule_changed(provider_id, min(dates), max(dates))
+
+                # The bulk UPDATE skips save signals, so waiting clients are
+                # told about the released time here
+                freed_by_provider = {}
+                for _, provider_id, scheduled_for, scheduled_until in rows:
+                    freed_by_provider.setdefault(provider_id, []).append(
+                        (scheduled_for, scheduled_until)
+                    )
+                for provider_id, freed in freed_by_provider.items():
+                    WaitlistMatcher.notify_on_commit(provider_id, freed)
+
+            stats["expired"] += expired
+            stats["chunks"] += 1
+            if len(rows) < chunk_size:
+                break
+
+        if stats["expired"]:
+            logger.info(f"Expired {stats['expired']} stale pending appointments")
+        return stats
+
     @staticmethod
     def get_client_appointments(client, status_filter: str = None):
         """
@@ -379,6 +1829,7 @@ class AppointmentController:
         return query
 
     @staticmethod
+    @transaction.atomic
     def reschedule_appointment(
         appointment_id, new_scheduled_for: datetime, new_scheduled_until: datetime
     ):
@@ -387,19 +1838,27 @@ class AppointmentController:
         """
         try:
             appointment = Appointment.objects.get(id=appointment_id)
+            SlotController.lock_provider_schedule(appointment.provider)
 
             # Check if new slot is available (excluding this appointment)
-            if not SlotController.is_slot_available(
+            conflict = SlotController.find_conflict(
                 appointment.provider,
                 new_scheduled_for,
                 new_scheduled_until,
                 appointment.id,
-            ):
-                raise ValueError("The selected time slot is no longer available")
+                client=appointment.client,
+            )
+            if conflict:
+                raise ValueError(SlotController.conflict_message(conflict))
 
             appointment.scheduled_for = new_scheduled_for
             appointment.scheduled_until = new_scheduled_until
-            appointment.save()
+            appointment.exclusive = appointment.provider.capacity == 1
+            try:
+                with transaction.atomic():
+                    appointment.save()
+            except IntegrityError:
+                raise ValueError("The selected time slot is no longer available")
 
             logger.info(
                 f"Appointment {appointment.id} rescheduled to {new_scheduled_for}"
@@ -421,6 +1880,9 @@ class CalendarController:
         """
         Get daily availability status for a month (for calendar display)
         Returns: {date: 'full', 'limited', 'moderate', 'wide_open'}
+
+        Uses three queries for the whole month: weekly availability,
+        exceptions, and booked minutes grouped per day.
         """
         start_date = date(year, month, 1)
         if month == 12:
@@ -428,45 +1890,96 @@ class CalendarController:
         else:
             end_date = date(year, month + 1, 1) - timedelta(days=1)
 
-        monthly_overview = {}
-        current_date = start_date
-
-        while current_date <= end_date:
-            # Get basic availability
-            availability = AvailabilityController.get_provider_availability_for_date(
-                provider, current_date
+        availability_by_date = (
+            AvailabilityController.get_provider_availability_for_range(
+                provider, start_date, end_date
             )
+        )
+        booked_minutes_by_date = CalendarController._get_booked_minutes_by_date(
+            provider, start_date, end_date
+        )
+
+        monthly_overview = {}
 
+        for current_date, availability in availability_by_date.items():
             if not availability["available"]:
                 monthly_overview[current_date] = "full"  # Red - completely unavailable
             else:
                 # Calculate actual occupancy for this day
-                occupancy_data = CalendarController.get_day_availability_details(
-                    provider, current_date
+                occupancy_percentage = CalendarController._get_occupancy_percentage(
+                    current_date,
+                    availability,
+                    booked_minutes_by_date.get(current_date, 0),
+                    provider.capacity,
                 )
-                monthly_overview[current_date] = occupancy_data["availability_level"]
-
-            current_date += timedelta(days=1)
+                monthly_overview[
+                    current_date
+                ] = CalendarController._get_availability_level(occupancy_percentage)
 
         return monthly_overview
 
+    @staticmethod
+    def _get_booked_minutes_by_date(
+        provider, start_date: date, end_date: date
+    ) -> Dict[date, float]:
+        """
+        Sum booked minutes of active appointments per day, in the provider's
+        time zone, in one query
+        """
+        tz = provider.tzinfo
+        booked = (
+            Appointment.objects.filter(
+                provider=provider,
+                scheduled_for__gte=SlotController._localize(start_date, time.min, tz),
+                scheduled_for__lt=SlotController._localize(
+                    end_date + timedelta(days=1), time.min, tz
+                ),
+                status__in=["pending", "confirmed"],
+            )
+            .annotate(day=TruncDate("scheduled_for", tzinfo=tz))
+            .values("day")
+            .annotate(booked=Sum(F("scheduled_until") - F("scheduled_for")))
+            .order_by()
+        )
+
+        return {
+            row["day"]: row["booked"].total_seconds() / 60
+            for row in booked
+            if row["booked"] is not None
+        }
+
+    @staticmethod
+    def _get_total_minutes(target_date: date, availability: Dict) -> float:
+        """Total working minutes for an available day (breaks excluded)"""
+        return sum(
+            (
+                datetime.combine(target_date, window_end)
+                - datetime.combine(target_date, window_start)
+            ).total_seconds()
+            / 60
+            for window_start, window_end in availability["windows"]
+        )
+
+    @staticmethod
+    def _get_occupancy_percentage(
+        target_date: date, availability: Dict, booked_minutes: float, capacity: int = 1
+    ) -> int:
+        """Booked share of the day's working minutes across all chairs"""
+        total_minutes = (
+            CalendarController._get_total_minutes(target_date, availability) * capacity
+        )
+        return (
+            min(100, int((booked_minutes / total_minutes) * 100))
+            if total_minutes > 0
+            else 0
+        )
+
     @staticmethod
     def get_day_availability_details(provider, target_date: date) -> Dict:
         """
         Get detailed availability information for a specific day
         Includes booked slots, available slots, and occupancy percentage
         """
-        # Get all appointments for the day
-        day_start = datetime.combine(target_date, time.min)
-        day_end = datetime.combine(target_date, time.max)
-
-        appointments = Appointment.objects.filter(
-            provider=provider,
-            scheduled_for__date=target_date,
-            status__in=["pending", "confirmed"],
-        ).order_by("scheduled_for")
-
-        # Calculate occupancy
         availability = AvailabilityController.get_provider_availability_for_date(
             provider, target_date
         )
@@ -481,13 +1994,28 @@ class CalendarController:
                 "working_hours": None,
             }
 
-        # Calculate total available minutes in the day
+        # Get all appointments of the provider's day, with the rows they display
+        tz = provider.tzinfo
+        appointments = (
+            Appointment.objects.filter(
+                provider=provider,
+                scheduled_for__gte=SlotController._localize(target_date, time.min, tz),
+                scheduled_for__lt=SlotController._localize(
+                    target_date + timedelta(days=1), time.min, tz
+                ),
+                status__in=["pending", "confirmed"],
+            )
+            .select_related("client__user", "service")
+            .order_by("scheduled_for")
+        )
+
+        # Calculate total available minutes in the day, across all chairs
         start_time = availability["start_time"]
         end_time = availability["end_time"]
         total_minutes = (
-            datetime.combine(target_date, end_time)
-            - datetime.combine(target_date, start_time)
-        ).total_seconds() / 60
+            CalendarController._get_total_minutes(target_date, availability)
+            * provider.capacity
+        )
 
         # Calculate booked minutes
         booked_minutes = 0
@@ -509,11 +2037,24 @@ class CalendarController:
                 }
             )
 
-        occupancy_percentage = (
-            min(100, int((booked_minutes / total_minutes) * 100))
-            if total_minutes > 0
-            else 0
+        occupancy_percentage = CalendarController._get_occupancy_percentage(
+            target_date, availability, booked_minutes, provider.capacity
         )
+        occupancy = DayOccupancy.from_schedule(
+            target_date,
+            availability,
+            [(slot["start"], slot["end"]) for slot in booked_slots],
+            capacity=provider.capacity,
+            tz=tz,
+        )
+        free_blocks = [
+            {
+                "start": occupancy.to_datetime(start_minute),
+                "end": occupancy.to_datetime(end_minute),
+                "duration_minutes": end_minute - start_minute,
+            }
+            for start_minute, end_minute in occupancy.free_blocks()
+        ]
 
         return {
             "available": True,
@@ -522,9 +2063,21 @@ class CalendarController:
                 occupancy_percentage
             ),
             "booked_appointments": booked_slots,
-            "working_hours": {"start": start_time, "end": end_time},
+            "working_hours": {
+                "start": start_time,
+                "end": end_time,
+                "windows": [
+                    {"start": window_start, "end": window_end}
+                    for window_start, window_end in availability["windows"]
+                ],
+            },
+            "capacity": provider.capacity,
             "total_booked_minutes": booked_minutes,
             "total_available_minutes": total_minutes,
+            "free_blocks": free_blocks,
+            "largest_free_block_minutes": max(
+                (block["duration_minutes"] for block in free_blocks), default=0
+            ),
         }
 
     @staticmethod
@@ -540,6 +2093,54 @@ class CalendarController:
             return "wide_open"  # Green
 
 
+class WaitlistController:
+    """
+    Controller for clients waiting on a fully booked provider
+    """
+
+    MAX_ACTIVE_ENTRIES = 10
+
+    @staticmethod
+    def join_waitlist(
+        client, service, window_start: datetime, window_end: datetime
+    ) -> WaitlistEntry:
+        """Register interest in any opening for service inside the window"""
+        active = WaitlistEntry.objects.filter(client=client, status="active")
+        if active.count() >= WaitlistController.MAX_ACTIVE_ENTRIES:
+            raise ValueError(
+                f"You can wait for at most {WaitlistController.MAX_ACTIVE_ENTRIES} slots at a time"
+            )
+
+        entry = WaitlistEntry.objects.create(
+            client=client,
+            provider=service.provider,
+            service=service,
+            window_start=window_start,
+            window_end=window_end,
+        )
+        logger.info(f"Client {client.id} joined the waitlist for service {service.id}")
+        return entry
+
+    @staticmethod
+    def get_client_waitlist(client, status_filter: str = None):
+        """Get a client's waitlist entries, newest first"""
+        query = WaitlistEntry.objects.filter(client=client).select_related(
+            "service", "provider__user"
+        )
+        if status_filter:
+            query = query.filter(status=status_filter)
+        return query.order_by("-created_at")
+
+    @staticmethod
+    def leave_waitlist(client, entry_id) -> bool:
+        """Cancel an active entry; False when there is none"""
+        return bool(
+            WaitlistEntry.objects.filter(
+                id=entry_id, client=client, status="active"
+            ).update(status="cancelled", updated_at=timezone.now())
+        )
+
+
 class PaymentController:
     """
     Dummy payment controller - will be integrated with real payment providers later
@@ -0,0 +1,352 @@
+# apps/appointments/holds.py
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .intervals import BusySweep
+
+# Serializes index updates on per-process cache backends (locmem)
+_index_lock = threading.Lock()
+
+
+def _redis_client():
+    """The redis client behind the cache when it is django-redis, else None"""
+    try:
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+    except (ImportError, NotImplementedError):
+        return None
+
+
+class SlotHoldStore:
+    """
+    Short-lived slot reservations kept in the cache backend.
+
+    A hold claims every CELL_MINUTES cell it covers with cache.add, which is
+    atomic on every backend, so two clients can never hold overlapping time.
+    All keys carry the hold's TTL: an abandoned hold simply expires and no
+    cleanup job is needed. Holds are only shared between processes when the
+    cache backend is (e.g. redis).
+
+    Each provider also has an index of its live tokens, for listings that
+    need every hold at once. With django-redis it is a redis set updated
+    with SADD/SREM, so concurrent holds never drop each other's tokens;
+    other backends are per-process and update it under a lock.
+
+    A provider with capacity > 1 has one lane of cells per chair, so up to
+    capacity clients can hold overlapping time.
+    """
+
+    CELL_MINUTES = 5
+    MAX_HOLD_MINUTES = 30
+    NAMESPACE = "slot_hold"
+
+    @staticmethod
+    def hold_minutes(requested: Optional[int] = None) -> int:
+        minutes = requested or settings.SLOT_HOLD_MINUTES
+        return max(1, min(minutes, SlotHoldStore.MAX_HOLD_MINUTES))
+
+    @staticmethod
+    def _token_key(token: str) -> str:
+        return f"{SlotHoldStore.NAMESPACE}:token:{token}"
+
+    @staticmethod
+    def _index_key(provider_id) -> str:
+        return f"{SlotHoldStore.NAMESPACE}:provider:{provider_id}"
+
+    @staticmethod
+    def _cell_keys(
+        provider_id, start: datetime, end: datetime, lane: int = 0
+    ) -> List[str]:
+        cell_seconds = SlotHoldStore.CELL_MINUTES * 60
+        first = int(start.timestamp()) // cell_seconds
+        last = -(-int(end.timestamp()) // cell_seconds)
+        prefix = f"{SlotHoldStore.NAMESPACE}:cell:{provider_id}"
+        if lane:
+            prefix = f"{prefix}:{lane}"
+        return [f"{prefix}:{cell}" for cell in range(first, last)]
+
+    @staticmethod
+    def place(
+        provider_id,
+        client_id,
+        start: datetime,
+        end: datetime,
+        minutes: int = None,
+        capacity: int = 1,
+    ) -> Dict:
+        """
+        Hold [start, end) for client_id on the first of the provider's
+        capacity lanes that nobody else holds. A client retrying the same
+        checkout replaces their own overlapping holds; when every lane is
+        held by someone else, raises ValueError.
+        """
+        minutes = SlotHoldStore.hold_minutes(minutes)
+        timeout = minutes * 60
+        token = uuid.uuid4().hex
+        lanes = [
+            SlotHoldStore._cell_keys(provider_id, start, end, lane)
+            for lane in range(capacity)
+        ]
+
+        current = cache.get_many([key for cell_keys in lanes for key in cell_keys])
+        foreign = set()
+        for held_token in set(current.values()):
+            hold = SlotHoldStore.get(held_token)
+            if hold and hold["client_id"] != str(client_id):
+                foreign.add(held_token)
+            else:
+                SlotHoldStore.release(held_token)
+
+        for lane, cell_keys in enumerate(lanes):
+            if any(current.get(key) in foreign for key in cell_keys):
+                continue
+
+            claimed = []
+            for key in cell_keys:
+                if not cache.add(key, token, timeout=timeout):
+                    # Lost a race for this cell: give back what was claimed so far
+                    cache.delete_many(claimed)
+                    claimed = None
+                    break
+                claimed.append(key)
+            if claimed is not None:
+                break
+        else:
+            raise ValueError("Selected time slot is currently held by another client")
+
+        hold = {
+            "token": token,
+            "provider_id": str(provider_id),
+            "client_id": str(client_id),
+            "lane": lane,
+            "scheduled_for": start,
+            "scheduled_until": end,
+            "expires_at": timezone.now() + timedelta(seconds=timeout),
+        }
+        cache.set(SlotHoldStore._token_key(token), hold, timeout=timeout)
+        SlotHoldStore._update_index(provider_id, add=token)
+        return hold
+
+    @staticmethod
+    def get(token: str) -> Optional[Dict]:
+        return cache.get(SlotHoldStore._token_key(token))
+
+    @staticmethod
+    def release(token: str) -> bool:
+        """Drop a hold; returns False when it had already expired"""
+        hold = SlotHoldStore.get(token)
+        if hold is None:
+            return False
+
+        cell_keys = SlotHoldStore._cell_keys(
+            hold["provider_id"],
+            hold["scheduled_for"],
+            hold["scheduled_until"],
+            hold.get("lane", 0),
+        )
+        owned = [
+            key for key, value in cache.get_many(cell_keys).items() if value == token
+        ]
+        cache.delete_many(owned + [SlotHoldStore._token_key(token)])
+        SlotHoldStore._update_index(hold["provider_id"], remove=token)
+        return True
+
+    @staticmethod
+    def _update_index(provider_id, add: str = None, remove: str = None) -> None:
+        """
+        Add or remove a token in the provider's index of live tokens, and
+        prune tokens whose hold has expired
+        """
+        key = SlotHoldStore._index_key(provider_id)
+        timeout = SlotHoldStore.MAX_HOLD_MINUTES * 60
+        client = _redis_client()
+        if client is not None:
+            key = cache.make_key(key)
+            tokens = {token.decode() for token in client.smembers(key)}
+            live = cache.get_many([SlotHoldStore._token_key(token) for token in tokens])
+            expired = tokens - {hold["token"] for hold in live.values()}
+            if remove:
+                expired.add(remove)
+            expired.discard(add)
+
+            pipeline = client.pipeline()
+            if add:
+                pipeline.sadd(key, add)
+                pipeline.expire(key, timeout)
+            if expired:
+                pipeline.srem(key, *expired)
+            pipeline.execute()
+            return
+
+        with _index_lock:
+            tokens = set(cache.get(key) or [])
+            if add:
+                tokens.add(add)
+            tokens.discard(remove)
+
+            live = cache.get_many([SlotHoldStore._token_key(token) for token in tokens])
+            tokens = {hold["token"] for hold in live.values()}
+            if tokens:
+                cache.set(key, tokens, timeout=timeout)
+            else:
+                cache.delete(key)
+
+    @staticmethod
+    def _indexed_tokens(provider_ids) -> Dict:
+        """Live token index of each provider, by provider id"""
+        keys = {
+            provider_id: SlotHoldStore._index_key(provider_id)
+            for provider_id in provider_ids
+        }
+        client = _redis_client()
+        if client is None:
+            indexes = cache.get_many(list(keys.values()))
+            return {
+                provider_id: set(indexes.get(key) or [])
+                for provider_id, key in keys.items()
+            }
+
+        pipeline = client.pipeline()
+        for key in keys.values():
+            pipeline.smembers(cache.make_key(key))
+        return {
+            provider_id: {token.decode() for token in members}
+            for provider_id, members in zip(keys, pipeline.execute())
+        }
+
+    @staticmethod
+    def get_held_intervals(
+        provider_id, exclude_client_id=None, exclude_token: str = None
+    ) -> List[Tuple[datetime, datetime]]:
+        """Sorted (start, end) pairs of the provider's live holds"""
+        tokens = SlotHoldStore._indexed_tokens([provider_id])[provider_id]
+        holds = cache.get_many(
+            [
+                SlotHoldStore._token_key(token)
+                for token in tokens
+                if token != exclude_token
+            ]
+        )
+
+        return sorted(
+            (hold["scheduled_for"], hold["scheduled_until"])
+            for hold in holds.values()
+            if exclude_client_id is None or hold["client_id"] != str(exclude_client_id)
+        )
+
+    @staticmethod
+    def get_held_intervals_for_providers(
+        provider_ids, exclude_client_id=None
+    ) -> Dict[int, List[Tuple[datetime, datetime]]]:
+        """get_held_intervals for several providers with two cache round trips"""
+        indexes = SlotHoldStore._indexed_tokens(provider_ids)
+        tokens = [token for index in indexes.values() for token in index]
+        if not tokens:
+            return {}
+
+        held = {}
+        holds = cache.get_many([SlotHoldStore._token_key(token) for token in tokens])
+        for hold in holds.values():
+            if exclude_client_id is None or hold["client_id"] != str(exclude_client_id):
+                held.setdefault(int(hold["provider_id"]), []).append(
+                    (hold["scheduled_for"], hold["scheduled_until"])
+                )
+        return held
+
+    @staticmethod
+    def is_held(
+        provider_id, start: datetime, end: datetime, allow_token: str = None
+    ) -> bool:
+        """
+        Whether any part of [start, end) is held under a token other than
+        allow_token. Only the first lane is checked, which covers every hold
+        of a provider with capacity 1.
+        """
+        cells = cache.get_many(SlotHoldStore._cell_keys(provider_id, start, end))
+        return any(token != allow_token for token in cells.values())
+
+    @staticmethod
+    def held_cells(
+        provider_id,
+        intervals: List[Tuple[datetime, datetime]],
+        capacity: int = 1,
+        exclude_token: str = None,
+        exclude_client_id=None,
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        The (start, end) of every held cell, one per lane, overlapping the
+        intervals. Read from the cells that place claims atomically, so unlike
+        the token index it is exact for deciding capacity; a sweep with the
+        provider's capacity over these tells whether a lane is left.
+        """
+        lane_cells = {}
+        for start, end in intervals:
+            for lane in range(capacity):
+                for key in SlotHoldStore._cell_keys(provider_id, start, end, lane):
+                    lane_cells[key] = int(key.rsplit(":", 1)[1])
+
+        cells = cache.get_many(list(lane_cells))
+        if exclude_client_id is not None:
+            holds = cache.get_many(
+                [SlotHoldStore._token_key(token) for token in set(cells.values())]
+            )
+            excluded = {
+                hold["token"]
+                for hold in holds.values()
+                if hold["client_id"] == str(exclude_client_id)
+            }
+        else:
+            excluded = set()
+        excluded.add(exclude_token)
+
+        cell = timedelta(minutes=SlotHoldStore.CELL_MINUTES)
+        held = []
+        for key, token in cells.items():
+            if token not in excluded:
+                start = datetime.fromtimestamp(
+                    lane_cells[key] * cell.total_seconds(), tz=dt_timezone.utc
+                )
+                held.append((start, start + cell))
+        return sorted(held)
+
+    @staticmethod
+    def exclude_held_slots(
+        provider_id, slots: List[Dict], client_id=None, capacity: int = 1
+    ) -> List[Dict]:
+        """
+        Drop slots overlapping another client's hold from a start-ordered slot
+        listing. With capacity > 1 each hold takes one chair off the slot's
+        remaining_capacity, and only slots left with none are dropped.
+        """
+        held = SlotHoldStore.get_held_intervals(
+            provider_id, exclude_client_id=client_id
+        )
+        if not held:
+            return slots
+
+        if capacity > 1:
+            held_sweep = BusySweep(held, capacity)
+            remaining = []
+            for slot in slots:
+                left = slot["remaining_capacity"] - held_sweep.peak(
+                    slot["start_time"], slot["end_time"]
+                )
+                if left > 0:
+                    remaining.append({**slot, "remaining_capacity": left})
+            return remaining
+
+        return [
+            slot
+            for slot in slots
+            if not any(
+                start < slot["end_time"] and end > slot["start_time"]
+                for start, end in held
+            )
+        ]
@@ -0,0 +1,195 @@
+# apps/appointments/intervals.py
+from itertools import islice
+from typing import Iterable, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+Interval = Tuple[T, T]
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """
+    Merge overlapping or touching (start, end) pairs into a sorted list of
+    disjoint intervals. Input does not need to be sorted.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(
+    intervals: Iterable[Interval], removed: Iterable[Interval]
+) -> List[Interval]:
+    """
+    Remove every `removed` interval from `intervals` (e.g. breaks from
+    working windows) in one merged pass over both sorted lists. Returns
+    sorted, disjoint, non-empty intervals.
+    """
+    removed = merge_intervals(removed)
+    result = []
+    cursor = 0
+
+    for start, end in merge_intervals(intervals):
+        # Removals ending before this interval cannot affect later ones either
+        while cursor < len(removed) and removed[cursor][1] <= start:
+            cursor += 1
+
+        index = cursor
+        while index < len(removed) and removed[index][0] < end:
+            cut_start, cut_end = removed[index]
+            if cut_start > start:
+                result.append((start, cut_start))
+            start = max(start, cut_end)
+            index += 1
+
+        if start < end:
+            result.append((start, end))
+
+    return result
+
+
+def concurrency_steps(intervals: Iterable[Interval]) -> List[Tuple[T, int]]:
+    """
+    Sweep-line over the sorted start (+1) and end (-1) events of the
+    intervals: (moment, count) pairs meaning count intervals overlap from
+    moment until the next pair. O(n log n). Ends and starts at the same
+    moment are collapsed, so touching intervals do not overlap.
+    """
+    events = sorted(
+        (moment, delta)
+        for start, end in intervals
+        if start < end
+        for moment, delta in ((start, 1), (end, -1))
+    )
+
+    steps = []
+    active = 0
+    for moment, delta in events:
+        active += delta
+        if steps and steps[-1][0] == moment:
+            steps[-1] = (moment, active)
+        else:
+            steps.append((moment, active))
+    return steps
+
+
+def _saturated_from_steps(steps: List[Tuple[T, int]], capacity: int) -> List[Interval]:
+    saturated = []
+    saturated_since = None
+    for moment, count in steps:
+        if count >= capacity and saturated_since is None:
+            saturated_since = moment
+        elif count < capacity and saturated_since is not None:
+            saturated.append((saturated_since, moment))
+            saturated_since = None
+    return saturated
+
+
+def saturated_intervals(
+    intervals: Iterable[Interval], capacity: int = 1
+) -> List[Interval]:
+    """
+    Sorted, disjoint periods during which at least capacity of the intervals
+    overlap, i.e. when a provider serving capacity clients at once is fully
+    booked. With capacity 1 this is merge_intervals.
+    """
+    if capacity <= 1:
+        return merge_intervals(intervals)
+    return _saturated_from_steps(concurrency_steps(intervals), capacity)
+
+
+class BusySweep:
+    """
+    Answers "is [start, end) free?" against a set of busy intervals in
+    amortized O(1), provided queries arrive in non-decreasing start order
+    (which is how slot candidates are generated).
+
+    With capacity > 1 (several chairs or staff), time is busy only where
+    capacity intervals overlap, and remaining() tells how many more
+    bookings fit.
+    """
+
+    def __init__(self, busy_intervals: Iterable[Interval], capacity: int = 1):
+        self.capacity = capacity
+        self._steps = None
+        self._step_cursor = 0
+
+        if capacity > 1:
+            self._steps = concurrency_steps(busy_intervals)
+            self._busy = _saturated_from_steps(self._steps, capacity)
+        else:
+            self._busy = merge_intervals(busy_intervals)
+        self._cursor = 0
+
+    def is_free(self, start, end) -> bool:
+        busy = self._busy
+        cursor = self._cursor
+
+        # Skip busy intervals that finished before this candidate starts
+        while cursor < len(busy) and busy[cursor][1] <= start:
+            cursor += 1
+        self._cursor = cursor
+
+        return cursor == len(busy) or busy[cursor][0] >= end
+
+    def peak(self, start, end) -> int:
+        """Most busy intervals overlapping at any point of [start, end)"""
+        if self._steps is None:
+            # Capacity 1 only tracks merged intervals: busy means one booking
+            return 0 if self.is_free(start, end) else 1
+
+        steps = self._steps
+        cursor = self._step_cursor
+
+        # Move to the step in force at start
+        while cursor + 1 < len(steps) and steps[cursor + 1][0] <= start:
+            cursor += 1
+        self._step_cursor = cursor
+
+        peak = 0
+        for moment, count in islice(steps, cursor, None):
+            if moment >= end:
+                break
+            peak = max(peak, count)
+        return peak
+
+    def remaining(self, start, end) -> int:
+        """How many more bookings fit in all of [start, end)"""
+        return max(self.capacity - self.peak(start, end), 0)
+
+    def free_starts(self, first, last, step, length):
+        """
+        Yield (start, remaining) for every grid point first, first + step,
+        ... up to last where [start, start + length) still has room. With
+        capacity 1 busy stretches are jumped over rather than tested one
+        candidate at a time.
+        """
+        if self._steps is not None:
+            start = first
+            while start <= last:
+                remaining = self.remaining(start, start + length)
+                if remaining:
+                    yield start, remaining
+                start += step
+            return
+
+        busy = self._busy
+        cursor = self._cursor
+        start = first
+        while start <= last:
+            while cursor < len(busy) and busy[cursor][1] <= start:
+                cursor += 1
+            self._cursor = cursor
+
+            if cursor < len(busy) and busy[cursor][0] < start + length:
+                # First grid point at or after the end of the busy stretch
+                start += -((start - busy[cursor][1]) // step) * step
+                continue
+
+            yield start, 1
+            start += step
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from apps.appointments.benchmarks import SCENARIOS, run_scenario
+
+
+class Command(BaseCommand):
+    help = "Run a scheduling benchmark scenario against the configured database (seeded data is removed afterwards)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("scenario", choices=sorted(SCENARIOS))
+
+    def handle(self, *args, **options):
+        rows = run_scenario(options.pop("scenario"), **options)
+
+        if not rows:
+            self.stdout.write("No results")
+            return
+
+        columns = list(rows[0].keys())
+        widths = {
+            column: max(len(column), *(len(str(row[column])) for row in rows))
+            for column in columns
+        }
+
+        self.stdout.write("  ".join(column.ljust(widths[column]) for column in columns))
+        for row in rows:
+            self.stdout.write(
+                "  ".join(str(row[column]).ljust(widths[column]) for column in columns)
+            )
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.appointments.materializer import SlotMaterializer
+from apps.appointments.models import ProviderAvailability
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the materialized AppointmentSlot table against on-the-fly generation"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=None, help="Number of days to check"
+        )
+        parser.add_argument(
+            "--provider",
+            action="append",
+            dest="providers",
+            help="Profile id to check (repeatable); defaults to every provider",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        end_date = today + timedelta(
+            days=options["days"] or SlotMaterializer.horizon_days()
+        )
+
+        provider_ids = ProviderAvailability.objects.values_list(
+            "provider_id", flat=True
+        ).distinct()
+        if options["providers"]:
+            provider_ids = provider_ids.filter(provider__id__in=options["providers"])
+
+        inconsistent = 0
+        for provider_id in sorted(provider_ids):
+            mismatches = SlotMaterializer.check_consistency(
+                provider_id, today, end_date
+            )
+            if mismatches:
+                inconsistent += 1
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"Provider {provider_id}: {len(mismatches)} mismatching slots"
+                    )
+                )
+                for mismatch in mismatches[:10]:
+                    self.stdout.write(
+                        f"  service {mismatch['service_id']} {mismatch['slot_start']}: "
+                        f"expected={mismatch['expected']} stored={mismatch['stored']}"
+                    )
+
+        if inconsistent:
+            raise CommandError(
+                f"{inconsistent} providers have inconsistent slots; run rebuild_slots"
+            )
+
+        self.stdout.write(self.style.SUCCESS("Materialized slots are consistent"))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.appointments.controllers import AppointmentController
+
+
+class Command(BaseCommand):
+    help = (
+        "Expire unpaid pending appointments that have blocked their slot for too long"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutes",
+            type=int,
+            default=None,
+            help="Age after which a pending appointment expires "
+            "(defaults to PENDING_APPOINTMENT_EXPIRY_MINUTES)",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=500, help="Appointments per UPDATE"
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        stats = AppointmentController.expire_stale_pending_appointments(
+            max_age_minutes=options["minutes"],
+            chunk_size=max(options["chunk_size"], 1),
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Expired {stats['expired']} pending appointments in "
+                f"{time.perf_counter() - started:.2f}s ({stats['chunks']} chunks)"
+            )
+        )
@@ -0,0 +1,78 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.appointments.materializer import SlotMaterializer
+from apps.appointments.models import ProviderAvailability
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized AppointmentSlot horizon for providers in parallel chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=None, help="Horizon length in days"
+        )
+        parser.add_argument(
+            "--provider",
+            action="append",
+            dest="providers",
+            help="Profile id to rebuild (repeatable); defaults to every provider",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=50, help="Providers per work unit"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Number of parallel workers"
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        provider_ids = ProviderAvailability.objects.values_list(
+            "provider_id", flat=True
+        ).distinct()
+        if options["providers"]:
+            provider_ids = provider_ids.filter(provider__id__in=options["providers"])
+        provider_ids = sorted(provider_ids)
+
+        chunk_size = max(options["chunk_size"], 1)
+        chunks = [
+            provider_ids[index : index + chunk_size]
+            for index in range(0, len(provider_ids), chunk_size)
+        ]
+
+        totals = {"created": 0, "updated": 0, "deleted": 0}
+        with ThreadPoolExecutor(max_workers=max(options["workers"], 1)) as executor:
+            futures = [
+                executor.submit(self.rebuild_chunk, chunk, options["days"])
+                for chunk in chunks
+            ]
+            for future in as_completed(futures):
+                for key, value in future.result().items():
+                    totals[key] += value
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt slots for {len(provider_ids)} providers in "
+                f"{time.perf_counter() - started:.2f}s "
+                f"(created={totals['created']}, updated={totals['updated']}, "
+                f"deleted={totals['deleted']})"
+            )
+        )
+
+    @staticmethod
+    def rebuild_chunk(provider_ids, horizon_days):
+        totals = {"created": 0, "updated": 0, "deleted": 0}
+        try:
+            for provider_id in provider_ids:
+                for key, value in SlotMaterializer.rebuild(
+                    provider_id, horizon_days
+                ).items():
+                    totals[key] += value
+        finally:
+            # Worker threads get their own connection; don't leak it
+            connection.close()
+        return totals
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.appointments.next_available import NextAvailableRefresher
+from apps.services.models import Service
+
+
+class Command(BaseCommand):
+    help = "Recompute Service.next_available_at for services whose value went stale"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Refresh every active service instead of only stale ones",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=200, help="Services per batch"
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        services = (
+            Service.objects.filter(is_active=True)
+            if options["all"]
+            else NextAvailableRefresher.stale_services()
+        )
+        service_ids = list(services.order_by("pkid").values_list("pkid", flat=True))
+
+        chunk_size = max(options["chunk_size"], 1)
+        changed = 0
+        for index in range(0, len(service_ids), chunk_size):
+            changed += NextAvailableRefresher.refresh_services(
+                Service.objects.filter(
+                    pkid__in=service_ids[index : index + chunk_size]
+                ).only("pkid", "provider_id", "duration", "next_available_at")
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {len(service_ids)} services, updated {changed} in "
+                f"{time.perf_counter() - started:.2f}s"
+            )
+        )
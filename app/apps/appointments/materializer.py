@@ -0,0 +1,279 @@
+# apps/appointments/materializer.py
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.services.models import Service
+from apps.users.models import Profile
+
+from .controllers import AvailabilityController, SlotController
+from .intervals import BusySweep
+from .models import Appointment, AppointmentSlot
+
+logger = logging.getLogger(__name__)
+
+# slot_start -> (slot_end, status, appointment_id, booked_count)
+ExpectedSlots = Dict[datetime, Tuple[datetime, str, Optional[int], int]]
+
+
+class SlotMaterializer:
+    """
+    Keeps the AppointmentSlot table in sync with provider schedules.
+
+    Each provider's working hours are cut into BASE_SLOT_DURATION rows for a
+    rolling horizon. A row counts the active appointments overlapping it at
+    once and is "booked" when that reaches the provider's capacity, so reading
+    availability becomes a single (provider, slot_start) range scan.
+    """
+
+    @staticmethod
+    def horizon_days() -> int:
+        return settings.SLOT_MATERIALIZATION_HORIZON_DAYS
+
+    @staticmethod
+    def build_expected_slots(
+        provider, start_date: date, end_date: date
+    ) -> ExpectedSlots:
+        """Compute what the slot rows for [start_date, end_date] should look like"""
+        provider = SlotMaterializer._profile(provider)
+        tz = provider.tzinfo
+        availability_by_date = (
+            AvailabilityController.get_provider_availability_for_range(
+                provider, start_date, end_date
+            )
+        )
+
+        expected = {}
+        for slot_date, availability in availability_by_date.items():
+            if not availability["available"]:
+                continue
+
+            for window_start, window_end in availability["windows"]:
+                slot_start = SlotController._localize(slot_date, window_start, tz)
+                day_end = SlotController._localize(slot_date, window_end, tz)
+
+                while slot_start < day_end:
+                    # The last slot of a window is shortened so slots tile working hours exactly
+                    slot_end = min(
+                        slot_start + SlotController.BASE_SLOT_DURATION, day_end
+                    )
+                    expected[slot_start] = (slot_end, "available", None, 0)
+                    slot_start = slot_end
+
+        if not expected:
+            return expected
+
+        slot_starts = sorted(expected)
+        range_start = slot_starts[0]
+        range_end = expected[slot_starts[-1]][0]
+
+        appointments = list(
+            Appointment.objects.filter(
+                provider=provider,
+                scheduled_for__lt=range_end,
+                scheduled_until__gt=range_start,
+                status__in=["pending", "confirmed"],
+            )
+            .order_by("scheduled_for")
+            .values_list("pk", "scheduled_for", "scheduled_until")
+        )
+        if not appointments:
+            return expected
+
+        # Concurrent bookings per slot in one sweep over the sorted slots
+        capacity = provider.capacity
+        sweep = BusySweep([interval for _, *interval in appointments], capacity)
+        for slot_start in slot_starts:
+            slot_end = expected[slot_start][0]
+            booked_count = sweep.peak(slot_start, slot_end)
+            status = "booked" if booked_count >= capacity else "available"
+            expected[slot_start] = (slot_end, status, None, booked_count)
+
+        for appointment_id, scheduled_for, scheduled_until in appointments:
+            # Full slots overlapping [scheduled_for, scheduled_until)
+            first = max(bisect_right(slot_starts, scheduled_for) - 1, 0)
+            last = bisect_left(slot_starts, scheduled_until)
+
+            for slot_start in slot_starts[first:last]:
+                slot_end, status, booked_by, booked_count = expected[slot_start]
+                if (
+                    status == "booked"
+                    and booked_by is None
+                    and slot_end > scheduled_for
+                ):
+                    expected[slot_start] = (
+                        slot_end,
+                        status,
+                        appointment_id,
+                        booked_count,
+                    )
+
+        return expected
+
+    @staticmethod
+    def _profile(provider) -> Profile:
+        """Providers may be passed as a Profile or as its primary key"""
+        if isinstance(provider, Profile):
+            return provider
+        return Profile.objects.only("capacity", "timezone").get(pk=provider)
+
+    @staticmethod
+    def _clamp_to_horizon(
+        provider, start_date: date, end_date: date
+    ) -> Tuple[Optional[date], Optional[date]]:
+        """Clamp to the horizon, which starts on the provider's own today"""
+        today = timezone.localdate(timezone=provider.tzinfo)
+        horizon_end = today + timedelta(days=SlotMaterializer.horizon_days())
+        start_date = max(start_date, today)
+        end_date = min(end_date, horizon_end)
+
+        if start_date > end_date:
+            return None, None
+        return start_date, end_date
+
+    @staticmethod
+    @transaction.atomic
+    def refresh(provider, start_date: date, end_date: date) -> Dict[str, int]:
+        """
+        Bring the provider's slot rows for [start_date, end_date] up to date,
+        writing only the rows that actually changed
+        """
+        stats = {"created": 0, "updated": 0, "deleted": 0}
+        provider = SlotMaterializer._profile(provider)
+        start_date, end_date = SlotMaterializer._clamp_to_horizon(
+            provider, start_date, end_date
+        )
+        if start_date is None:
+            return stats
+
+        tz = provider.tzinfo
+        expected = SlotMaterializer.build_expected_slots(provider, start_date, end_date)
+
+        existing = {
+            slot.slot_start: slot
+            for slot in AppointmentSlot.objects.filter(
+                provider=provider,
+                slot_start__gte=SlotController._localize(start_date, time.min, tz),
+                slot_start__lt=SlotController._localize(
+                    end_date + timedelta(days=1), time.min, tz
+                ),
+            )
+        }
+
+        to_create = []
+        to_update = []
+        for slot_start, row in expected.items():
+            slot_end, status, appointment_id, booked_count = row
+            slot = existing.pop(slot_start, None)
+            if slot is None:
+                to_create.append(
+                    AppointmentSlot(
+                        provider_id=provider.pk,
+                        slot_start=slot_start,
+                        slot_end=slot_end,
+                        status=status,
+                        appointment_id=appointment_id,
+                        booked_count=booked_count,
+                    )
+                )
+            elif (
+                slot.slot_end,
+                slot.status,
+                slot.appointment_id,
+                slot.booked_count,
+            ) != row:
+                slot.slot_end = slot_end
+                slot.status = status
+                slot.appointment_id = appointment_id
+                slot.booked_count = booked_count
+                to_update.append(slot)
+
+        if to_create:
+            AppointmentSlot.objects.bulk_create(to_create, batch_size=500)
+        if to_update:
+            AppointmentSlot.objects.bulk_update(
+                to_update,
+                ["slot_end", "status", "appointment", "booked_count"],
+                batch_size=500,
+            )
+        if existing:
+            AppointmentSlot.objects.filter(
+                pk__in=[slot.pk for slot in existing.values()]
+            ).delete()
+
+        stats.update(
+            created=len(to_create), updated=len(to_update), deleted=len(existing)
+        )
+        return stats
+
+    @staticmethod
+    def rebuild(provider, horizon_days: int = None) -> Dict[str, int]:
+        """Refresh the provider's whole horizon and drop rows from past days"""
+        provider = SlotMaterializer._profile(provider)
+        today = timezone.localdate(timezone=provider.tzinfo)
+        horizon_days = horizon_days or SlotMaterializer.horizon_days()
+
+        AppointmentSlot.objects.filter(
+            provider=provider,
+            slot_start__lt=SlotController._localize(today, time.min, provider.tzinfo),
+        ).delete()
+
+        return SlotMaterializer.refresh(
+            provider, today, today + timedelta(days=horizon_days)
+        )
+
+    @staticmethod
+    def _offered(slots: List[Dict], after: datetime) -> Dict[datetime, Tuple]:
+        """start_time -> (end_time, remaining_capacity) of slots starting after"""
+        return {
+            slot["start_time"]: (slot["end_time"], slot["remaining_capacity"])
+            for slot in slots
+            if slot["start_time"] > after
+        }
+
+    @staticmethod
+    def check_consistency(provider, start_date: date, end_date: date) -> List[Dict]:
+        """
+        Compare the slots served from the stored rows with the slots
+        SlotController generates on the fly, for every active service of the
+        provider. Returns one entry per mismatching service and start time
+        (empty when consistent).
+        """
+        provider = SlotMaterializer._profile(provider)
+        start_date, end_date = SlotMaterializer._clamp_to_horizon(
+            provider, start_date, end_date
+        )
+        if start_date is None:
+            return []
+
+        mismatches = []
+        services = Service.objects.filter(provider=provider, is_active=True)
+        for service in services.order_by("pkid"):
+            generated = SlotController.generate_available_slots(
+                provider, service, start_date, end_date
+            )
+            served = SlotController.get_materialized_slots(
+                provider, service, start_date, end_date
+            )
+            # Slots that started between the two reads are left out of both
+            now = timezone.now()
+            expected = SlotMaterializer._offered(generated, now)
+            stored = SlotMaterializer._offered(served, now)
+
+            for slot_start in sorted(set(expected) | set(stored)):
+                if expected.get(slot_start) != stored.get(slot_start):
+                    mismatches.append(
+                        {
+                            "service_id": service.id,
+                            "slot_start": slot_start,
+                            "expected": expected.get(slot_start),
+                            "stored": stored.get(slot_start),
+                        }
+                    )
+
+        return mismatches
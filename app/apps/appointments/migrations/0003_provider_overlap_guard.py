@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-18 01:09
+
+from django.db import migrations, models
+
+ACTIVE_STATUSES = "('pending', 'confirmed')"
+
+
+def add_overlap_constraint(apps, schema_editor):
+    """
+    Reject overlapping active appointments for the same provider at the
+    database level. Exclusion constraints are PostgreSQL-only; other backends
+    rely on AppointmentController locking instead.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    schema_editor.execute(
+        "ALTER TABLE appointments_appointment "
+        "ADD CONSTRAINT appointment_provider_no_overlap "
+        "EXCLUDE USING gist ("
+        "provider_id WITH =, "
+        "tstzrange(scheduled_for, scheduled_until, '[)') WITH &&"
+        f") WHERE (status IN {ACTIVE_STATUSES})"
+    )
+
+
+def remove_overlap_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        "ALTER TABLE appointments_appointment "
+        "DROP CONSTRAINT IF EXISTS appointment_provider_no_overlap"
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("appointments", "0002_provideravailabilityexception_reason_en_and_more"),
+        ("services", "0003_alter_servicecategory_image_url"),
+        ("users", "0006_profile_availability_schedule_en_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["provider", "scheduled_for", "scheduled_until"],
+                name="appointment_provide_444a38_idx",
+            ),
+        ),
+        migrations.RunPython(add_overlap_constraint, remove_overlap_constraint),
+    ]
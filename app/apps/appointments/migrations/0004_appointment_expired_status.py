@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("appointments", "0003_provider_overlap_guard"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="appointment",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("confirmed", "Confirmed"),
+                    ("declined", "Declined"),
+                    ("client_cancelled", "Cancelled by Client"),
+                    ("provider_cancelled", "Cancelled by Provider"),
+                    ("completed", "Completed"),
+                    ("expired", "Expired"),
+                ],
+                default="pending",
+                max_length=20,
+            ),
+        ),
+    ]
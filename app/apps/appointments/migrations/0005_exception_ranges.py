@@ -0,0 +1,150 @@
+# Generated by Django 5.2 on 2026-10-18 01:22
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.migrations.exceptions import IrreversibleError
+
+# Rows are merged only when everything but the date is identical
+MERGE_FIELDS = (
+    "provider_id",
+    "exception_type",
+    "start_time",
+    "end_time",
+    "reason",
+    "reason_en",
+    "reason_fr",
+)
+
+
+def merge_consecutive_exceptions(apps, schema_editor):
+    """Collapse runs of consecutive identical single-day exceptions into ranges"""
+    AvailabilityException = apps.get_model(
+        "appointments", "ProviderAvailabilityException"
+    )
+
+    current = None
+    to_update = []
+    to_delete = []
+
+    for exception in AvailabilityException.objects.order_by(
+        "provider_id", "exception_date"
+    ):
+        exception.end_date = exception.exception_date
+        if (
+            current is not None
+            and exception.exception_date == current.end_date + timedelta(days=1)
+            and all(
+                getattr(exception, field) == getattr(current, field)
+                for field in MERGE_FIELDS
+            )
+        ):
+            current.end_date = exception.exception_date
+            to_delete.append(exception.pk)
+            continue
+
+        current = exception
+        to_update.append(exception)
+
+    AvailabilityException.objects.bulk_update(to_update, ["end_date"], batch_size=500)
+    for index in range(0, len(to_delete), 500):
+        AvailabilityException.objects.filter(
+            pk__in=to_delete[index : index + 500]
+        ).delete()
+
+
+def split_exception_ranges(apps, schema_editor):
+    """
+    Reverse: expand ranges back into one row per day. Recurring exceptions
+    and ranges sharing a day cannot be represented under the restored
+    unique (provider, exception_date), so their presence aborts the reversal
+    rather than dropping data.
+    """
+    AvailabilityException = apps.get_model(
+        "appointments", "ProviderAvailabilityException"
+    )
+
+    if AvailabilityException.objects.exclude(recurrence="").exists():
+        raise IrreversibleError(
+            "Recurring availability exceptions cannot be split into per-day "
+            "rows; delete them before reversing this migration."
+        )
+
+    taken = set()
+    new_rows = []
+    for exception in AvailabilityException.objects.order_by(
+        "provider_id", "exception_date"
+    ):
+        day = exception.exception_date
+        while day <= (exception.end_date or exception.exception_date):
+            if (exception.provider_id, day) in taken:
+                raise IrreversibleError(
+                    f"Provider {exception.provider_id} has overlapping "
+                    f"availability exceptions on {day}; resolve them before "
+                    "reversing this migration."
+                )
+            taken.add((exception.provider_id, day))
+            if day != exception.exception_date:
+                new_rows.append(
+                    AvailabilityException(
+                        provider_id=exception.provider_id,
+                        exception_date=day,
+                        end_date=day,
+                        exception_type=exception.exception_type,
+                        start_time=exception.start_time,
+                        end_time=exception.end_time,
+                        reason=exception.reason,
+                        reason_en=exception.reason_en,
+                        reason_fr=exception.reason_fr,
+                    )
+                )
+            day += timedelta(days=1)
+
+    AvailabilityException.objects.bulk_create(new_rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("appointments", "0004_appointment_expired_status"),
+        ("users", "0006_profile_availability_schedule_en_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="provideravailabilityexception",
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name="provideravailabilityexception",
+            name="end_date",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="provideravailabilityexception",
+            name="recurrence",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("", "Does not repeat"),
+                    ("weekly", "Weekly on the same weekday"),
+                    ("monthly_weekday", "Monthly on the same nth weekday"),
+                    ("monthly_last_weekday", "Monthly on the last weekday"),
+                    ("yearly", "Yearly on the same date"),
+                ],
+                default="",
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="provideravailabilityexception",
+            index=models.Index(
+                fields=["provider", "exception_date", "end_date"],
+                name="appointment_provide_0284dd_idx",
+            ),
+        ),
+        migrations.RunPython(merge_consecutive_exceptions, split_exception_ranges),
+        migrations.RemoveIndex(
+            model_name="provideravailabilityexception",
+            name="appointment_provide_67c20e_idx",
+        ),
+    ]
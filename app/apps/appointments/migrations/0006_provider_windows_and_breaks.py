@@ -0,0 +1,77 @@
+# Generated by Django 5.2 on 2026-10-18 01:26
+
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("appointments", "0005_exception_ranges"),
+        ("users", "0006_profile_availability_schedule_en_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="provideravailability",
+            options={
+                "ordering": ["day_of_week", "start_time"],
+                "verbose_name": "Provider Availability",
+                "verbose_name_plural": "Provider Availabilities",
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name="provideravailability",
+            unique_together=set(),
+        ),
+        migrations.CreateModel(
+            name="ProviderBreak",
+            fields=[
+                (
+                    "pkid",
+                    models.BigAutoField(
+                        editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                (
+                    "id",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "day_of_week",
+                    models.SmallIntegerField(
+                        blank=True,
+                        null=True,
+                        validators=[
+                            django.core.validators.MinValueValidator(0),
+                            django.core.validators.MaxValueValidator(6),
+                        ],
+                    ),
+                ),
+                ("start_time", models.TimeField()),
+                ("end_time", models.TimeField()),
+                (
+                    "provider",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="breaks",
+                        to="users.profile",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Provider Break",
+                "verbose_name_plural": "Provider Breaks",
+                "ordering": ["day_of_week", "start_time"],
+                "indexes": [
+                    models.Index(
+                        fields=["provider", "day_of_week"],
+                        name="appointment_provide_c8061c_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 01:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("appointments", "0007_appointment_series"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="bundle_id",
+            field=models.UUIDField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("appointments", "0009_waitlistentry"),
+        ("services", "0004_service_next_available_at"),
+        ("users", "0007_profile_business_account"),
+    ]
+
+    operations = [
+        # The composite index is built before the client index it supersedes
+        # is dropped, so client lookups are never left without one
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["client", "scheduled_for", "scheduled_until"],
+                name="appointment_client__4338cc_idx",
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="appointment",
+            name="appointment_client__1de7de_idx",
+        ),
+    ]
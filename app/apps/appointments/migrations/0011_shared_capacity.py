@@ -0,0 +1,68 @@
+# Generated by Django 5.2 on 2026-10-18 01:43
+
+from django.db import migrations, models
+
+ACTIVE_STATUSES = "('pending', 'confirmed')"
+
+
+def _replace_overlap_constraint(schema_editor, condition):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        "ALTER TABLE appointments_appointment "
+        "DROP CONSTRAINT IF EXISTS appointment_provider_no_overlap"
+    )
+    schema_editor.execute(
+        "ALTER TABLE appointments_appointment "
+        "ADD CONSTRAINT appointment_provider_no_overlap "
+        "EXCLUDE USING gist ("
+        "provider_id WITH =, "
+        "tstzrange(scheduled_for, scheduled_until, '[)') WITH &&"
+        f") WHERE ({condition})"
+    )
+
+
+def limit_overlap_constraint_to_exclusive(apps, schema_editor):
+    """
+    Appointments of providers with several chairs may overlap, so the
+    exclusion constraint only covers exclusive ones; shared bookings are
+    serialized by a provider row lock instead
+    """
+    _replace_overlap_constraint(
+        schema_editor, f"status IN {ACTIVE_STATUSES} AND exclusive"
+    )
+
+
+def restore_overlap_constraint(apps, schema_editor):
+    _replace_overlap_constraint(schema_editor, f"status IN {ACTIVE_STATUSES}")
+
+
+def count_booked_slots(apps, schema_editor):
+    """Every provider had capacity 1, so a booked slot held one appointment"""
+    AppointmentSlot = apps.get_model("appointments", "AppointmentSlot")
+    AppointmentSlot.objects.filter(status="booked").update(booked_count=1)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("appointments", "0010_appointment_client_overlap_index"),
+        ("users", "0008_profile_capacity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="exclusive",
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name="appointmentslot",
+            name="booked_count",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(count_booked_slots, migrations.RunPython.noop),
+        migrations.RunPython(
+            limit_overlap_constraint_to_exclusive, restore_overlap_constraint
+        ),
+    ]
@@ -1,5 +1,6 @@
 # apps/appointments/models.py
 import uuid
+from datetime import timedelta
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -13,6 +14,7 @@ class ProviderAvailability(TimeStampedUUIDModel):
     day_of_week = models.SmallIntegerField(
         validators=[MinValueValidator(0), MaxValueValidator(6)]
     )  # 0=Sunday, 1=Monday, etc.
+    # One row per working window; a day may have several (split shifts)
     start_time = models.TimeField()
     end_time = models.TimeField()
     is_available = models.BooleanField(default=True)
@@ -20,13 +22,13 @@ class ProviderAvailability(TimeStampedUUIDModel):
     class Meta:
         verbose_name = _("Provider Availability")
         verbose_name_plural = _("Provider Availabilities")
-        unique_together = ["provider", "day_of_week"]
+        ordering = ["day_of_week", "start_time"]
         indexes = [
             models.Index(fields=["provider", "day_of_week"]),
         ]
 
     def __str__(self):
-        return f"{self.provider.user.get_fullname} - {self.get_day_of_week_display()}"
+        return f"{self.provider.user.get_fullname} - {self.get_day_of_week_display()} {self.start_time}-{self.end_time}"
 
     def get_day_of_week_display(self):
         days = [
@@ -41,6 +43,36 @@ class ProviderAvailability(TimeStampedUUIDModel):
         return days[self.day_of_week]
 
 
+class ProviderBreak(TimeStampedUUIDModel):
+    """
+    Recurring break carved out of a provider's working windows (e.g. lunch).
+    A break without day_of_week applies to every working day, including days
+    whose hours come from a modified_hours exception.
+    """
+
+    provider = models.ForeignKey(
+        "users.Profile", on_delete=models.CASCADE, related_name="breaks"
+    )
+    day_of_week = models.SmallIntegerField(
+        blank=True,
+        null=True,
+        validators=[MinValueValidator(0), MaxValueValidator(6)],
+    )
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    class Meta:
+        verbose_name = _("Provider Break")
+        verbose_name_plural = _("Provider Breaks")
+        ordering = ["day_of_week", "start_time"]
+        indexes = [
+            models.Index(fields=["provider", "day_of_week"]),
+        ]
+
+    def __str__(self):
+        return f"{self.provider.user.get_fullname} - break {self.start_time}-{self.end_time}"
+
+
 class ProviderAvailabilityException(TimeStampedUUIDModel):
     EXCEPTION_TYPES = (
         ("unavailable", _("Unavailable")),
@@ -48,12 +80,26 @@ class ProviderAvailabilityException(TimeStampedUUIDModel):
         ("modified_hours", _("Modified Hours")),
     )
 
+    RECURRENCE_TYPES = (
+        ("", _("Does not repeat")),
+        ("weekly", _("Weekly on the same weekday")),
+        ("monthly_weekday", _("Monthly on the same nth weekday")),
+        ("monthly_last_weekday", _("Monthly on the last weekday")),
+        ("yearly", _("Yearly on the same date")),
+    )
+
     provider = models.ForeignKey(
         "users.Profile",
         on_delete=models.CASCADE,
         related_name="availability_exceptions",
     )
+    # First day of the range, or the anchor date of a recurring exception
     exception_date = models.DateField()
+    # Last day (inclusive); null only for recurring exceptions without an end
+    end_date = models.DateField(blank=True, null=True)
+    recurrence = models.CharField(
+        max_length=20, choices=RECURRENCE_TYPES, blank=True, default=""
+    )
     exception_type = models.CharField(max_length=20, choices=EXCEPTION_TYPES)
     start_time = models.TimeField(blank=True, null=True)
     end_time = models.TimeField(blank=True, null=True)
@@ -62,14 +108,94 @@ class ProviderAvailabilityException(TimeStampedUUIDModel):
     class Meta:
         verbose_name = _("Provider Availability Exception")
         verbose_name_plural = _("Provider Availability Exceptions")
-        unique_together = ["provider", "exception_date"]
         indexes = [
-            models.Index(fields=["provider", "exception_date"]),
+            models.Index(fields=["provider", "exception_date", "end_date"]),
         ]
 
     def __str__(self):
         return f"{self.provider.user.get_fullname} - {self.exception_date} ({self.get_exception_type_display()})"
 
+    def save(self, *args, **kwargs):
+        if not self.recurrence and self.end_date is None:
+            self.end_date = self.exception_date
+        super().save(*args, **kwargs)
+
+    @property
+    def specificity(self) -> tuple:
+        """
+        Sort key for overlapping exceptions, most specific first: one-off
+        ranges beat recurring rules, shorter ranges beat longer ones and
+        newer rows beat older ones
+        """
+        span = (
+            (self.end_date - self.exception_date).days
+            if self.end_date and not self.recurrence
+            else float("inf")
+        )
+        created = self.created_at.timestamp() if self.created_at else float("inf")
+        return (bool(self.recurrence), span, -created)
+
+    def occurs_on(self, target_date) -> bool:
+        anchor = self.exception_date
+        if target_date < anchor or (self.end_date and target_date > self.end_date):
+            return False
+
+        if not self.recurrence:
+            return True
+        if self.recurrence == "yearly":
+            return (target_date.month, target_date.day) == (anchor.month, anchor.day)
+        if target_date.weekday() != anchor.weekday():
+            return False
+        if self.recurrence == "monthly_weekday":
+            return (target_date.day - 1) // 7 == (anchor.day - 1) // 7
+        if self.recurrence == "monthly_last_weekday":
+            return (target_date + timedelta(days=7)).month != target_date.month
+        return self.recurrence == "weekly"
+
+    def occurrences(self, start_date, end_date):
+        """Dates in [start_date, end_date] on which this exception applies"""
+        current = max(start_date, self.exception_date)
+        last = min(end_date, self.end_date) if self.end_date else end_date
+
+        while current <= last:
+            if self.occurs_on(current):
+                yield current
+            current += timedelta(days=1)
+
+
+class AppointmentSeries(TimeStampedUUIDModel):
+    """
+    A run of appointments at the same local time every interval_weeks weeks,
+    booked together. Each occurrence is a regular Appointment pointing back
+    here, so it is paid, cancelled and rescheduled on its own.
+    """
+
+    MAX_OCCURRENCES = 52
+
+    client = models.ForeignKey(
+        "users.Profile", on_delete=models.CASCADE, related_name="client_series"
+    )
+    provider = models.ForeignKey(
+        "users.Profile", on_delete=models.CASCADE, related_name="provider_series"
+    )
+    service = models.ForeignKey("services.Service", on_delete=models.CASCADE)
+    # First requested occurrence; later ones repeat its local wall-clock time
+    scheduled_for = models.DateTimeField()
+    scheduled_until = models.DateTimeField()
+    interval_weeks = models.PositiveSmallIntegerField(
+        default=1, validators=[MinValueValidator(1), MaxValueValidator(4)]
+    )
+    occurrences = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(2), MaxValueValidator(MAX_OCCURRENCES)]
+    )
+
+    class Meta:
+        verbose_name = _("Appointment Series")
+        verbose_name_plural = _("Appointment Series")
+
+    def __str__(self):
+        return f"{self.client.user.get_fullname} - {self.service} x{self.occurrences}"
+
 
 class Appointment(TimeStampedUUIDModel):
     APPOINTMENT_STATUS = (
@@ -79,6 +205,7 @@ class Appointment(TimeStampedUUIDModel):
         ("client_cancelled", _("Cancelled by Client")),
         ("provider_cancelled", _("Cancelled by Provider")),
         ("completed", _("Completed")),
+        ("expired", _("Expired")),
     )
 
     PAYMENT_STATUS = (
@@ -113,16 +240,30 @@ class Appointment(TimeStampedUUIDModel):
     confirmed_at = models.DateTimeField(blank=True, null=True)
     cancelled_at = models.DateTimeField(blank=True, null=True)
     completed_at = models.DateTimeField(blank=True, null=True)
+    series = models.ForeignKey(
+        AppointmentSeries,
+        on_delete=models.SET_NULL,
+        related_name="appointments",
+        blank=True,
+        null=True,
+    )
+    # Shared by the appointments of a back-to-back multi-service booking
+    bundle_id = models.UUIDField(blank=True, null=True, db_index=True)
+    # False when booked with a provider serving several clients at once;
+    # only exclusive appointments are covered by the database overlap guard
+    exclusive = models.BooleanField(default=True)
 
     class Meta:
         verbose_name = _("Appointment")
         verbose_name_plural = _("Appointments")
         indexes = [
-            models.Index(fields=["client"]),
             models.Index(fields=["provider"]),
             models.Index(fields=["status"]),
             models.Index(fields=["payment_status"]),
             models.Index(fields=["scheduled_for"]),
+            models.Index(fields=["provider", "scheduled_for", "scheduled_until"]),
+            # Client-side overlap checks; also serves plain client lookups
+            models.Index(fields=["client", "scheduled_for", "scheduled_until"]),
         ]
 
     def __str__(self):
@@ -130,13 +271,59 @@ class Appointment(TimeStampedUUIDModel):
 
     def is_available(self):
         """Check if this time slot is still available"""
-        from .controllers import AppointmentController
+        from .controllers import SlotController
 
-        return AppointmentController.is_slot_available(
-            self.provider, self.scheduled_for, self.scheduled_until, self.id
+        return SlotController.is_slot_available(
+            self.provider,
+            self.scheduled_for,
+            self.scheduled_until,
+            self.id,
+            client=self.client,
         )
 
 
+class WaitlistEntry(TimeStampedUUIDModel):
+    """
+    A client's request to be told when time opens up with a provider for a
+    service inside [window_start, window_end). Entries are notified once;
+    clients register again to keep waiting.
+    """
+
+    STATUS_CHOICES = (
+        ("active", _("Active")),
+        ("notified", _("Notified")),
+        ("cancelled", _("Cancelled")),
+    )
+
+    client = models.ForeignKey(
+        "users.Profile", on_delete=models.CASCADE, related_name="waitlist_entries"
+    )
+    provider = models.ForeignKey(
+        "users.Profile", on_delete=models.CASCADE, related_name="provider_waitlist"
+    )
+    service = models.ForeignKey("services.Service", on_delete=models.CASCADE)
+    window_start = models.DateTimeField()
+    window_end = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="active")
+    notified_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = _("Waitlist Entry")
+        verbose_name_plural = _("Waitlist Entries")
+        indexes = [
+            # Interval lookup of a freed slot against active entries only
+            models.Index(
+                fields=["provider", "window_start", "window_end"],
+                condition=models.Q(status="active"),
+                name="waitlist_active_window_idx",
+            ),
+            models.Index(fields=["client", "status"]),
+        ]
+
+    def __str__(self):
+        return f"{self.client.user.get_fullname} waiting for {self.service} ({self.window_start} - {self.window_end})"
+
+
 class AppointmentSlot(TimeStampedUUIDModel):
     SLOT_STATUS = (
         ("available", _("Available")),
@@ -153,6 +340,9 @@ class AppointmentSlot(TimeStampedUUIDModel):
     appointment = models.ForeignKey(
         "Appointment", on_delete=models.SET_NULL, null=True, blank=True
     )
+    # Most active appointments overlapping the slot at once; the slot is
+    # "booked" when this reaches the provider's capacity
+    booked_count = models.PositiveSmallIntegerField(default=0)
 
     class Meta:
         verbose_name = _("Appointment Slot")
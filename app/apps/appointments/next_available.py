@@ -0,0 +1,148 @@
+# apps/appointments/next_available.py
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+import logging
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.timezones import get_zone, to_epoch_minutes
+from apps.services.models import Service
+from apps.users.models import Profile
+from .controllers import AvailabilityController, SlotController
+
+logger = logging.getLogger(__name__)
+
+
+class NextAvailableRefresher:
+    """
+    Maintains the denormalized Service.next_available_at column so catalog
+    listings can sort and filter on "next bookable" with an index instead of
+    generating slots per row.
+
+    Values are recomputed incrementally when a provider's schedule changes
+    (see signals.schedule_changed) and periodically by the
+    refresh_next_available command, since a value goes stale once its slot
+    is in the past.
+    """
+
+    @staticmethod
+    def horizon_days() -> int:
+        return settings.NEXT_AVAILABLE_HORIZON_DAYS
+
+    @staticmethod
+    def compute(
+        services: List[Service], start_date: date = None, end_date: date = None
+    ) -> Dict[int, Optional[datetime]]:
+        """
+        Earliest free slot start per service pk (None when nothing is free).
+
+        All services are resolved together over windows of 1, 2, 4... days;
+        each window costs three queries for all providers still unresolved,
+        so services with a free slot soon never load the full horizon.
+        Provider capacities and time zones are read once up front.
+        """
+        start_date = start_date or timezone.localdate()
+        end_date = end_date or start_date + timedelta(
+            days=NextAvailableRefresher.horizon_days()
+        )
+        now_minute = to_epoch_minutes(timezone.now())
+
+        results = {service.pk: None for service in services}
+        pending = list(services)
+        settings_by_provider = {
+            pk: (capacity, get_zone(zone))
+            for pk, capacity, zone in Profile.objects.filter(
+                pk__in={service.provider_id for service in pending}
+            ).values_list("pk", "capacity", "timezone")
+        }
+        window_start = start_date
+        window_days = 1
+
+        while pending and window_start <= end_date:
+            window_end = min(window_start + timedelta(days=window_days - 1), end_date)
+            provider_ids = list({service.provider_id for service in pending})
+
+            availability_by_provider = (
+                AvailabilityController.get_availability_for_providers(
+                    provider_ids, window_start, window_end
+                )
+            )
+            # One day of margin on each side covers providers in other time zones
+            busy_by_provider = SlotController.get_busy_intervals_for_providers(
+                provider_ids,
+                SlotController._localize(window_start - timedelta(days=1), time.min),
+                SlotController._localize(window_end + timedelta(days=2), time.min),
+            )
+
+            unresolved = []
+            for service in pending:
+                first_slot = next(
+                    SlotController._iter_service_slots(
+                        service,
+                        availability_by_provider[service.provider_id],
+                        busy_by_provider.get(service.provider_id, []),
+                        now_minute,
+                        *settings_by_provider[service.provider_id],
+                    ),
+                    None,
+                )
+                if first_slot:
+                    results[service.pk] = first_slot["start_time"]
+                else:
+                    unresolved.append(service)
+
+            pending = unresolved
+            window_start = window_end + timedelta(days=1)
+            window_days *= 2
+
+        return results
+
+    @staticmethod
+    def refresh_services(services: Iterable[Service]) -> int:
+        """Recompute and store next_available_at; returns the rows changed"""
+        services = list(services)
+        if not services:
+            return 0
+
+        computed = NextAvailableRefresher.compute(services)
+        changed = []
+        for service in services:
+            if service.next_available_at != computed[service.pk]:
+                service.next_available_at = computed[service.pk]
+                changed.append(service)
+
+        # bulk_update skips save signals (translation, cache bumps)
+        Service.objects.bulk_update(changed, ["next_available_at"], batch_size=500)
+        return len(changed)
+
+    @staticmethod
+    def refresh_provider(provider_id, changed_from: date = None) -> int:
+        """
+        Refresh the provider's active services after a schedule change.
+
+        A change that starts after a service's current next_available_at
+        cannot move it, so only services whose value is missing or at/after
+        the start of changed_from are recomputed.
+        """
+        services = Service.objects.filter(provider_id=provider_id, is_active=True)
+        if changed_from:
+            services = services.filter(
+                Q(next_available_at__isnull=True)
+                | Q(
+                    next_available_at__gte=SlotController._localize(
+                        changed_from, time.min
+                    )
+                )
+            )
+        return NextAvailableRefresher.refresh_services(
+            services.only("pkid", "provider_id", "duration", "next_available_at")
+        )
+
+    @staticmethod
+    def stale_services():
+        """Active services whose value is in the past or was never found"""
+        return Service.objects.filter(is_active=True).filter(
+            Q(next_available_at__isnull=True) | Q(next_available_at__lte=timezone.now())
+        )
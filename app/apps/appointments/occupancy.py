@@ -0,0 +1,189 @@
+# apps/appointments/occupancy.py
+from datetime import date, datetime, time, timedelta, tzinfo
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from django.utils import timezone
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class DayOccupancy:
+    """
+    Raster of one provider-day at a fixed resolution (5 minutes by default,
+    i.e. 288 cells). Working hours and bookings are written with vectorized
+    slice/cumsum operations, so occupancy, free gaps and the largest free
+    block are array operations rather than loops over Appointment rows.
+
+    Bookings are rounded outwards to whole cells. booked counts concurrent
+    bookings per cell, so a provider with capacity > 1 (several chairs or
+    staff) is only fully booked where capacity bookings overlap. Cells are
+    wall-clock minutes of the day in tz (the provider's time zone).
+    """
+
+    def __init__(
+        self,
+        target_date: date,
+        resolution: int = 5,
+        capacity: int = 1,
+        tz: tzinfo = None,
+    ):
+        if MINUTES_PER_DAY % resolution:
+            raise ValueError("resolution must divide 1440 minutes")
+
+        self.target_date = target_date
+        self.resolution = resolution
+        self.capacity = capacity
+        self.tz = tz or timezone.get_current_timezone()
+        self.cells = MINUTES_PER_DAY // resolution
+        self.working = np.zeros(self.cells, dtype=bool)
+        self.booked = np.zeros(self.cells, dtype=np.int32)
+
+    @classmethod
+    def from_schedule(
+        cls,
+        target_date: date,
+        availability: Dict,
+        busy_intervals: Iterable[Tuple[datetime, datetime]],
+        resolution: int = 5,
+        capacity: int = 1,
+        tz: tzinfo = None,
+    ) -> "DayOccupancy":
+        """Build from a resolved availability dict and (start, end) datetimes"""
+        occupancy = cls(target_date, resolution, capacity, tz)
+
+        if availability["available"]:
+            for window_start, window_end in availability["windows"]:
+                occupancy.add_working_window(
+                    _minute_of_day(window_start), _minute_of_day(window_end)
+                )
+
+        occupancy.add_bookings(busy_intervals)
+        return occupancy
+
+    def add_working_window(self, start_minute: int, end_minute: int) -> None:
+        start_cell = start_minute // self.resolution
+        end_cell = -(-end_minute // self.resolution)
+        self.working[start_cell:end_cell] = True
+
+    def add_bookings(self, busy_intervals: Iterable[Tuple[datetime, datetime]]) -> None:
+        seconds = np.fromiter(
+            (
+                self._wall_clock_seconds(moment)
+                for interval in busy_intervals
+                for moment in interval
+            ),
+            dtype=np.float64,
+        )
+        if not len(seconds):
+            return
+
+        minutes = np.clip(seconds // 60, 0, MINUTES_PER_DAY).astype(np.int64)
+        start_cells = minutes[0::2] // self.resolution
+        end_cells = -(-minutes[1::2] // self.resolution)
+
+        # Difference array: +1 where a booking starts, -1 where it ends
+        delta = np.zeros(self.cells + 1, dtype=np.int32)
+        np.add.at(delta, start_cells, 1)
+        np.add.at(delta, end_cells, -1)
+        self.booked += np.cumsum(delta[:-1], dtype=np.int32)
+
+    @property
+    def free(self) -> np.ndarray:
+        """Working cells with at least one chair left"""
+        return self.working & (self.booked < self.capacity)
+
+    @property
+    def working_minutes(self) -> int:
+        return int(self.working.sum()) * self.resolution
+
+    def _booked_units(self) -> int:
+        """Booked cells weighted by concurrent bookings, capped at capacity"""
+        return int(np.minimum(self.booked, self.capacity)[self.working].sum())
+
+    @property
+    def booked_minutes(self) -> int:
+        """Booked minutes summed over chairs (at most working minutes x capacity)"""
+        return self._booked_units() * self.resolution
+
+    @property
+    def occupancy_percentage(self) -> int:
+        working_cells = int(self.working.sum())
+        if not working_cells:
+            return 0
+        return min(
+            100, int(self._booked_units() * 100 / (working_cells * self.capacity))
+        )
+
+    def _free_runs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Start and end cells of every run of free cells"""
+        edges = np.diff(np.concatenate(([0], self.free.view(np.int8), [0])))
+        return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+    def free_blocks(self, min_minutes: int = 0) -> List[Tuple[int, int]]:
+        """(start_minute, end_minute) runs of free time, in order"""
+        starts, ends = self._free_runs()
+        keep = (ends - starts) * self.resolution >= min_minutes
+
+        return list(
+            zip(
+                (starts[keep] * self.resolution).tolist(),
+                (ends[keep] * self.resolution).tolist(),
+            )
+        )
+
+    def largest_free_block(self) -> Tuple[int, int]:
+        """The longest free run as (start_minute, end_minute), or (0, 0)"""
+        starts, ends = self._free_runs()
+        if not len(starts):
+            return (0, 0)
+        longest = int(np.argmax(ends - starts))
+        return (
+            int(starts[longest]) * self.resolution,
+            int(ends[longest]) * self.resolution,
+        )
+
+    def free_starts(self, duration_minutes: int, step_minutes: int = 30) -> List[int]:
+        """
+        Minutes of the day at which a booking of duration_minutes fits entirely
+        in free time, probed every step_minutes from the start of the working
+        window (the same grid the slot generator uses)
+        """
+        window = -(-duration_minutes // self.resolution)
+        if window > self.cells:
+            return []
+
+        # fits[i] is True when cells [i, i + window) are all free
+        busy_prefix = np.concatenate(([0], np.cumsum(~self.free, dtype=np.int32)))
+        fits = (busy_prefix[window:] - busy_prefix[:-window]) == 0
+        candidates = np.flatnonzero(fits)
+
+        step = max(step_minutes // self.resolution, 1)
+        aligned = candidates[(candidates - self._window_start(candidates)) % step == 0]
+        return (aligned * self.resolution).tolist()
+
+    def _window_start(self, cells: np.ndarray) -> np.ndarray:
+        """First cell of the working window containing each cell"""
+        edges = np.diff(np.concatenate(([0], self.working.view(np.int8))))
+        starts = np.flatnonzero(edges == 1)
+        return starts[np.searchsorted(starts, cells, side="right") - 1]
+
+    def _wall_clock_seconds(self, moment: datetime) -> float:
+        """Seconds from the day's midnight as read on the clock in tz"""
+        local = moment.astimezone(self.tz)
+        days = (local.date() - self.target_date).days
+        return (
+            days * MINUTES_PER_DAY * 60
+            + local.hour * 3600
+            + local.minute * 60
+            + local.second
+        )
+
+    def to_datetime(self, minute: int) -> datetime:
+        return datetime.combine(self.target_date, time.min, tzinfo=self.tz) + timedelta(
+            minutes=minute
+        )
+
+
+def _minute_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
@@ -0,0 +1,14 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class NDJSONRenderer(JSONRenderer):
+    """
+    Lets content negotiation accept application/x-ndjson for views that
+    stream it; a plain Response (e.g. an error) renders as a single line
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_types=None, renderer_context=None):
+        return super().render(data, accepted_media_types, renderer_context) + b"\n"
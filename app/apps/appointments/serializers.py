@@ -1,6 +1,15 @@
 # apps/appointments/serializers.py
+from datetime import timedelta
+from django.utils import timezone
 from rest_framework import serializers
-from .models import ProviderAvailability, ProviderAvailabilityException, Appointment
+from .models import (
+    ProviderAvailability,
+    ProviderAvailabilityException,
+    ProviderBreak,
+    Appointment,
+    AppointmentSeries,
+    WaitlistEntry,
+)
 from apps.services.models import Service
 from apps.users.models import Profile
 
@@ -25,6 +34,44 @@ class ProviderAvailabilitySerializer(serializers.ModelSerializer):
         return obj.get_day_of_week_display()
 
 
+class WorkingWindowSerializer(serializers.Serializer):
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+
+    def validate(self, data):
+        if data["start_time"] >= data["end_time"]:
+            raise serializers.ValidationError("start_time must be before end_time")
+        return data
+
+
+class ProviderDayWindowsSerializer(serializers.Serializer):
+    """All working windows of one weekday, e.g. 08:00-12:00 and 14:00-18:00"""
+
+    day_of_week = serializers.IntegerField(min_value=0, max_value=6)
+    windows = WorkingWindowSerializer(many=True, allow_empty=False)
+
+    def validate_windows(self, windows):
+        windows = sorted(windows, key=lambda window: window["start_time"])
+        for previous, current in zip(windows, windows[1:]):
+            if current["start_time"] < previous["end_time"]:
+                raise serializers.ValidationError(
+                    "Working windows of a day must not overlap"
+                )
+        return windows
+
+
+class ProviderBreakSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProviderBreak
+        fields = ["id", "provider", "day_of_week", "start_time", "end_time"]
+        read_only_fields = ["id", "provider"]
+
+    def validate(self, data):
+        if data["start_time"] >= data["end_time"]:
+            raise serializers.ValidationError("start_time must be before end_time")
+        return data
+
+
 class ProviderAvailabilityExceptionSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProviderAvailabilityException
@@ -32,6 +79,8 @@ class ProviderAvailabilityExceptionSerializer(serializers.ModelSerializer):
             "id",
             "provider",
             "exception_date",
+            "end_date",
+            "recurrence",
             "exception_type",
             "start_time",
             "end_time",
@@ -39,9 +88,39 @@ class ProviderAvailabilityExceptionSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "provider"]
 
+    def validate(self, data):
+        end_date = data.get("end_date")
+        if end_date and end_date < data["exception_date"]:
+            raise serializers.ValidationError(
+                "end_date must be on or after exception_date"
+            )
+        return data
+
+
+class WeeklyScheduleSerializer(serializers.Serializer):
+    """
+    A whole weekly schedule. Days not listed are days off; breaks and
+    exceptions are only replaced when present. staff_ids applies the same
+    schedule to staff profiles of the caller's business account.
+    """
+
+    days = ProviderDayWindowsSerializer(many=True)
+    breaks = ProviderBreakSerializer(many=True, required=False)
+    exceptions = ProviderAvailabilityExceptionSerializer(many=True, required=False)
+    staff_ids = serializers.ListField(
+        child=serializers.UUIDField(), required=False, allow_empty=False
+    )
+
+    def validate_days(self, days):
+        day_numbers = [day["day_of_week"] for day in days]
+        if len(day_numbers) != len(set(day_numbers)):
+            raise serializers.ValidationError("Each day_of_week may appear only once")
+        return days
+
 
 class AppointmentCreateSerializer(serializers.ModelSerializer):
     service_id = serializers.UUIDField(write_only=True)
+    hold_token = serializers.CharField(write_only=True, required=False)
 
     class Meta:
         model = Appointment
@@ -51,6 +130,7 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
             "scheduled_until",
             "amount",
             "currency",
+            "hold_token",
         ]
 
     def validate(self, data):
@@ -63,17 +143,152 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
         data["service"] = service
         data["provider"] = service.provider
 
-        # Validate scheduled times
+        # Validate scheduled times; the slot itself is checked for provider
+        # and client conflicts in one query when the booking is created
         if data["scheduled_for"] >= data["scheduled_until"]:
             raise serializers.ValidationError("End time must be after start time")
 
-        # Validate the slot is available
+        return data
+
+
+class AppointmentChainCreateSerializer(serializers.Serializer):
+    """Several services of one provider booked back to back, in order"""
+
+    service_ids = serializers.ListField(child=serializers.UUIDField())
+    scheduled_for = serializers.DateTimeField()
+    currency = serializers.CharField(max_length=3, default="XAF")
+    hold_token = serializers.CharField(required=False)
+
+    def validate(self, data):
         from .controllers import SlotController
 
-        if not SlotController.is_slot_available(
-            data["provider"], data["scheduled_for"], data["scheduled_until"]
-        ):
-            raise serializers.ValidationError("This time slot is no longer available")
+        try:
+            data["services"] = SlotController.load_chain_services(data["service_ids"])
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
+        if data["scheduled_for"] <= timezone.now():
+            raise serializers.ValidationError("Start time must be in the future")
+
+        return data
+
+
+class AppointmentSeriesCreateSerializer(serializers.Serializer):
+    service_id = serializers.UUIDField()
+    scheduled_for = serializers.DateTimeField()
+    scheduled_until = serializers.DateTimeField()
+    occurrences = serializers.IntegerField(
+        min_value=2, max_value=AppointmentSeries.MAX_OCCURRENCES
+    )
+    interval_weeks = serializers.IntegerField(min_value=1, max_value=4, default=1)
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    currency = serializers.CharField(max_length=3, default="XAF")
+    # Book the free occurrences even when some of them conflict
+    skip_conflicts = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        try:
+            service = Service.objects.get(id=data["service_id"], is_active=True)
+        except Service.DoesNotExist:
+            raise serializers.ValidationError("Service not found or inactive")
+
+        data["service"] = service
+
+        if data["scheduled_for"] >= data["scheduled_until"]:
+            raise serializers.ValidationError("End time must be after start time")
+        if data["scheduled_for"] <= timezone.now():
+            raise serializers.ValidationError("First occurrence must be in the future")
+
+        return data
+
+
+class AppointmentSeriesSerializer(serializers.ModelSerializer):
+    service_name = serializers.CharField(source="service.name", read_only=True)
+
+    class Meta:
+        model = AppointmentSeries
+        fields = [
+            "id",
+            "client",
+            "provider",
+            "service",
+            "service_name",
+            "scheduled_for",
+            "scheduled_until",
+            "interval_weeks",
+            "occurrences",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    service_id = serializers.UUIDField(write_only=True)
+    service_name = serializers.CharField(source="service.name", read_only=True)
+    provider_name = serializers.CharField(
+        source="provider.user.get_fullname", read_only=True
+    )
+
+    class Meta:
+        model = WaitlistEntry
+        fields = [
+            "id",
+            "service_id",
+            "service",
+            "service_name",
+            "provider",
+            "provider_name",
+            "window_start",
+            "window_end",
+            "status",
+            "notified_at",
+            "created_at",
+        ]
+        read_only_fields = [
+            "id",
+            "service",
+            "provider",
+            "status",
+            "notified_at",
+            "created_at",
+        ]
+
+    def validate(self, data):
+        try:
+            service = Service.objects.select_related("provider").get(
+                id=data["service_id"], is_active=True
+            )
+        except Service.DoesNotExist:
+            raise serializers.ValidationError("Service not found or inactive")
+
+        data["service"] = service
+
+        if data["window_start"] >= data["window_end"]:
+            raise serializers.ValidationError("window_end must be after window_start")
+        if data["window_end"] <= timezone.now():
+            raise serializers.ValidationError("The window must end in the future")
+        if data["window_end"] - data["window_start"] > timedelta(days=30):
+            raise serializers.ValidationError("The window cannot exceed 30 days")
+        if data["window_end"] - data["window_start"] < service.duration:
+            raise serializers.ValidationError("The window is shorter than the service")
+
+        return data
+
+
+class SlotHoldCreateSerializer(serializers.Serializer):
+    scheduled_for = serializers.DateTimeField()
+    scheduled_until = serializers.DateTimeField(required=False)
+    hold_minutes = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, data):
+        service = self.context["service"]
+        data.setdefault("scheduled_until", data["scheduled_for"] + service.duration)
+
+        if data["scheduled_for"] >= data["scheduled_until"]:
+            raise serializers.ValidationError("End time must be after start time")
+
+        if data["scheduled_for"] <= timezone.now():
+            raise serializers.ValidationError("Cannot hold a slot in the past")
 
         return data
 
@@ -107,6 +322,8 @@ class AppointmentSerializer(serializers.ModelSerializer):
             "confirmed_at",
             "cancelled_at",
             "completed_at",
+            "series",
+            "bundle_id",
             "created_at",
         ]
         read_only_fields = ["id", "uuid", "client", "provider", "created_at"]
@@ -1,13 +1,31 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.db import transaction
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
 import logging
 from mubaku.services.translation_service import auto_translate_instance
-from .models import ProviderAvailabilityException
+from apps.services.models import Service
+from apps.core.timezones import get_zone
+from apps.users.models import Profile
+from .cache import schedule_cache
+from .intervals import subtract_intervals
+from .models import (
+    ProviderAvailability,
+    ProviderAvailabilityException,
+    ProviderBreak,
+    Appointment,
+)
 
 logger = logging.getLogger(__name__)
 
+# Appointments in these states occupy their time slot
+ACTIVE_STATUSES = ("pending", "confirmed")
+
 
 # ===== PROVIDER AVAILABILITY EXCEPTION SIGNALS =====
 @receiver(pre_save, sender=ProviderAvailabilityException)
@@ -19,6 +37,11 @@ def check_availability_exception_fields_changed(sender, instance, **kwargs):
         try:
             old_instance = ProviderAvailabilityException.objects.get(pk=instance.pk)
             instance._changed_fields = []
+            instance._previous_exception_span = (
+                old_instance.exception_date,
+                old_instance.end_date,
+                old_instance.recurrence,
+            )
 
             translatable_fields = ["reason"]
 
@@ -73,3 +96,239 @@ def auto_translate_provider_availability_exception(sender, instance, created, **
             logger.error(
                 f"Error scheduling translation for ProviderAvailabilityException {instance.pk}: {str(e)}"
             )
+
+
+# ===== SCHEDULE CHANGE SIGNALS =====
+# provider_id -> (start_date, end_date) collected by batched_schedule_changes
+_pending_schedule_changes = ContextVar("pending_schedule_changes", default=None)
+
+
+@contextmanager
+def batched_schedule_changes():
+    """
+    Coalesce schedule_changed calls made inside the block into one refresh
+    (and one cache bump) per provider, covering the union of their dates.
+    Nothing is dispatched if the block raises.
+    """
+    if _pending_schedule_changes.get() is not None:
+        # Nested: the outermost block dispatches
+        yield
+        return
+
+    pending = {}
+    token = _pending_schedule_changes.set(pending)
+    try:
+        yield
+    finally:
+        _pending_schedule_changes.reset(token)
+
+    for provider_id, (start_date, end_date) in pending.items():
+        schedule_changed(provider_id, start_date, end_date)
+
+
+def schedule_changed(provider_id, start_date, end_date):
+    """
+    Refresh everything derived from a provider's schedule for the given dates
+    once the current transaction commits
+    """
+    pending = _pending_schedule_changes.get()
+    if pending is not None:
+        if provider_id in pending:
+            previous_start, previous_end = pending[provider_id]
+            start_date = min(start_date, previous_start)
+            end_date = max(end_date, previous_end)
+        pending[provider_id] = (start_date, end_date)
+        return
+
+    def refresh():
+        from .materializer import SlotMaterializer
+        from .next_available import NextAvailableRefresher
+
+        schedule_cache.bump(provider_id)
+
+        try:
+            NextAvailableRefresher.refresh_provider(provider_id, start_date)
+        except Exception as e:
+            logger.error(
+                f"Error refreshing next availability for provider {provider_id}: {str(e)}"
+            )
+
+        if settings.SLOT_MATERIALIZATION_ENABLED:
+            try:
+                SlotMaterializer.refresh(provider_id, start_date, end_date)
+            except Exception as e:
+                logger.error(
+                    f"Error refreshing slots for provider {provider_id}: {str(e)}"
+                )
+
+    transaction.on_commit(refresh)
+
+
+def _local_dates(tz, *datetimes):
+    """The provider-local days spanned by the given moments"""
+    dates = [timezone.localtime(value, tz).date() for value in datetimes if value]
+    return min(dates), max(dates)
+
+
+def _provider_zone(provider_id):
+    return get_zone(
+        Profile.objects.filter(pk=provider_id)
+        .values_list("timezone", flat=True)
+        .first()
+        or settings.TIME_ZONE
+    )
+
+
+@receiver(pre_save, sender=Appointment)
+def track_appointment_schedule(sender, instance, **kwargs):
+    """
+    Remember the previous time range and status so a reschedule frees the
+    old slots too and a cancellation can be told apart from other updates
+    """
+    instance._previous_schedule = None
+    if instance.pk:
+        instance._previous_schedule = (
+            Appointment.objects.filter(pk=instance.pk)
+            .values_list("provider_id", "scheduled_for", "scheduled_until", "status")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def appointment_schedule_changed(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_schedule", None)
+
+    if previous and previous[0] != instance.provider_id:
+        schedule_changed(
+            previous[0],
+            *_local_dates(_provider_zone(previous[0]), previous[1], previous[2]),
+        )
+        previous = None
+
+    start_date, end_date = _local_dates(
+        instance.provider.tzinfo,
+        instance.scheduled_for,
+        instance.scheduled_until,
+        *(previous[1:3] if previous else ()),
+    )
+    schedule_changed(instance.provider_id, start_date, end_date)
+
+
+@receiver(post_save, sender=Appointment)
+def notify_waitlist_of_freed_time(sender, instance, created, **kwargs):
+    """
+    Tell waiting clients about time released by a cancellation, decline or
+    reschedule of an active appointment
+    """
+    from .waitlist import WaitlistMatcher
+
+    previous = getattr(instance, "_previous_schedule", None)
+    if created or not previous or previous[3] not in ACTIVE_STATUSES:
+        return
+
+    provider_id, previous_start, previous_end, _ = previous
+    if instance.status in ACTIVE_STATUSES and provider_id == instance.provider_id:
+        freed = subtract_intervals(
+            [(previous_start, previous_end)],
+            [(instance.scheduled_for, instance.scheduled_until)],
+        )
+    elif instance.status == "completed":
+        freed = []
+    else:
+        freed = [(previous_start, previous_end)]
+
+    if freed:
+        WaitlistMatcher.notify_on_commit(provider_id, freed)
+
+
+SCHEDULE_PROFILE_FIELDS = ("capacity", "timezone")
+
+
+@receiver(pre_save, sender=Profile)
+def track_provider_schedule_settings(sender, instance, **kwargs):
+    """
+    Remember the previous capacity and time zone so a change refreshes
+    derived slots
+    """
+    instance._previous_schedule_settings = None
+    update_fields = kwargs.get("update_fields")
+    if instance.pk and (
+        update_fields is None or set(SCHEDULE_PROFILE_FIELDS) & set(update_fields)
+    ):
+        instance._previous_schedule_settings = (
+            Profile.objects.filter(pk=instance.pk)
+            .values_list(*SCHEDULE_PROFILE_FIELDS)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Profile)
+def provider_schedule_settings_changed(sender, instance, created, **kwargs):
+    """
+    Slot availability and occupancy depend on how many chairs there are and
+    on the time zone the working hours are read in
+    """
+    previous = getattr(instance, "_previous_schedule_settings", None)
+    current = tuple(getattr(instance, field) for field in SCHEDULE_PROFILE_FIELDS)
+    if created or previous is None or previous == current:
+        return
+
+    # Starts a day early: the provider's own today may be the server's yesterday
+    today = timezone.localdate() - timedelta(days=1)
+    schedule_changed(
+        instance.pk,
+        today,
+        today + timedelta(days=settings.SLOT_MATERIALIZATION_HORIZON_DAYS + 1),
+    )
+
+
+@receiver(post_save, sender=ProviderAvailability)
+@receiver(post_delete, sender=ProviderAvailability)
+@receiver(post_save, sender=ProviderBreak)
+@receiver(post_delete, sender=ProviderBreak)
+def weekly_availability_changed(sender, instance, **kwargs):
+    today = timezone.localdate()
+    schedule_changed(
+        instance.provider_id,
+        today,
+        today + timedelta(days=settings.SLOT_MATERIALIZATION_HORIZON_DAYS),
+    )
+
+
+@receiver(post_save, sender=ProviderAvailabilityException)
+@receiver(post_delete, sender=ProviderAvailabilityException)
+def availability_exception_changed(sender, instance, **kwargs):
+    spans = [(instance.exception_date, instance.end_date, instance.recurrence)]
+    previous_span = getattr(instance, "_previous_exception_span", None)
+    if previous_span:
+        spans.append(previous_span)
+
+    # Recurring or open-ended exceptions affect the whole horizon
+    horizon_end = timezone.localdate() + timedelta(
+        days=settings.SLOT_MATERIALIZATION_HORIZON_DAYS
+    )
+    start_date = min(exception_date for exception_date, _, _ in spans)
+    end_date = max(
+        horizon_end if recurrence or not end_date else end_date
+        for _, end_date, recurrence in spans
+    )
+    schedule_changed(instance.provider_id, start_date, end_date)
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def service_schedule_changed(sender, instance, **kwargs):
+    """Cached slots depend on service duration and active state"""
+    transaction.on_commit(lambda: schedule_cache.bump(instance.provider_id))
+
+
+@receiver(post_save, sender=Service)
+def refresh_service_next_available(sender, instance, **kwargs):
+    """A new or edited service needs its next_available_at (re)computed"""
+    from .next_available import NextAvailableRefresher
+
+    if instance.is_active:
+        transaction.on_commit(
+            lambda: NextAvailableRefresher.refresh_services([instance])
+        )
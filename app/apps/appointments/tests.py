@@ -1,3 +1,2192 @@
-from django.test import TestCase
+import json
+import math
+import threading
+import time
+import uuid
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.exceptions import IrreversibleError
+from django.db.migrations.executor import MigrationExecutor
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.core.geo import EARTH_RADIUS_KM
+from apps.notifications.models import Notification
+from apps.services.models import Service, ServiceCategory
+from apps.users.models import Profile, User
+
+from . import views
+from .benchmarks import legacy_monthly_availability_overview
+from .cache import schedule_cache
+from .controllers import (
+    AppointmentController,
+    AvailabilityController,
+    CalendarController,
+    SlotController,
+    WaitlistController,
+)
+from .holds import SlotHoldStore
+from .intervals import BusySweep, merge_intervals, subtract_intervals
+from .materializer import SlotMaterializer
+from .next_available import NextAvailableRefresher
+from .models import (
+    Appointment,
+    AppointmentSlot,
+    ProviderAvailability,
+    ProviderAvailabilityException,
+    ProviderBreak,
+    WaitlistEntry,
+)
+from .occupancy import DayOccupancy
+from .waitlist import WaitlistMatcher
+
+
+def create_profile(role="client", **fields):
+    """A user of role and its profile, with fields set on the profile"""
+    suffix = uuid.uuid4().hex[:12]
+    user = User(
+        username=f"test_{suffix}",
+        first_name="Test",
+        last_name=role.title(),
+        email=f"test_{suffix}@example.com",
+        role=role,
+    )
+    user.set_unusable_password()
+    user.save()
+
+    profile = user.profile
+    if fields:
+        for name, value in fields.items():
+            setattr(profile, name, value)
+        profile.save()
+    return profile
+
+
+def create_service(provider, minutes=60, category=None):
+    return Service.objects.create(
+        provider=provider,
+        category=category or ServiceCategory.objects.create(name="Hair"),
+        name="Haircut",
+        duration=timedelta(minutes=minutes),
+        price=Decimal("5000.00"),
+    )
+
+
+def add_working_hours(provider, start_hour=8, end_hour=18):
+    """Have provider work start_hour-end_hour every day of the week"""
+    ProviderAvailability.objects.bulk_create(
+        ProviderAvailability(
+            provider=provider,
+            day_of_week=day_of_week,
+            start_time=dt_time(start_hour),
+            end_time=dt_time(end_hour),
+        )
+        for day_of_week in range(7)
+    )
+
+
+class ConfirmPaymentTests(TestCase):
+    def setUp(self):
+        self.provider = create_profile("provider")
+        self.client_profile = create_profile()
+        self.service = create_service(self.provider)
+        start = timezone.now() + timedelta(days=1)
+        self.appointment = Appointment.objects.create(
+            client=self.client_profile,
+            provider=self.provider,
+            service=self.service,
+            scheduled_for=start,
+            scheduled_until=start + timedelta(hours=1),
+            amount=Decimal("5000.00"),
+        )
+
+    def confirm(self):
+        request = APIRequestFactory().post("/")
+        force_authenticate(request, user=self.client_profile.user)
+        return views.confirm_appointment_payment(
+            request, appointment_id=self.appointment.id
+        )
+
+    def test_confirms_pending_appointment(self):
+        response = self.confirm()
+
+        self.assertEqual(response.status_code, 200)
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.status, "confirmed")
+        self.assertEqual(self.appointment.payment_status, "held_in_escrow")
+
+    def test_expired_appointment_is_refunded_not_confirmed(self):
+        Appointment.objects.filter(pk=self.appointment.pk).update(
+            created_at=timezone.now() - timedelta(hours=2)
+        )
+        stats = AppointmentController.expire_stale_pending_appointments(
+            max_age_minutes=30
+        )
+        self.assertEqual(stats["expired"], 1)
+
+        response = self.confirm()
+
+        self.assertEqual(response.status_code, 400)
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.status, "expired")
+
+    def test_sweep_between_check_and_confirm_refunds(self):
+        # The view saw a pending appointment, then the sweep expired it
+        # before the confirmation took the row lock
+        original = AppointmentController.confirm_appointment
+
+        def expire_then_confirm(appointment_id):
+            Appointment.objects.filter(id=appointment_id).update(status="expired")
+            return original(appointment_id)
+
+        with mock.patch.object(
+            AppointmentController,
+            "confirm_appointment",
+            side_effect=expire_then_confirm,
+        ):
+            response = self.confirm()
+
+        self.assertEqual(response.status_code, 409)
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.status, "expired")
+        self.assertEqual(self.appointment.payment_status, "refunded_to_client")
+
+    def test_confirm_rejects_already_paid_appointment(self):
+        Appointment.objects.filter(pk=self.appointment.pk).update(
+            payment_status="held_in_escrow"
+        )
+
+        with self.assertRaises(ValueError):
+            AppointmentController.confirm_appointment(self.appointment.id)
+
+
+class FakeRedisSets:
+    """The redis set commands the hold index uses, kept in memory"""
+
+    def __init__(self):
+        self.sets = {}
+
+    def smembers(self, key):
+        return {member.encode() for member in self.sets.get(key, ())}
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    def srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(members)
+
+    def expire(self, key, seconds):
+        pass
+
+    def pipeline(self):
+        fake = self
+
+        class Pipeline:
+            def __init__(self):
+                self.commands = []
+
+            def __getattr__(self, name):
+                return lambda *args: self.commands.append((name, args))
+
+            def execute(self):
+                return [getattr(fake, name)(*args) for name, args in self.commands]
+
+        return Pipeline()
+
+
+class SlotHoldStoreTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.start = timezone.now().replace(minute=0, second=0, microsecond=0)
+        self.start += timedelta(days=1)
+        self.end = self.start + timedelta(hours=1)
+
+    def test_overlapping_hold_by_another_client_is_rejected(self):
+        SlotHoldStore.place(1, "client-a", self.start, self.end)
+
+        with self.assertRaises(ValueError):
+            SlotHoldStore.place(
+                1, "client-b", self.start + timedelta(minutes=30), self.end
+            )
+        self.assertEqual(len(SlotHoldStore.get_held_intervals(1)), 1)
+
+    def test_client_retrying_replaces_their_own_hold(self):
+        first = SlotHoldStore.place(1, "client-a", self.start, self.end)
+        second = SlotHoldStore.place(
+            1, "client-a", self.start + timedelta(minutes=15), self.end
+        )
+
+        self.assertIsNone(SlotHoldStore.get(first["token"]))
+        self.assertEqual(
+            SlotHoldStore.get_held_intervals(1),
+            [(second["scheduled_for"], second["scheduled_until"])],
+        )
+
+    def test_capacity_gives_each_client_a_lane(self):
+        holds = [
+            SlotHoldStore.place(1, client, self.start, self.end, capacity=2)
+            for client in ("client-a", "client-b")
+        ]
+
+        self.assertEqual(sorted(hold["lane"] for hold in holds), [0, 1])
+        with self.assertRaises(ValueError):
+            SlotHoldStore.place(1, "client-c", self.start, self.end, capacity=2)
+
+    def test_release_frees_the_cells(self):
+        hold = SlotHoldStore.place(1, "client-a", self.start, self.end)
+
+        self.assertTrue(SlotHoldStore.release(hold["token"]))
+        self.assertFalse(SlotHoldStore.is_held(1, self.start, self.end))
+        self.assertEqual(SlotHoldStore.get_held_intervals(1), [])
+        SlotHoldStore.place(1, "client-b", self.start, self.end)
+
+    def test_concurrent_holds_keep_every_token_indexed(self):
+        # Slow down the index read-modify-write so unsynchronized updates
+        # would overwrite each other
+        get_many = LocMemCache.get_many
+
+        def slow_get_many(self, keys, *args, **kwargs):
+            time.sleep(0.01)
+            return get_many(self, keys, *args, **kwargs)
+
+        barrier = threading.Barrier(8)
+
+        def place(index):
+            barrier.wait()
+            start = self.start + timedelta(hours=index)
+            SlotHoldStore.place(1, f"client-{index}", start, start + timedelta(hours=1))
+
+        with mock.patch.object(
+            LocMemCache, "get_many", autospec=True, side_effect=slow_get_many
+        ):
+            threads = [threading.Thread(target=place, args=(i,)) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(SlotHoldStore.get_held_intervals(1)), 8)
+
+    def test_index_uses_redis_sets_with_django_redis(self):
+        redis = FakeRedisSets()
+        with mock.patch("apps.appointments.holds._redis_client", return_value=redis):
+            first = SlotHoldStore.place(1, "client-a", self.start, self.end)
+            second = SlotHoldStore.place(
+                1, "client-b", self.end, self.end + timedelta(hours=1)
+            )
+            self.assertEqual(
+                redis.sets[cache.make_key(SlotHoldStore._index_key(1))],
+                {first["token"], second["token"]},
+            )
+
+            SlotHoldStore.release(first["token"])
+
+            self.assertEqual(
+                SlotHoldStore.get_held_intervals(1),
+                [(second["scheduled_for"], second["scheduled_until"])],
+            )
+            self.assertEqual(
+                SlotHoldStore.get_held_intervals_for_providers([1, 2]),
+                {1: [(second["scheduled_for"], second["scheduled_until"])]},
+            )
+
+
+class CapacityHoldTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provider = create_profile("provider", capacity=2)
+        self.client_profile = create_profile()
+        self.service = create_service(self.provider)
+        self.start = timezone.now().replace(minute=0, second=0, microsecond=0)
+        self.start += timedelta(days=1)
+        self.end = self.start + timedelta(hours=1)
+
+    def hold(self, client_id, start=None):
+        start = start or self.start
+        return SlotHoldStore.place(
+            self.provider.pk,
+            client_id,
+            start,
+            start + timedelta(hours=1),
+            capacity=self.provider.capacity,
+        )
+
+    def test_slot_is_free_while_a_lane_is_left(self):
+        self.hold("client-a")
+
+        self.assertIsNone(
+            SlotController.find_conflict(self.provider, self.start, self.end)
+        )
+
+    def test_slot_is_full_when_every_lane_is_held(self):
+        self.hold("client-a")
+        self.hold("client-b")
+
+        self.assertEqual(
+            SlotController.find_conflict(self.provider, self.start, self.end),
+            "provider",
+        )
+
+    def test_own_hold_token_does_not_count(self):
+        self.hold("client-a")
+        own = self.hold("client-b")
+
+        self.assertIsNone(
+            SlotController.find_conflict(
+                self.provider, self.start, self.end, hold_token=own["token"]
+            )
+        )
+
+    def test_capacity_is_decided_by_the_cells_not_the_index(self):
+        self.hold("client-a")
+        self.hold("client-b")
+        cache.delete(SlotHoldStore._index_key(self.provider.pk))
+
+        self.assertEqual(
+            SlotController.find_conflict(self.provider, self.start, self.end),
+            "provider",
+        )
+
+    def test_series_counts_other_clients_holds(self):
+        Appointment.objects.create(
+            client=create_profile(),
+            provider=self.provider,
+            service=self.service,
+            scheduled_for=self.start + timedelta(weeks=1),
+            scheduled_until=self.end + timedelta(weeks=1),
+            amount=Decimal("5000.00"),
+        )
+        self.hold("client-a", self.start + timedelta(weeks=1))
+        self.hold(self.client_profile.pk, self.start + timedelta(weeks=2))
+
+        series, results = AppointmentController.create_appointment_series(
+            self.client_profile,
+            self.service,
+            self.start,
+            self.end,
+            occurrences=3,
+            amount=Decimal("5000.00"),
+            skip_conflicts=True,
+        )
+
+        self.assertIsNotNone(series)
+        self.assertEqual(
+            [result["status"] for result in results], ["booked", "conflict", "booked"]
+        )
+
+
+class SlotListingCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provider = create_profile("provider")
+        self.service = create_service(self.provider)
+        add_working_hours(self.provider)
+        self.day = timezone.localdate() + timedelta(days=1)
+
+    def list_slots(self):
+        request = APIRequestFactory().get(
+            "/", {"start_date": self.day, "end_date": self.day}
+        )
+        return views.get_available_slots(request, service_id=self.service.id).data
+
+    def test_cached_listing_drops_slots_that_have_started(self):
+        slots = self.list_slots()
+        noon = datetime.combine(self.day, dt_time(12), tzinfo=self.provider.tzinfo)
+
+        # Served from the cache, computed before noon
+        with mock.patch.object(
+            views.SlotController, "get_available_slots", side_effect=AssertionError
+        ), mock.patch("django.utils.timezone.now", return_value=noon):
+            later = self.list_slots()
+
+        self.assertTrue(slots)
+        self.assertTrue(later)
+        self.assertLess(len(later), len(slots))
+        self.assertTrue(all(slot["start_time"] > noon for slot in later))
+
+
+@override_settings(SLOT_MATERIALIZATION_HORIZON_DAYS=2)
+class SlotMaterializerTests(TestCase):
+    def setUp(self):
+        self.provider = create_profile("provider")
+        self.client_profile = create_profile()
+        self.service = create_service(self.provider)
+        add_working_hours(self.provider)
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.start = datetime.combine(
+            self.day, dt_time(10), tzinfo=self.provider.tzinfo
+        )
+
+    def book(self, start, minutes=60):
+        return Appointment.objects.create(
+            client=self.client_profile,
+            provider=self.provider,
+            service=self.service,
+            scheduled_for=start,
+            scheduled_until=start + timedelta(minutes=minutes),
+            amount=Decimal("5000.00"),
+        )
+
+    def test_rebuild_creates_working_hour_rows_once(self):
+        SlotMaterializer.rebuild(self.provider)
+
+        rows = AppointmentSlot.objects.filter(
+            provider=self.provider, slot_start__date=self.day
+        )
+        self.assertEqual(rows.count(), 20)
+        self.assertEqual(
+            SlotMaterializer.refresh(self.provider, self.day, self.day),
+            {"created": 0, "updated": 0, "deleted": 0},
+        )
+
+    def test_refresh_marks_overlapping_rows_booked(self):
+        SlotMaterializer.rebuild(self.provider)
+        appointment = self.book(self.start)
+
+        stats = SlotMaterializer.refresh(self.provider, self.day, self.day)
+
+        self.assertEqual(stats["updated"], 2)
+        booked = AppointmentSlot.objects.filter(
+            provider=self.provider, status="booked"
+        ).order_by("slot_start")
+        self.assertEqual(
+            [(slot.slot_start, slot.appointment_id) for slot in booked],
+            [
+                (self.start, appointment.pk),
+                (self.start + timedelta(minutes=30), appointment.pk),
+            ],
+        )
+        self.assertEqual(
+            SlotMaterializer.check_consistency(self.provider, self.day, self.day), []
+        )
+
+    def test_materialized_slots_match_generated_slots(self):
+        self.book(self.start)
+        SlotMaterializer.rebuild(self.provider)
+
+        materialized = SlotController.get_materialized_slots(
+            self.provider, self.service, self.day, self.day
+        )
+        generated = SlotController.generate_available_slots(
+            self.provider, self.service, self.day, self.day
+        )
+
+        self.assertTrue(materialized)
+        self.assertEqual(
+            [slot["start_time"] for slot in materialized],
+            [slot["start_time"] for slot in generated],
+        )
+
+    @override_settings(SLOT_MATERIALIZATION_ENABLED=True)
+    def test_booking_refreshes_rows_on_commit(self):
+        SlotMaterializer.rebuild(self.provider)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.start)
+
+        self.assertEqual(
+            AppointmentSlot.objects.filter(
+                provider=self.provider, status="booked"
+            ).count(),
+            2,
+        )
+
+    def test_check_slots_reports_stale_rows(self):
+        SlotMaterializer.rebuild(self.provider)
+        call_command("check_slots", stdout=StringIO())
+
+        AppointmentSlot.objects.filter(
+            provider=self.provider, slot_start=self.start
+        ).update(status="booked")
+
+        with self.assertRaises(CommandError):
+            call_command("check_slots", stdout=StringIO())
+
+    def test_consistency_is_checked_against_generated_slots(self):
+        SlotMaterializer.rebuild(self.provider)
+        generated = SlotController.generate_available_slots(
+            self.provider, self.service, self.day, self.day
+        )
+
+        with mock.patch.object(
+            SlotController, "generate_available_slots", return_value=[]
+        ):
+            mismatches = SlotMaterializer.check_consistency(
+                self.provider, self.day, self.day
+            )
+
+        self.assertEqual(len(mismatches), len(generated))
+        self.assertEqual(mismatches[0]["service_id"], self.service.id)
+        self.assertIsNone(mismatches[0]["expected"])
+
+    def test_horizon_starts_on_the_providers_today(self):
+        # 10:30 UTC on Nov 4 is already Nov 5 in Kiritimati (UTC+14)
+        # and still Nov 3 in Pago Pago (UTC-11)
+        now = datetime(2026, 11, 4, 10, 30, tzinfo=dt_timezone.utc)
+        ahead = create_profile("provider", timezone="Pacific/Kiritimati")
+        behind = create_profile("provider", timezone="Pacific/Pago_Pago")
+
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            self.assertEqual(
+                SlotMaterializer._clamp_to_horizon(
+                    ahead, date(2026, 11, 4), date(2026, 11, 5)
+                ),
+                (date(2026, 11, 5), date(2026, 11, 5)),
+            )
+            self.assertEqual(
+                SlotMaterializer._clamp_to_horizon(
+                    behind, date(2026, 11, 3), date(2026, 11, 3)
+                ),
+                (date(2026, 11, 3), date(2026, 11, 3)),
+            )
+
+
+class IntervalTests(SimpleTestCase):
+    def test_merge_joins_overlapping_and_touching_intervals(self):
+        self.assertEqual(
+            merge_intervals([(5, 7), (1, 3), (3, 4), (6, 9), (11, 12)]),
+            [(1, 4), (5, 9), (11, 12)],
+        )
+
+    def test_subtract_cuts_breaks_out_of_windows(self):
+        self.assertEqual(
+            subtract_intervals([(0, 10), (20, 30)], [(2, 4), (8, 22), (29, 40)]),
+            [(0, 2), (4, 8), (22, 29)],
+        )
+
+    def test_sweep_answers_start_ordered_queries(self):
+        sweep = BusySweep([(10, 20), (30, 40)])
+
+        self.assertEqual(
+            [sweep.is_free(start, start + 10) for start in (0, 5, 20, 25, 40)],
+            [True, False, True, False, True],
+        )
+
+    def test_free_starts_jump_over_busy_stretches(self):
+        sweep = BusySweep([(10, 25)])
+
+        self.assertEqual(
+            [start for start, _ in sweep.free_starts(0, 40, 5, 10)],
+            [0, 25, 30, 35, 40],
+        )
+
+    def test_capacity_is_busy_only_where_every_chair_is_taken(self):
+        sweep = BusySweep([(0, 20), (10, 30), (40, 50)], capacity=2)
+
+        self.assertEqual(sweep.remaining(0, 10), 1)
+        self.assertEqual(sweep.remaining(10, 20), 0)
+        self.assertEqual(sweep.remaining(20, 40), 1)
+        self.assertEqual(sweep.remaining(50, 60), 2)
+
+
+class SlotGenerationTests(TestCase):
+    def setUp(self):
+        self.provider = create_profile("provider")
+        self.service = create_service(self.provider, minutes=30)
+        add_working_hours(self.provider, 8, 12)
+        ProviderBreak.objects.create(
+            provider=self.provider, start_time=dt_time(10), end_time=dt_time(10, 30)
+        )
+        self.day = timezone.localdate() + timedelta(days=1)
+
+    def at(self, hour, minute=0, day=None):
+        return datetime.combine(
+            day or self.day, dt_time(hour, minute), tzinfo=self.provider.tzinfo
+        )
+
+    def starts(self, slots):
+        return [slot["start_time"] for slot in slots]
+
+    def test_slots_skip_breaks_and_bookings(self):
+        Appointment.objects.create(
+            client=create_profile(),
+            provider=self.provider,
+            service=self.service,
+            scheduled_for=self.at(9),
+            scheduled_until=self.at(10),
+            amount=Decimal("5000.00"),
+        )
+
+        slots = SlotController.generate_available_slots(
+            self.provider, self.service, self.day, self.day
+        )
+
+        self.assertEqual(
+            self.starts(slots),
+            [self.at(8), self.at(8, 30), self.at(10, 30), self.at(11), self.at(11, 30)],
+        )
+
+    def test_cancelled_bookings_free_their_time(self):
+        Appointment.objects.create(
+            client=create_profile(),
+            provider=self.provider,
+            service=self.service,
+            scheduled_for=self.at(8),
+            scheduled_until=self.at(12),
+            amount=Decimal("5000.00"),
+            status="cancelled",
+        )
+
+        slots = SlotController.generate_available_slots(
+            self.provider, self.service, self.day, self.day
+        )
+
+        self.assertEqual(len(slots), 7)
+
+    def test_query_count_does_not_grow_with_the_range(self):
+        def count_queries(days):
+            with CaptureQueriesContext(connection) as queries:
+                slots = SlotController.generate_available_slots(
+                    self.provider,
+                    self.service,
+                    self.day,
+                    self.day + timedelta(days=days - 1),
+                )
+            self.assertEqual(len(slots), 7 * days)
+            return len(queries)
+
+        self.assertEqual(count_queries(1), count_queries(30))
+
+
+class DayOccupancyTests(SimpleTestCase):
+    day = date(2026, 3, 2)
+
+    def at(self, hour, minute=0):
+        return datetime.combine(self.day, dt_time(hour, minute), tzinfo=dt_timezone.utc)
+
+    def occupancy(self, bookings, capacity=1):
+        return DayOccupancy.from_schedule(
+            self.day,
+            {"available": True, "windows": [(dt_time(8), dt_time(12))]},
+            bookings,
+            capacity=capacity,
+            tz=dt_timezone.utc,
+        )
+
+    def test_free_time_around_a_booking(self):
+        occupancy = self.occupancy([(self.at(9), self.at(9, 50))])
+
+        self.assertEqual(occupancy.free_blocks(), [(480, 540), (590, 720)])
+        self.assertEqual(occupancy.largest_free_block(), (590, 720))
+        self.assertEqual(occupancy.occupancy_percentage, 20)
+        self.assertEqual(occupancy.free_starts(30), [480, 510, 600, 630, 660, 690])
+
+    def test_bookings_are_rounded_out_to_whole_cells(self):
+        occupancy = self.occupancy([(self.at(9, 2), self.at(9, 7))])
+
+        self.assertEqual(occupancy.booked_minutes, 10)
+        self.assertEqual(occupancy.free_blocks(), [(480, 540), (550, 720)])
+
+    def test_booking_from_the_previous_day_is_clipped(self):
+        occupancy = self.occupancy([(self.at(9) - timedelta(days=1), self.at(9))])
+
+        self.assertEqual(occupancy.free_blocks(), [(540, 720)])
+
+    def test_capacity_is_full_only_where_bookings_overlap(self):
+        occupancy = self.occupancy(
+            [(self.at(9), self.at(10)), (self.at(9, 30), self.at(10, 30))], capacity=2
+        )
+
+        self.assertEqual(occupancy.free_blocks(), [(480, 570), (600, 720)])
+        self.assertEqual(occupancy.booked_minutes, 120)
+        self.assertEqual(occupancy.occupancy_percentage, 25)
+
+    def test_min_block_length_filters_gaps(self):
+        occupancy = self.occupancy([(self.at(9), self.at(9, 50))])
+
+        self.assertEqual(occupancy.free_blocks(min_minutes=90), [(590, 720)])
+
+    def test_resolution_must_divide_the_day(self):
+        with self.assertRaises(ValueError):
+            DayOccupancy(self.day, resolution=7)
+
+
+class DayOccupancyQueryTests(TestCase):
+    def test_free_starts_match_generated_slots(self):
+        provider = create_profile("provider")
+        service = create_service(provider)
+        add_working_hours(provider, 8, 12)
+        day = timezone.localdate() + timedelta(days=1)
+        start = datetime.combine(day, dt_time(9, 30), tzinfo=provider.tzinfo)
+        Appointment.objects.create(
+            client=create_profile(),
+            provider=provider,
+            service=service,
+            scheduled_for=start,
+            scheduled_until=start + timedelta(hours=1),
+            amount=Decimal("5000.00"),
+        )
+
+        occupancy = SlotController.get_day_occupancies(provider, day, day)[day]
+        slots = SlotController.generate_available_slots(provider, service, day, day)
+
+        self.assertEqual(
+            [occupancy.to_datetime(minute) for minute in occupancy.free_starts(60)],
+            [slot["start_time"] for slot in slots],
+        )
+        self.assertEqual(occupancy.occupancy_percentage, 25)
+
+
+class OverlapGuardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provider = create_profile("provider")
+        self.service = create_service(self.provider)
+        self.start = timezone.now().replace(minute=0, second=0, microsecond=0)
+        self.start += timedelta(days=1)
+
+    def insert(self, start, status="pending", exclusive=True):
+        return Appointment.objects.create(
+            client=create_profile(),
+            provider=self.provider,
+            service=self.service,
+            scheduled_for=start,
+            scheduled_until=start + timedelta(hours=1),
+            amount=Decimal("5000.00"),
+            status=status,
+            exclusive=exclusive,
+        )
+
+    def test_booking_over_an_active_appointment_is_rejected(self):
+        self.insert(self.start)
+
+        with self.assertRaisesMessage(ValueError, "no longer available"):
+            AppointmentController.create_appointment(
+                create_profile(),
+                self.service,
+                self.start + timedelta(minutes=30),
+                self.start + timedelta(minutes=90),
+                Decimal("5000.00"),
+            )
+
+    def test_adjacent_and_cancelled_appointments_do_not_block(self):
+        self.insert(self.start - timedelta(hours=1))
+        self.insert(self.start, status="cancelled")
+
+        appointment = AppointmentController.create_appointment(
+            create_profile(),
+            self.service,
+            self.start,
+            self.start + timedelta(hours=1),
+            Decimal("5000.00"),
+        )
+
+        self.assertTrue(appointment.exclusive)
+
+    @skipUnless(
+        connection.vendor == "postgresql", "exclusion constraints need PostgreSQL"
+    )
+    def test_exclusion_constraint_rejects_overlapping_rows(self):
+        self.insert(self.start)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.insert(self.start + timedelta(minutes=30))
+
+        # Cancelled and non-exclusive (capacity > 1) rows are not covered
+        self.insert(self.start, status="cancelled")
+        self.insert(self.start, exclusive=False)
+
+    def test_capacity_drop_locks_while_shared_bookings_are_active(self):
+        self.provider.capacity = 2
+        self.provider.save()
+        shared = AppointmentController.create_appointment(
+            create_profile(),
+            self.service,
+            self.start,
+            self.start + timedelta(hours=1),
+            Decimal("5000.00"),
+        )
+        self.provider.capacity = 1
+        self.provider.save()
+
+        with mock.patch.object(connection, "vendor", "postgresql"), mock.patch.object(
+            Profile.objects,
+            "select_for_update",
+            wraps=Profile.objects.select_for_update,
+        ) as lock:
+            # The exclusion constraint does not see the shared booking
+            self.assertFalse(shared.exclusive)
+            SlotController.lock_provider_schedule(self.provider)
+            self.assertTrue(lock.called)
+
+            shared.status = "cancelled"
+            shared.save()
+            lock.reset_mock()
+            SlotController.lock_provider_schedule(self.provider)
+            self.assertFalse(lock.called)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest(
+                "threads sharing an in-memory SQLite database hit table locks"
+            )
+
+    def test_concurrent_bookings_of_one_slot_book_it_once(self):
+        provider = create_profile("provider")
+        # bulk_create skips the translation signals, which would call out to
+        # the network once this data is committed
+        service = Service.objects.bulk_create(
+            [
+                Service(
+                    provider=provider,
+                    category=ServiceCategory.objects.bulk_create(
+                        [ServiceCategory(name="Hair")]
+                    )[0],
+                    name="Haircut",
+                    duration=timedelta(hours=1),
+                    price=Decimal("5000.00"),
+                )
+            ]
+        )[0]
+        clients = [create_profile() for _ in range(4)]
+        start = timezone.now().replace(minute=0, second=0, microsecond=0)
+        start += timedelta(days=1)
+        barrier = threading.Barrier(len(clients))
+        rejected = []
+
+        def book(client):
+            barrier.wait()
+            try:
+                AppointmentController.create_appointment(
+                    client, service, start, start + timedelta(hours=1), service.price
+                )
+            except ValueError:
+                rejected.append(client)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=book, args=(client,)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(Appointment.objects.filter(provider=provider).count(), 1)
+        self.assertEqual(len(rejected), len(clients) - 1)
+
+
+class AppointmentSeriesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provider = create_profile("provider")
+        self.client_profile = create_profile()
+        self.service = create_service(self.provider)
+        self.start = timezone.now().replace(minute=0, second=0, microsecond=0)
+        self.start += timedelta(days=1)
+
+    def book(self, start, provider=None, client=None):
+        provider = provider or self.provider
+        return Appointment.objects.create(
+            client=client or create_profile(),
+            provider=provider,
+            service=create_service(provider)
+            if provider != self.provider
+            else self.service,
+            scheduled_for=start,
+            scheduled_until=start + timedelta(hours=1),
+            amount=Decimal("5000.00"),
+        )
+
+    def create_series(self, occurrences=3, **kwargs):
+        return AppointmentController.create_appointment_series(
+            self.client_profile,
+            self.service,
+            self.start,
+            self.start + timedelta(hours=1),
+            occurrences=occurrences,
+            amount=Decimal("5000.00"),
+            **kwargs,
+        )
+
+    def test_books_every_weekly_occurrence(self):
+        series, results = self.create_series(4, interval_weeks=2)
+
+        appointments = series.appointments.order_by("scheduled_for")
+        self.assertEqual(
+            [appointment.scheduled_for for appointment in appointments],
+            [self.start + timedelta(weeks=2 * index) for index in range(4)],
+        )
+        self.assertEqual(
+            [result["appointment_id"] for result in results],
+            [appointment.id for appointment in appointments],
+        )
+
+    def test_one_conflict_books_nothing(self):
+        self.book(self.start + timedelta(weeks=1))
+
+        series, results = self.create_series()
+
+        self.assertIsNone(series)
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["available", "conflict", "available"],
+        )
+        self.assertFalse(Appointment.objects.filter(client=self.client_profile))
+
+    def test_skip_conflicts_books_the_free_occurrences(self):
+        # The client's own appointment with another provider also conflicts
+        self.book(
+            self.start + timedelta(weeks=2),
+            provider=create_profile("provider"),
+            client=self.client_profile,
+        )
+
+        series, results = self.create_series(skip_conflicts=True)
+
+        self.assertEqual(
+            [result["status"] for result in results], ["booked", "booked", "conflict"]
+        )
+        self.assertEqual(series.appointments.count(), 2)
+
+    def test_occurrences_keep_their_wall_clock_time_across_dst(self):
+        paris = ZoneInfo("Europe/Paris")
+        start = datetime(2026, 3, 22, 10, tzinfo=paris)
+
+        occurrences = AppointmentController.build_series_occurrences(
+            start, start + timedelta(hours=1), 3, tz=paris
+        )
+
+        self.assertEqual(
+            [start.astimezone(paris).hour for start, _ in occurrences], [10, 10, 10]
+        )
+        # Clocks went forward on March 29th, so that week is an hour shorter
+        utc_starts = [start.astimezone(dt_timezone.utc) for start, _ in occurrences]
+        self.assertEqual(utc_starts[1] - utc_starts[0], timedelta(days=6, hours=23))
+        self.assertEqual(utc_starts[2] - utc_starts[1], timedelta(weeks=1))
+
+
+class ServiceChainTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provider = create_profile("provider")
+        self.client_profile = create_profile()
+        category = ServiceCategory.objects.create(name="Hair")
+        self.cut = create_service(self.provider, 60, category)
+        self.wash = create_service(self.provider, 30, category)
+        add_working_hours(self.provider, 8, 12)
+        self.day = timezone.localdate() + timedelta(days=1)
+
+    def at(self, hour, minute=0):
+        return datetime.combine(
+            self.day, dt_time(hour, minute), tzinfo=self.provider.tzinfo
+        )
+
+    def book(self, start, minutes=60):
+        return Appointment.objects.create(
+            client=create_profile(),
+            provider=self.provider,
+            service=self.cut,
+            scheduled_for=start,
+            scheduled_until=start + timedelta(minutes=minutes),
+            amount=Decimal("5000.00"),
+        )
+
+    def test_chain_slots_fit_every_service_back_to_back(self):
+        self.book(self.at(10))
+
+        slots = SlotController.get_chain_slots(
+            self.provider, [self.cut, self.wash], self.day, self.day
+        )
+
+        self.assertEqual(
+            [slot["start_time"] for slot in slots], [self.at(8), self.at(8, 30)]
+        )
+        self.assertEqual(
+            [(step["start_time"], step["end_time"]) for step in slots[0]["services"]],
+            [(self.at(8), self.at(9)), (self.at(9), self.at(9, 30))],
+        )
+
+    def test_chain_is_booked_as_one_bundle(self):
+        appointments = AppointmentController.create_appointment_chain(
+            self.client_profile, [self.cut, self.wash, self.cut], self.at(8)
+        )
+
+        self.assertEqual(
+            [(a.service, a.scheduled_for, a.scheduled_until) for a in appointments],
+            [
+                (self.cut, self.at(8), self.at(9)),
+                (self.wash, self.at(9), self.at(9, 30)),
+                (self.cut, self.at(9, 30), self.at(10, 30)),
+            ],
+        )
+        self.assertEqual(len({a.bundle_id for a in appointments}), 1)
+        self.assertEqual(
+            Appointment.objects.filter(bundle_id=appointments[0].bundle_id).count(), 3
+        )
+
+    def test_conflict_in_a_later_step_books_nothing(self):
+        self.book(self.at(9), minutes=15)
+
+        with self.assertRaises(ValueError):
+            AppointmentController.create_appointment_chain(
+                self.client_profile, [self.cut, self.wash], self.at(8)
+            )
+        self.assertFalse(Appointment.objects.filter(client=self.client_profile))
+
+    def test_chain_services_must_share_a_provider(self):
+        other = create_service(create_profile("provider"))
+
+        with self.assertRaises(ValueError):
+            SlotController.load_chain_services([self.cut.id, other.id])
+        with self.assertRaises(ValueError):
+            SlotController.load_chain_services([self.cut.id])
+        self.assertEqual(
+            SlotController.load_chain_services([self.wash.id, self.cut.id]),
+            [self.wash, self.cut],
+        )
+
+
+@mock.patch("apps.appointments.waitlist.auto_translate_instance")
+class WaitlistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provider = create_profile("provider")
+        self.service = create_service(self.provider)
+        self.start = timezone.now().replace(minute=0, second=0, microsecond=0)
+        self.start += timedelta(days=1)
+
+    def wait(self, start, end, service=None):
+        return WaitlistController.join_waitlist(
+            create_profile(), service or self.service, start, end
+        )
+
+    def notified(self):
+        return set(
+            WaitlistEntry.objects.filter(status="notified").values_list("pk", flat=True)
+        )
+
+    def test_cancellation_notifies_entries_the_service_fits_in(self, translate):
+        fits = self.wait(
+            self.start - timedelta(hours=2), self.start + timedelta(hours=2)
+        )
+        too_short = self.wait(
+            self.start + timedelta(minutes=30), self.start + timedelta(hours=3)
+        )
+        appointment = Appointment.objects.create(
+            client=create_profile(),
+            provider=self.provider,
+            service=self.service,
+            scheduled_for=self.start,
+            scheduled_until=self.start + timedelta(hours=1),
+            amount=Decimal("5000.00"),
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = Appointment.objects.get(pk=appointment.pk)
+            appointment.status = "cancelled"
+            appointment.save()
+
+        self.assertEqual(self.notified(), {fits.pk})
+        notification = Notification.objects.get(user=fits.client.user)
+        self.assertEqual(notification.notification_type, "slot_available")
+        self.assertEqual(notification.related_entity_id, fits.pkid)
+        too_short.refresh_from_db()
+        self.assertEqual(too_short.status, "active")
+
+    def test_reschedule_frees_only_the_time_given_up(self, translate):
+        morning = self.wait(self.start, self.start + timedelta(hours=1))
+        afternoon = self.wait(
+            self.start + timedelta(hours=1), self.start + timedelta(hours=2)
+        )
+        appointment = Appointment.objects.create(
+            client=create_profile(),
+            provider=self.provider,
+            service=self.service,
+            scheduled_for=self.start,
+            scheduled_until=self.start + timedelta(hours=2),
+            amount=Decimal("5000.00"),
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = Appointment.objects.get(pk=appointment.pk)
+            appointment.scheduled_until = self.start + timedelta(hours=1)
+            appointment.save()
+
+        self.assertEqual(self.notified(), {afternoon.pk})
+        morning.refresh_from_db()
+        self.assertEqual(morning.status, "active")
+
+    @override_settings(WAITLIST_NOTIFY_LIMIT=2)
+    def test_oldest_entries_are_notified_first(self, translate):
+        entries = [
+            self.wait(self.start, self.start + timedelta(hours=1)) for _ in range(3)
+        ]
+
+        notified = WaitlistMatcher.notify_freed_intervals(
+            self.provider.pk, [(self.start, self.start + timedelta(hours=1))]
+        )
+
+        self.assertEqual(notified, 2)
+        self.assertEqual(self.notified(), {entry.pk for entry in entries[:2]})
+
+    def test_past_time_is_not_offered(self, translate):
+        now = timezone.now()
+        self.wait(now - timedelta(hours=2), now + timedelta(minutes=30))
+
+        notified = WaitlistMatcher.notify_freed_intervals(
+            self.provider.pk, [(now - timedelta(hours=2), now + timedelta(minutes=30))]
+        )
+
+        self.assertEqual(notified, 0)
+
+    def test_active_entries_are_limited(self, translate):
+        client = create_profile()
+        for _ in range(WaitlistController.MAX_ACTIVE_ENTRIES):
+            WaitlistController.join_waitlist(
+                client, self.service, self.start, self.start + timedelta(hours=1)
+            )
+
+        with self.assertRaises(ValueError):
+            WaitlistController.join_waitlist(
+                client, self.service, self.start, self.start + timedelta(hours=1)
+            )
+
+
+class ClientDoubleBookingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provider = create_profile("provider")
+        self.service = create_service(self.provider)
+        self.client_profile = create_profile()
+        self.start = timezone.now().replace(minute=0, second=0, microsecond=0)
+        self.start += timedelta(days=1)
+        self.end = self.start + timedelta(hours=1)
+
+    def book_elsewhere(self, status="pending"):
+        """The client's appointment at self.start with another provider"""
+        other = create_profile("provider")
+        return Appointment.objects.create(
+            client=self.client_profile,
+            provider=other,
+            service=create_service(other),
+            scheduled_for=self.start,
+            scheduled_until=self.end,
+            amount=Decimal("5000.00"),
+            status=status,
+        )
+
+    def test_client_conflict_is_found_in_one_query(self):
+        self.book_elsewhere()
+
+        with self.assertNumQueries(1):
+            conflict = SlotController.find_conflict(
+                self.provider, self.start, self.end, client=self.client_profile
+            )
+
+        self.assertEqual(conflict, "client")
+        self.assertIsNone(
+            SlotController.find_conflict(self.provider, self.start, self.end)
+        )
+
+    def test_booking_over_the_clients_other_appointment_is_rejected(self):
+        self.book_elsewhere()
+
+        with self.assertRaisesMessage(ValueError, "You already have another"):
+            AppointmentController.create_appointment(
+                self.client_profile, self.service, self.start, self.end, Decimal("5000")
+            )
+
+    def test_cancelled_appointment_elsewhere_does_not_block(self):
+        self.book_elsewhere(status="cancelled")
+
+        AppointmentController.create_appointment(
+            self.client_profile, self.service, self.start, self.end, Decimal("5000")
+        )
+
+    def test_capacity_provider_still_checks_the_client(self):
+        self.provider.capacity = 3
+        self.provider.save()
+        self.book_elsewhere()
+
+        self.assertEqual(
+            SlotController.find_conflict(
+                self.provider, self.start, self.end, client=self.client_profile
+            ),
+            "client",
+        )
+
+    def test_reschedule_ignores_the_appointment_being_moved(self):
+        elsewhere = self.book_elsewhere()
+        appointment = AppointmentController.create_appointment(
+            self.client_profile,
+            self.service,
+            self.end,
+            self.end + timedelta(hours=1),
+            Decimal("5000"),
+        )
+
+        AppointmentController.reschedule_appointment(
+            appointment.id,
+            self.end + timedelta(minutes=30),
+            self.end + timedelta(minutes=90),
+        )
+        with self.assertRaisesMessage(ValueError, "You already have another"):
+            AppointmentController.reschedule_appointment(
+                appointment.id,
+                elsewhere.scheduled_for + timedelta(minutes=30),
+                elsewhere.scheduled_until + timedelta(minutes=30),
+            )
+
+
+class TimezoneSlotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provider = create_profile("provider", timezone="Europe/Paris")
+        self.service = create_service(self.provider, minutes=30)
+        self.paris = ZoneInfo("Europe/Paris")
+
+    def slots_on(self, day):
+        return SlotController.generate_available_slots(
+            self.provider, self.service, day, day
+        )
+
+    def wall_clock(self, slots):
+        return [
+            slot["start_time"].astimezone(self.paris).strftime("%H:%M %z")
+            for slot in slots
+        ]
+
+    def test_spring_forward_skips_the_missing_hour(self):
+        add_working_hours(self.provider, 0, 6)
+
+        slots = self.slots_on(date(2027, 3, 28))
+
+        self.assertEqual(
+            self.wall_clock(slots),
+            ["00:00 +0100", "00:30 +0100", "01:00 +0100", "01:30 +0100"]
+            + [
+                f"{hour:02d}:{minute:02d} +0200"
+                for hour in (3, 4, 5)
+                for minute in (0, 30)
+            ],
+        )
+        starts = [slot["start_time"].astimezone(dt_timezone.utc) for slot in slots]
+        self.assertEqual(
+            {later - earlier for earlier, later in zip(starts, starts[1:])},
+            {timedelta(minutes=30)},
+        )
+
+    def test_fall_back_offers_the_repeated_hour_twice(self):
+        add_working_hours(self.provider, 0, 4)
+
+        slots = self.slots_on(date(2026, 10, 25))
+
+        self.assertEqual(
+            self.wall_clock(slots),
+            ["00:00 +0200", "00:30 +0200", "01:00 +0200", "01:30 +0200"]
+            + ["02:00 +0200", "02:30 +0200", "02:00 +0100", "02:30 +0100"]
+            + ["03:00 +0100", "03:30 +0100"],
+        )
+
+    def test_working_hours_are_read_in_the_providers_zone(self):
+        add_working_hours(self.provider, 9, 10)
+        day = timezone.localdate() + timedelta(days=2)
+
+        slots = self.slots_on(day)
+
+        self.assertEqual(
+            [slot["start_time"] for slot in slots],
+            [
+                datetime.combine(day, dt_time(9), tzinfo=self.paris),
+                datetime.combine(day, dt_time(9, 30), tzinfo=self.paris),
+            ],
+        )
+
+    def test_slots_are_shown_in_the_requested_zone(self):
+        add_working_hours(self.provider, 9, 10)
+        day = timezone.localdate() + timedelta(days=2)
+
+        request = APIRequestFactory().get(
+            "/", {"start_date": day, "end_date": day, "timezone": "America/New_York"}
+        )
+        slots = views.get_available_slots(request, service_id=self.service.id).data
+
+        new_york = ZoneInfo("America/New_York")
+        self.assertEqual(
+            [slot["start_time"] for slot in slots],
+            [
+                datetime.combine(day, dt_time(9), tzinfo=self.paris).astimezone(
+                    new_york
+                ),
+                datetime.combine(day, dt_time(9, 30), tzinfo=self.paris).astimezone(
+                    new_york
+                ),
+            ],
+        )
+        self.assertEqual(slots[0]["start_time"].tzinfo, new_york)
+
+    def test_unknown_zone_is_rejected(self):
+        day = timezone.localdate() + timedelta(days=2)
+        request = APIRequestFactory().get(
+            "/", {"start_date": day, "end_date": day, "timezone": "Mars/Olympus"}
+        )
+
+        response = views.get_available_slots(request, service_id=self.service.id)
+
+        self.assertEqual(response.status_code, 400)
+
+
+class AvailabilityExceptionTests(TestCase):
+    def setUp(self):
+        self.provider = create_profile("provider")
+        add_working_hours(self.provider, 8, 18)
+        # The first Wednesday of November
+        self.day = date(2026, 11, 4)
+
+    def exception(self, start, end=None, exception_type="unavailable", **fields):
+        return ProviderAvailabilityException.objects.create(
+            provider=self.provider,
+            exception_date=start,
+            end_date=end,
+            exception_type=exception_type,
+            **fields,
+        )
+
+    def modified(self, start, end=None, hours=(10, 12), **fields):
+        return self.exception(
+            start,
+            end,
+            "modified_hours",
+            start_time=dt_time(hours[0]),
+            end_time=dt_time(hours[1]),
+            **fields,
+        )
+
+    def resolve(self, days):
+        availability = AvailabilityController.get_provider_availability_for_range(
+            self.provider, self.day, self.day + timedelta(days=days - 1)
+        )
+        return [
+            (day.day, entry["available"] and entry["windows"])
+            for day, entry in sorted(availability.items())
+        ]
+
+    def test_occurrences_of_a_range_are_clipped_to_the_window(self):
+        exception = ProviderAvailabilityException(
+            exception_date=self.day, end_date=self.day + timedelta(days=2)
+        )
+
+        self.assertEqual(
+            list(
+                exception.occurrences(
+                    self.day - timedelta(days=5), self.day + timedelta(days=1)
+                )
+            ),
+            [self.day, self.day + timedelta(days=1)],
+        )
+
+    def test_occurrences_of_recurring_rules(self):
+        def occurrences(anchor, recurrence, end_date=None):
+            exception = ProviderAvailabilityException(
+                exception_date=anchor, end_date=end_date, recurrence=recurrence
+            )
+            return [
+                day.isoformat()
+                for day in exception.occurrences(date(2025, 1, 1), date(2027, 1, 31))
+            ]
+
+        self.assertEqual(
+            occurrences(self.day, "weekly", date(2026, 11, 18)),
+            ["2026-11-04", "2026-11-11", "2026-11-18"],
+        )
+        self.assertEqual(
+            occurrences(self.day, "monthly_weekday"),
+            ["2026-11-04", "2026-12-02", "2027-01-06"],
+        )
+        self.assertEqual(
+            occurrences(date(2026, 11, 25), "monthly_last_weekday"),
+            ["2026-11-25", "2026-12-30", "2027-01-27"],
+        )
+        self.assertEqual(
+            occurrences(date(2025, 11, 4), "yearly"), ["2025-11-04", "2026-11-04"]
+        )
+
+    def test_specificity_ranks_ranges_before_rules_and_newer_before_older(self):
+        now = timezone.now()
+        day = ProviderAvailabilityException(
+            exception_date=self.day, end_date=self.day, created_at=now
+        )
+        week = ProviderAvailabilityException(
+            exception_date=self.day,
+            end_date=self.day + timedelta(days=6),
+            created_at=now + timedelta(days=1),
+        )
+        newer_week = ProviderAvailabilityException(
+            exception_date=self.day,
+            end_date=self.day + timedelta(days=6),
+            created_at=now + timedelta(days=2),
+        )
+        rule = ProviderAvailabilityException(
+            exception_date=self.day,
+            end_date=self.day,
+            recurrence="weekly",
+            created_at=now + timedelta(days=3),
+        )
+
+        self.assertEqual(
+            sorted([rule, week, day, newer_week], key=lambda row: row.specificity),
+            [day, newer_week, week, rule],
+        )
+
+    def test_range_overrides_a_recurring_rule(self):
+        self.exception(self.day, recurrence="weekly")
+        self.modified(self.day + timedelta(days=7), self.day + timedelta(days=8))
+
+        regular = [(dt_time(8), dt_time(18))]
+        self.assertEqual(
+            self.resolve(15),
+            [(4, False)]
+            + [(day, regular) for day in range(5, 11)]
+            + [(11, [(dt_time(10), dt_time(12))]), (12, [(dt_time(10), dt_time(12))])]
+            + [(day, regular) for day in range(13, 18)]
+            + [(18, False)],
+        )
+
+    def test_shorter_range_overrides_a_longer_one(self):
+        self.exception(self.day, self.day + timedelta(days=2))
+        self.modified(self.day + timedelta(days=1))
+
+        self.assertEqual(
+            self.resolve(3),
+            [(4, False), (5, [(dt_time(10), dt_time(12))]), (6, False)],
+        )
+
+    def test_newer_of_two_equal_ranges_wins(self):
+        older = self.modified(self.day, hours=(9, 10))
+        ProviderAvailabilityException.objects.filter(pk=older.pk).update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+        self.modified(self.day, hours=(14, 16))
+
+        self.assertEqual(self.resolve(1), [(4, [(dt_time(14), dt_time(16))])])
+
+
+class ExceptionRangeMigrationTests(TransactionTestCase):
+    before = [("appointments", "0004_appointment_expired_status")]
+    after = [("appointments", "0005_exception_ranges")]
+
+    def setUp(self):
+        self.provider = create_profile("provider")
+        self.day = date(2026, 11, 4)
+        self.addCleanup(self.migrate_to_latest)
+
+    def migrate(self, targets):
+        """Migrate to targets, returning the historical exception model there"""
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps.get_model(
+            "appointments", "ProviderAvailabilityException"
+        )
+
+    def migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def add(self, model, offset, exception_type="unavailable", hours=None, **fields):
+        day = self.day + timedelta(days=offset)
+        return model.objects.create(
+            provider_id=self.provider.pk,
+            exception_date=day,
+            exception_type=exception_type,
+            start_time=hours and dt_time(hours[0]),
+            end_time=hours and dt_time(hours[1]),
+            **fields,
+        )
+
+    def seed_days(self):
+        model = self.migrate(self.before)
+        for offset in (0, 1, 2, 4):
+            self.add(model, offset)
+        self.add(model, 5, "modified_hours", (10, 12))
+        self.add(model, 6, "modified_hours", (10, 14))
+
+    def spans(self, model):
+        return [
+            ((row.exception_date - self.day).days, (row.end_date - self.day).days)
+            for row in model.objects.order_by("exception_date")
+        ]
+
+    def test_consecutive_identical_days_merge_into_one_range(self):
+        self.seed_days()
+
+        model = self.migrate(self.after)
+
+        # The gap, the change of type and the change of hours all split runs
+        self.assertEqual(self.spans(model), [(0, 2), (4, 4), (5, 5), (6, 6)])
+
+    def test_reverse_splits_ranges_into_days(self):
+        self.seed_days()
+        self.migrate(self.after)
+
+        model = self.migrate(self.before)
+
+        self.assertEqual(
+            [
+                (row.exception_date - self.day).days
+                for row in model.objects.order_by("exception_date")
+            ],
+            [0, 1, 2, 4, 5, 6],
+        )
+
+    def test_reverse_refuses_to_drop_recurring_exceptions(self):
+        model = self.migrate(self.after)
+        self.add(model, 0, recurrence="weekly")
+
+        with self.assertRaises(IrreversibleError):
+            self.migrate(self.before)
+        self.assertEqual(model.objects.filter(recurrence="weekly").count(), 1)
+
+    def test_reverse_refuses_overlapping_ranges(self):
+        model = self.migrate(self.after)
+        self.add(model, 0, end_date=self.day + timedelta(days=3))
+        self.add(
+            model, 2, "modified_hours", (10, 12), end_date=self.day + timedelta(days=2)
+        )
+
+        with self.assertRaises(IrreversibleError):
+            self.migrate(self.before)
+
+
+class WeeklyScheduleReplacementTests(TestCase):
+    def setUp(self):
+        self.owner = create_profile("provider")
+        self.staff = create_profile("provider", business_account=self.owner)
+
+    def window(self, start_hour, end_hour):
+        return (dt_time(start_hour), dt_time(end_hour))
+
+    def replace(self, windows, provider_ids=None):
+        return AvailabilityController.replace_weekly_schedules(
+            provider_ids or [self.owner.pk], windows
+        )
+
+    def rows(self, provider):
+        return {
+            (row.day_of_week, row.start_time.hour, row.end_time.hour): (
+                row.pk,
+                row.updated_at,
+            )
+            for row in ProviderAvailability.objects.filter(provider=provider)
+        }
+
+    def put(self, **data):
+        request = APIRequestFactory().put("/", data, format="json")
+        force_authenticate(request, user=self.owner.user)
+        return views.manage_weekly_schedule(request)
+
+    def test_unchanged_rows_are_kept_and_removed_days_deleted(self):
+        self.replace(
+            {1: [self.window(9, 12), self.window(13, 17)], 2: [self.window(9, 17)]}
+        )
+        before = self.rows(self.owner)
+
+        stats = self.replace(
+            {1: [self.window(9, 12), self.window(13, 17)], 3: [self.window(9, 17)]}
+        )
+
+        self.assertEqual(
+            stats, {"created": 1, "updated": 0, "deleted": 1, "unchanged": 2}
+        )
+        after = self.rows(self.owner)
+        self.assertEqual(set(after), {(1, 9, 12), (1, 13, 17), (3, 9, 17)})
+        for key in ((1, 9, 12), (1, 13, 17)):
+            self.assertEqual(after[key], before[key])
+
+    def test_disabled_window_in_the_template_is_re_enabled(self):
+        self.replace({1: [self.window(9, 17)]})
+        ProviderAvailability.objects.update(is_available=False)
+
+        stats = self.replace({1: [self.window(9, 17)]})
+
+        self.assertEqual(
+            stats, {"created": 0, "updated": 1, "deleted": 0, "unchanged": 0}
+        )
+        self.assertTrue(ProviderAvailability.objects.get().is_available)
+
+    def test_one_refresh_per_provider_for_the_whole_replacement(self):
+        for provider in (self.owner, self.staff):
+            add_working_hours(provider, 8, 18)
+
+        with mock.patch.object(schedule_cache, "bump") as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.put(
+                    days=[
+                        {
+                            "day_of_week": 1,
+                            "windows": [{"start_time": "09:00", "end_time": "17:00"}],
+                        }
+                    ],
+                    breaks=[{"start_time": "12:00", "end_time": "12:30"}],
+                    staff_ids=[str(self.owner.id), str(self.staff.id)],
+                )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["providers"], 2)
+        # Seven days deleted and one created per provider, one refresh each
+        self.assertEqual(response.data["deleted"], 14)
+        self.assertEqual(
+            sorted(call.args[0] for call in bump.call_args_list),
+            sorted([self.owner.pk, self.staff.pk]),
+        )
+        self.assertEqual(set(self.rows(self.staff)), {(1, 9, 17)})
+        self.assertEqual(ProviderBreak.objects.filter(provider=self.staff).count(), 1)
+
+    def test_staff_outside_the_business_are_rejected(self):
+        outsider = create_profile("provider")
+        add_working_hours(outsider, 8, 18)
+
+        response = self.put(
+            days=[
+                {
+                    "day_of_week": 1,
+                    "windows": [{"start_time": "09:00", "end_time": "17:00"}],
+                }
+            ],
+            staff_ids=[str(self.staff.id), str(outsider.id)],
+        )
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(len(self.rows(outsider)), 7)
+        self.assertFalse(self.rows(self.staff))
+
+
+class SlotStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provider = create_profile("provider")
+        self.service = create_service(self.provider)
+        add_working_hours(self.provider, 8, 12)
+        self.day = timezone.localdate() + timedelta(days=1)
+
+    def at(self, hour, minute=0):
+        return datetime.combine(
+            self.day, dt_time(hour, minute), tzinfo=self.provider.tzinfo
+        )
+
+    def get(self, days=1, **params):
+        headers = {}
+        if "accept" in params:
+            headers["HTTP_ACCEPT"] = params.pop("accept")
+        request = APIRequestFactory().get(
+            "/",
+            {
+                "start_date": self.day,
+                "end_date": self.day + timedelta(days=days - 1),
+                **params,
+            },
+            **headers,
+        )
+        return views.get_available_slots(request, service_id=self.service.id)
+
+    def lines(self, response):
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        content = b"".join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_stream_is_chosen_by_parameter_or_accept_header(self):
+        self.assertFalse(self.get().streaming)
+
+        by_parameter = self.lines(self.get(stream="true"))
+        by_header = self.lines(self.get(accept="application/x-ndjson"))
+
+        self.assertEqual(len(by_parameter), 7)
+        self.assertEqual(by_header, by_parameter)
+
+    def test_stream_allows_up_to_ninety_days(self):
+        self.assertEqual(self.get(days=32).status_code, 400)
+        self.assertTrue(self.get(days=91, stream="true").streaming)
+        self.assertEqual(self.get(days=92, stream="true").status_code, 400)
+
+    def test_stream_matches_the_json_listing(self):
+        SlotHoldStore.place(
+            self.provider.pk, create_profile().pk, self.at(11, 30), self.at(12)
+        )
+
+        with mock.patch("django.utils.timezone.now", return_value=self.at(9, 15)):
+            streamed = self.lines(self.get(stream="true"))
+            listed = self.get()
+            listed.render()
+
+        # 9:00 has started and 11:00 overlaps the hold
+        self.assertEqual(
+            [slot["start_time"] for slot in streamed],
+            [
+                self.at(hour, minute).isoformat()
+                for hour, minute in ((9, 30), (10, 0), (10, 30))
+            ],
+        )
+        self.assertEqual(streamed, json.loads(listed.content))
+
+    def test_schedule_is_read_in_doubling_windows(self):
+        original = AvailabilityController.get_provider_availability_for_range
+        with mock.patch.object(
+            AvailabilityController,
+            "get_provider_availability_for_range",
+            side_effect=original,
+        ) as read_range:
+            slots = list(
+                SlotController.iter_available_slots(
+                    self.provider,
+                    self.service,
+                    self.day,
+                    self.day + timedelta(days=39),
+                )
+            )
+
+        self.assertEqual(len(slots), 7 * 40)
+        self.assertEqual(
+            [
+                (call.args[2] - call.args[1]).days + 1
+                for call in read_range.call_args_list
+            ],
+            [1, 2, 4, 8, 16, 9],
+        )
+
+
+class NextAvailableTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provider = create_profile("provider")
+        self.service = create_service(self.provider)
+        add_working_hours(self.provider, 8, 12)
+        self.day = timezone.localdate() + timedelta(days=1)
+        now = mock.patch("django.utils.timezone.now", return_value=self.at(7))
+        now.start()
+        self.addCleanup(now.stop)
+
+    def at(self, hour):
+        return datetime.combine(self.day, dt_time(hour), tzinfo=self.provider.tzinfo)
+
+    def next_available(self):
+        self.service.refresh_from_db()
+        return self.service.next_available_at
+
+    def test_compute_finds_the_first_free_slot(self):
+        self.assertEqual(
+            NextAvailableRefresher.compute([self.service]),
+            {self.service.pk: self.at(8)},
+        )
+
+    def test_booking_and_cancellation_move_the_value_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = Appointment.objects.create(
+                client=create_profile(),
+                provider=self.provider,
+                service=self.service,
+                scheduled_for=self.at(8),
+                scheduled_until=self.at(9),
+                amount=Decimal("5000.00"),
+            )
+        self.assertEqual(self.next_available(), self.at(9))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.status = "cancelled"
+            appointment.save()
+        self.assertEqual(self.next_available(), self.at(8))
+
+    def test_weekly_schedule_change_moves_the_value(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            AvailabilityController.replace_weekly_schedules(
+                [self.provider.pk],
+                {day: [(dt_time(10), dt_time(12))] for day in range(7)},
+            )
+
+        self.assertEqual(self.next_available(), self.at(10))
+
+    def test_command_fills_in_missing_values(self):
+        other = create_service(self.provider, minutes=240)
+        Service.objects.update(next_available_at=None)
+
+        call_command("refresh_next_available", stdout=StringIO())
+
+        self.assertEqual(self.next_available(), self.at(8))
+        other.refresh_from_db()
+        self.assertEqual(other.next_available_at, self.at(8))
+
+
+class EarliestCategorySlotsTests(TestCase):
+    # Akwa, Douala
+    origin = (4.05, 9.70)
+
+    def setUp(self):
+        cache.clear()
+        self.category = ServiceCategory.objects.create(name="Hair")
+        self.day = timezone.localdate() + timedelta(days=1)
+
+    def located(self, km_north, km_east=0.0, start_hour=8):
+        """A provider of the category km_north and km_east of the origin"""
+        latitude = self.origin[0] + math.degrees(km_north / EARTH_RADIUS_KM)
+        longitude = self.origin[1] + math.degrees(
+            km_east / (EARTH_RADIUS_KM * math.cos(math.radians(self.origin[0])))
+        )
+        provider = create_profile(
+            "provider",
+            latitude=Decimal(f"{latitude:.8f}"),
+            longitude=Decimal(f"{longitude:.8f}"),
+        )
+        add_working_hours(provider, start_hour, 12)
+        create_service(provider, category=self.category)
+        return provider
+
+    def earliest(self, limit, days=1, radius_km=10):
+        return SlotController.get_earliest_slots_for_category(
+            self.category,
+            self.day,
+            self.day + timedelta(days=days - 1),
+            limit=limit,
+            latitude=self.origin[0],
+            longitude=self.origin[1],
+            radius_km=radius_km,
+        )
+
+    def get(self, **params):
+        request = APIRequestFactory().get(
+            "/", {"start_date": self.day, "end_date": self.day, **params}
+        )
+        return views.get_earliest_category_slots(request, category_id=self.category.id)
+
+    def test_only_providers_within_the_radius_are_considered(self):
+        near = self.located(1)
+        # Inside the 10 km bounding box but about 10.6 km away
+        self.located(7.5, 7.5)
+        self.located(15)
+
+        slots = self.earliest(limit=50)
+
+        self.assertEqual(len(slots), 7)
+        self.assertEqual({slot["provider_id"] for slot in slots}, {near.id})
+        self.assertAlmostEqual(slots[0]["distance_km"], 1, places=2)
+
+    def test_slots_are_merged_by_start_then_distance(self):
+        one_km, three_km = self.located(1), self.located(0, 3)
+        half_km = self.located(-0.5, start_hour=9)
+
+        slots = self.earliest(limit=5)
+
+        self.assertEqual(
+            [
+                (slot["start_time"].strftime("%H:%M"), slot["provider_id"])
+                for slot in slots
+            ],
+            [
+                ("08:00", one_km.id),
+                ("08:00", three_km.id),
+                ("08:30", one_km.id),
+                ("08:30", three_km.id),
+                ("09:00", half_km.id),
+            ],
+        )
+
+    def test_range_is_read_in_doubling_windows_until_limit_is_reached(self):
+        self.located(1)
+        original = AvailabilityController.get_availability_for_providers
+
+        def window_lengths(limit):
+            with mock.patch.object(
+                AvailabilityController,
+                "get_availability_for_providers",
+                side_effect=original,
+            ) as read_range:
+                self.earliest(limit, days=15)
+            return [
+                (call.args[2] - call.args[1]).days + 1
+                for call in read_range.call_args_list
+            ]
+
+        self.assertEqual(window_lengths(3), [1])
+        self.assertEqual(window_lengths(10), [1, 2])
+        self.assertEqual(window_lengths(200), [1, 2, 4, 8])
+
+    def test_non_positive_limit_or_radius_is_rejected(self):
+        for params in (
+            {"limit": 0},
+            {"limit": -5},
+            {"radius_km": 0},
+            {"radius_km": -1},
+            {"radius_km": "nan"},
+        ):
+            response = self.get(
+                latitude=self.origin[0], longitude=self.origin[1], **params
+            )
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_page_only_computes_the_slots_it_needs(self):
+        self.located(1)
+        self.located(0, 3)
+        everything = self.get(limit=50, page_size=50).data["results"]
+
+        original = SlotController.get_earliest_slots_for_category
+        with mock.patch.object(
+            SlotController,
+            "get_earliest_slots_for_category",
+            side_effect=original,
+        ) as find:
+            page = self.get(limit=50, page_size=2, page=2).data
+
+        self.assertEqual(find.call_args.kwargs["limit"], 5)
+        self.assertEqual(page["results"], everything[2:4])
+        self.assertIn("page=3", page["next"])
+        self.assertNotIn("page=", page["previous"])
+
+    def test_last_page_stops_at_the_limit(self):
+        self.located(1)
+
+        page = self.get(limit=5, page_size=2, page=3).data
+
+        self.assertEqual(len(page["results"]), 1)
+        self.assertIsNone(page["next"])
+        self.assertEqual(self.get(limit=5, page_size=2, page=4).status_code, 404)
+
+
+class MonthlyOverviewTests(TestCase):
+    """The one-pass monthly overview agrees with the per-day implementation"""
+
+    def seed(self, year, month, zone="Africa/Douala", capacity=1):
+        provider = create_profile("provider", timezone=zone, capacity=capacity)
+        client = create_profile()
+        service = create_service(provider)
+        add_working_hours(provider, 8, 18)
+        ProviderBreak.objects.create(
+            provider=provider, start_time=dt_time(12), end_time=dt_time(13)
+        )
+        ProviderAvailabilityException.objects.create(
+            provider=provider,
+            exception_date=date(year, month, 10),
+            exception_type="unavailable",
+        )
+        ProviderAvailabilityException.objects.create(
+            provider=provider,
+            exception_date=date(year, month, 20),
+            end_date=date(year, month, 21),
+            exception_type="modified_hours",
+            start_time=dt_time(9),
+            end_time=dt_time(11),
+        )
+
+        def booking(day, hour, minute=0, hours=1, status="confirmed"):
+            start = datetime.combine(day, dt_time(hour, minute), tzinfo=provider.tzinfo)
+            return Appointment(
+                client=client,
+                provider=provider,
+                service=service,
+                scheduled_for=start,
+                scheduled_until=start + timedelta(hours=hours),
+                amount=Decimal("5000.00"),
+                status=status,
+                exclusive=capacity == 1,
+            )
+
+        appointments = []
+        day = date(year, month, 1)
+        while day.month == month:
+            appointments += [
+                booking(day, 8 + index)
+                for index in range(day.day % 5)
+                for _ in range(capacity)
+            ]
+            # Just after local midnight, which is another day in UTC
+            if day.day % 4 == 0:
+                appointments.append(booking(day, 0, 30, hours=2, status="pending"))
+            if day.day % 7 == 0:
+                appointments.append(booking(day, 13, hours=5, status="cancelled"))
+            day += timedelta(days=1)
+        Appointment.objects.bulk_create(appointments)
+        return provider
+
+    def assert_matches_legacy(self, provider, year, month):
+        overview = CalendarController.get_monthly_availability_overview(
+            provider, year, month
+        )
+
+        self.assertEqual(
+            overview, legacy_monthly_availability_overview(provider, year, month)
+        )
+        self.assertGreater(len(set(overview.values())), 2)
+
+    def test_month_in_the_default_zone(self):
+        self.assert_matches_legacy(self.seed(2026, 11), 2026, 11)
+
+    def test_dst_month_in_another_zone(self):
+        provider = self.seed(2026, 10, zone="Europe/Paris")
+
+        self.assert_matches_legacy(provider, 2026, 10)
+
+    def test_shared_capacity(self):
+        provider = self.seed(2027, 3, zone="America/New_York", capacity=3)
+
+        self.assert_matches_legacy(provider, 2027, 3)
+
+
+class WorkingWindowTests(TestCase):
+    def setUp(self):
+        self.provider = create_profile("provider")
+        self.day = date(2026, 11, 4)
+
+    def hours(self, *pairs):
+        return [(dt_time(start), dt_time(end)) for start, end in pairs]
+
+    def request(self, method, view, data=None, user=None, **kwargs):
+        request = getattr(APIRequestFactory(), method)("/", data, format="json")
+        force_authenticate(request, user=(user or self.provider).user)
+        return view(request, **kwargs)
+
+    def windows_on(self, day):
+        availability = AvailabilityController.get_provider_availability_for_date(
+            self.provider, day
+        )
+        return availability.get("windows"), availability.get("reason")
+
+    def test_check_windows(self):
+        AvailabilityController._check_windows(self.hours((8, 12), (12, 14)))
+
+        for windows in (self.hours((9, 9)), self.hours((10, 9))):
+            with self.assertRaisesMessage(ValueError, "before end_time"):
+                AvailabilityController._check_windows(windows)
+        with self.assertRaisesMessage(ValueError, "must not overlap"):
+            AvailabilityController._check_windows(self.hours((8, 12), (11, 14)))
+
+    def test_set_day_windows_writes_only_the_difference(self):
+        _, created = AvailabilityController.set_day_windows(
+            self.provider, 2, self.hours((14, 18), (8, 12))
+        )
+        kept = ProviderAvailability.objects.get(start_time=dt_time(8))
+
+        windows, created_again = AvailabilityController.set_day_windows(
+            self.provider, 2, self.hours((8, 12), (13, 17))
+        )
+
+        self.assertTrue(created)
+        self.assertTrue(created_again)
+        self.assertEqual(
+            [(window.start_time, window.end_time) for window in windows],
+            self.hours((8, 12), (13, 17)),
+        )
+        self.assertEqual(windows[0].pk, kept.pk)
+        self.assertEqual(
+            ProviderAvailability.objects.filter(provider=self.provider).count(), 2
+        )
+        self.assertFalse(
+            AvailabilityController.set_day_windows(
+                self.provider, 2, self.hours((8, 12), (13, 17))
+            )[1]
+        )
+
+    def test_set_day_windows_rejects_overlaps_without_writing(self):
+        AvailabilityController.set_day_windows(self.provider, 2, self.hours((8, 12)))
+
+        with self.assertRaises(ValueError):
+            AvailabilityController.set_day_windows(
+                self.provider, 2, self.hours((8, 12), (10, 14))
+            )
+
+        self.assertEqual(
+            list(ProviderAvailability.objects.values_list("start_time", "end_time")),
+            self.hours((8, 12)),
+        )
+
+    def test_breaks_are_cut_out_of_the_windows_they_overlap(self):
+        add_working_hours(self.provider, 8, 12)
+        ProviderBreak.objects.create(
+            provider=self.provider, start_time=dt_time(10), end_time=dt_time(13)
+        )
+        # Outside every window: no effect
+        ProviderBreak.objects.create(
+            provider=self.provider, start_time=dt_time(18), end_time=dt_time(19)
+        )
+        # Only on this weekday, and covers what is left of it
+        ProviderBreak.objects.create(
+            provider=self.provider,
+            day_of_week=self.day.weekday(),
+            start_time=dt_time(7),
+            end_time=dt_time(10),
+        )
+
+        self.assertEqual(
+            self.windows_on(self.day + timedelta(days=1)),
+            (self.hours((8, 10)), None),
+        )
+        self.assertEqual(
+            self.windows_on(self.day), (None, "No working time outside breaks")
+        )
+
+    def test_windows_endpoint_validates_windows(self):
+        def post(windows):
+            return self.request(
+                "post",
+                views.manage_provider_availability,
+                {
+                    "day_of_week": 2,
+                    "windows": [
+                        {"start_time": start, "end_time": end} for start, end in windows
+                    ],
+                },
+            )
+
+        self.assertEqual(
+            post([("08:00", "12:00"), ("11:00", "14:00")]).status_code, 400
+        )
+        self.assertEqual(post([("12:00", "08:00")]).status_code, 400)
+        self.assertEqual(post([]).status_code, 400)
+        self.assertFalse(ProviderAvailability.objects.exists())
+
+        self.assertEqual(
+            post([("08:00", "12:00"), ("12:00", "14:00")]).status_code, 201
+        )
+        self.assertEqual(
+            post([("08:00", "12:00"), ("12:00", "14:00")]).status_code, 200
+        )
+
+    def test_break_endpoints(self):
+        response = self.request(
+            "post",
+            views.manage_provider_breaks,
+            {"start_time": "12:00", "end_time": "13:00", "day_of_week": 5},
+        )
+        self.assertEqual(response.status_code, 201)
+        break_id = response.data["id"]
+
+        for data in (
+            {"start_time": "13:00", "end_time": "12:00"},
+            {"start_time": "12:00", "end_time": "12:00"},
+            {"start_time": "12:00", "end_time": "13:00", "day_of_week": 7},
+        ):
+            response = self.request("post", views.manage_provider_breaks, data)
+            self.assertEqual(response.status_code, 400, data)
+        self.assertEqual(len(self.request("get", views.manage_provider_breaks).data), 1)
+
+        client = create_profile()
+        self.assertEqual(
+            self.request("get", views.manage_provider_breaks, user=client).status_code,
+            403,
+        )
+        other = create_profile("provider")
+        self.assertEqual(
+            self.request(
+                "delete", views.delete_provider_break, user=other, break_id=break_id
+            ).status_code,
+            404,
+        )
+        self.assertEqual(
+            self.request(
+                "delete", views.delete_provider_break, break_id=break_id
+            ).status_code,
+            204,
+        )
+        self.assertFalse(ProviderBreak.objects.exists())
@@ -2,8 +2,11 @@ from modeltranslation.translator import register, TranslationOptions
 from .models import (
     ProviderAvailability,
     ProviderAvailabilityException,
+    ProviderBreak,
     AppointmentSlot,
+    AppointmentSeries,
     Appointment,
+    WaitlistEntry,
 )
 
 
@@ -12,6 +15,11 @@ class ProviderAvailabilityTranslationOptions(TranslationOptions):
     fields = ()
 
 
+@register(ProviderBreak)
+class ProviderBreakTranslationOptions(TranslationOptions):
+    fields = ()
+
+
 @register(ProviderAvailabilityException)
 class ProviderAvailabilityExceptionTranslationOptions(TranslationOptions):
     fields = ("reason",)  # Only free-text field
@@ -22,6 +30,16 @@ class AppointmentSlotTranslationOptions(TranslationOptions):
     fields = ()
 
 
+@register(AppointmentSeries)
+class AppointmentSeriesTranslationOptions(TranslationOptions):
+    fields = ()
+
+
 @register(Appointment)
 class AppointmentTranslationOptions(TranslationOptions):
     fields = ()
+
+
+@register(WaitlistEntry)
+class WaitlistEntryTranslationOptions(TranslationOptions):
+    fields = ()
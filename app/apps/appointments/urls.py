@@ -19,13 +19,56 @@ urlpatterns = [
         views.manage_availability_exceptions,
         name="manage-availability-exceptions",
     ),
+    path(
+        "availability/schedule/",
+        views.manage_weekly_schedule,
+        name="manage-weekly-schedule",
+    ),
+    path(
+        "availability/breaks/",
+        views.manage_provider_breaks,
+        name="manage-availability-breaks",
+    ),
+    path(
+        "availability/breaks/<uuid:break_id>/",
+        views.delete_provider_break,
+        name="delete-availability-break",
+    ),
     # Slots and Appointments
     path(
         "services/<uuid:service_id>/slots/",
         views.get_available_slots,
         name="get-available-slots",
     ),
+    path(
+        "providers/<uuid:provider_id>/chain-slots/",
+        views.get_chain_slots,
+        name="get-chain-slots",
+    ),
+    path(
+        "categories/<uuid:category_id>/earliest-slots/",
+        views.get_earliest_category_slots,
+        name="earliest-category-slots",
+    ),
+    path(
+        "services/<uuid:service_id>/holds/",
+        views.create_slot_hold,
+        name="create-slot-hold",
+    ),
+    path(
+        "holds/<str:hold_token>/",
+        views.release_slot_hold,
+        name="release-slot-hold",
+    ),
+    path("waitlist/", views.manage_waitlist, name="manage-waitlist"),
+    path(
+        "waitlist/<uuid:entry_id>/",
+        views.leave_waitlist,
+        name="leave-waitlist",
+    ),
     path("", views.create_appointment, name="create-appointment"),
+    path("chain/", views.create_appointment_chain, name="create-appointment-chain"),
+    path("series/", views.create_appointment_series, name="create-appointment-series"),
     path("my/", views.get_my_appointments, name="my-appointments"),
     path(
         "<uuid:appointment_id>/",
@@ -58,4 +101,10 @@ urlpatterns = [
         views.get_day_availability_details,
         name="day-availability-details",
     ),
+    # Monitoring
+    path(
+        "schedule-cache/stats/",
+        views.get_schedule_cache_stats,
+        name="schedule-cache-stats",
+    ),
 ]
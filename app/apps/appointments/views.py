@@ -1,33 +1,64 @@
 # apps/appointments/views.py
+import json
 import logging
-from datetime import datetime, date
+import uuid
+from datetime import datetime, date, timedelta
+from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.translation import get_language
 from rest_framework import status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 from .models import ProviderAvailability, ProviderAvailabilityException, Appointment
 from .serializers import (
     ProviderAvailabilitySerializer,
     ProviderAvailabilityExceptionSerializer,
+    ProviderBreakSerializer,
+    ProviderDayWindowsSerializer,
+    WeeklyScheduleSerializer,
     AppointmentCreateSerializer,
     AppointmentSerializer,
+    AppointmentChainCreateSerializer,
+    AppointmentSeriesCreateSerializer,
+    AppointmentSeriesSerializer,
     CalendarAvailabilitySerializer,
+    SlotHoldCreateSerializer,
+    WaitlistEntrySerializer,
 )
+from .cache import schedule_cache
 from .controllers import (
     AvailabilityController,
     SlotController,
     AppointmentController,
     CalendarController,
     PaymentController,
+    WaitlistController,
 )
-from apps.services.models import Service
+from .holds import SlotHoldStore
+from .renderers import NDJSONRenderer
+from .intervals import BusySweep
+from apps.core.timezones import get_zone
+from apps.services.models import Service, ServiceCategory
 from apps.users.models import Profile
 
 logger = logging.getLogger(__name__)
 
 
+def _requested_timezone(request, default=None):
+    """The zone named by the timezone query parameter; ValueError if unknown"""
+    name = request.GET.get("timezone")
+    return get_zone(name) if name else default
+
+
 # Provider Availability Views
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
@@ -48,6 +79,35 @@ def manage_provider_availability(request):
         serializer = ProviderAvailabilitySerializer(availability, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    elif request.method == "POST" and "windows" in request.data:
+        # Split shifts: replace all windows of the day at once
+        serializer = ProviderDayWindowsSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                availabilities, created = AvailabilityController.set_day_windows(
+                    provider=provider,
+                    day_of_week=serializer.validated_data["day_of_week"],
+                    windows=[
+                        (window["start_time"], window["end_time"])
+                        for window in serializer.validated_data["windows"]
+                    ],
+                )
+                response_serializer = ProviderAvailabilitySerializer(
+                    availabilities, many=True
+                )
+                return Response(
+                    response_serializer.data,
+                    status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+                )
+            except Exception as e:
+                logger.error(f"Error setting availability: {str(e)}")
+                return Response(
+                    {"error": "Failed to set availability"},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
     elif request.method == "POST":
         serializer = ProviderAvailabilitySerializer(data=request.data)
         if serializer.is_valid():
@@ -104,6 +164,178 @@ def delete_provider_availability(request, availability_id):
         )
 
 
+@api_view(["GET", "PUT"])
+@permission_classes([IsAuthenticated])
+def manage_weekly_schedule(request):
+    """
+    Get or replace the whole weekly schedule (windows, breaks, upcoming
+    exceptions) in one request, optionally for several staff profiles
+    """
+    if request.user.role != "provider":
+        return Response(
+            {"error": "Only providers can manage availability"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    provider = request.user.profile
+
+    if request.method == "GET":
+        days = {}
+        for availability in AvailabilityController.get_provider_availability(provider):
+            days.setdefault(availability.day_of_week, []).append(
+                {
+                    "start_time": availability.start_time,
+                    "end_time": availability.end_time,
+                }
+            )
+        exceptions = AvailabilityController.get_availability_exceptions(
+            provider, start_date=timezone.localdate()
+        )
+        return Response(
+            {
+                "days": [
+                    {"day_of_week": day, "windows": windows}
+                    for day, windows in sorted(days.items())
+                ],
+                "breaks": ProviderBreakSerializer(
+                    AvailabilityController.get_provider_breaks(provider), many=True
+                ).data,
+                "exceptions": ProviderAvailabilityExceptionSerializer(
+                    exceptions, many=True
+                ).data,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+    serializer = WeeklyScheduleSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    provider_ids = [provider.pk]
+    if "staff_ids" in data:
+        # The owner may include their own profile alongside their staff
+        staff_ids = set(data["staff_ids"])
+        provider_ids = list(
+            Profile.objects.filter(
+                Q(business_account=provider) | Q(pk=provider.pk),
+                id__in=staff_ids,
+            ).values_list("pk", flat=True)
+        )
+        if len(provider_ids) != len(staff_ids):
+            return Response(
+                {"error": "staff_ids must be staff profiles of your business"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+    breaks = None
+    if "breaks" in data:
+        breaks = [
+            (
+                provider_break.get("day_of_week"),
+                provider_break["start_time"],
+                provider_break["end_time"],
+            )
+            for provider_break in data["breaks"]
+        ]
+
+    try:
+        stats = AvailabilityController.replace_weekly_schedules(
+            provider_ids,
+            windows={
+                day["day_of_week"]: [
+                    (window["start_time"], window["end_time"])
+                    for window in day["windows"]
+                ]
+                for day in data["days"]
+            },
+            breaks=breaks,
+            exceptions=data.get("exceptions"),
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error replacing weekly schedule: {str(e)}")
+        return Response(
+            {"error": "Failed to update schedule"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    return Response(
+        {"providers": len(provider_ids), **stats}, status=status.HTTP_200_OK
+    )
+
+
+@api_view(["GET", "POST"])
+@permission_classes([IsAuthenticated])
+def manage_provider_breaks(request):
+    """
+    Get or add recurring breaks (e.g. lunch) cut out of working windows
+    """
+    if request.user.role != "provider":
+        return Response(
+            {"error": "Only providers can manage availability"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    provider = request.user.profile
+
+    if request.method == "GET":
+        breaks = AvailabilityController.get_provider_breaks(provider)
+        serializer = ProviderBreakSerializer(breaks, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    elif request.method == "POST":
+        serializer = ProviderBreakSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                provider_break = AvailabilityController.add_provider_break(
+                    provider=provider,
+                    day_of_week=serializer.validated_data.get("day_of_week"),
+                    start_time=serializer.validated_data["start_time"],
+                    end_time=serializer.validated_data["end_time"],
+                )
+                response_serializer = ProviderBreakSerializer(provider_break)
+                return Response(
+                    response_serializer.data, status=status.HTTP_201_CREATED
+                )
+            except Exception as e:
+                logger.error(f"Error creating break: {str(e)}")
+                return Response(
+                    {"error": "Failed to create break"},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(["DELETE"])
+@permission_classes([IsAuthenticated])
+def delete_provider_break(request, break_id):
+    """
+    Delete a specific break
+    """
+    if request.user.role != "provider":
+        return Response(
+            {"error": "Only providers can manage availability"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    provider = request.user.profile
+    success = AvailabilityController.delete_provider_break(provider, break_id)
+
+    if success:
+        return Response(
+            {"message": "Break deleted successfully"},
+            status=status.HTTP_204_NO_CONTENT,
+        )
+    else:
+        return Response(
+            {"error": "Break not found"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
 def manage_availability_exceptions(request):
@@ -142,6 +374,8 @@ def manage_availability_exceptions(request):
                 exception = AvailabilityController.add_availability_exception(
                     provider=provider,
                     exception_date=serializer.validated_data["exception_date"],
+                    end_date=serializer.validated_data.get("end_date"),
+                    recurrence=serializer.validated_data.get("recurrence", ""),
                     exception_type=serializer.validated_data["exception_type"],
                     start_time=serializer.validated_data.get("start_time"),
                     end_time=serializer.validated_data.get("end_time"),
@@ -164,6 +398,7 @@ def manage_availability_exceptions(request):
 # Slot and Appointment Views
 @api_view(["GET"])
 @permission_classes([AllowAny])
+@renderer_classes([JSONRenderer, NDJSONRenderer])
 def get_available_slots(request, service_id):
     """
     Get available time slots for a service
@@ -197,22 +432,73 @@ def get_available_slots(request, service_id):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    if (end_date - start_date).days > 30:  # Limit to 30 days
+    # Slot times are shown in the client's zone when given, else the provider's
+    try:
+        display_tz = _requested_timezone(request, service.provider.tzinfo)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Streaming keeps memory flat, so it allows much longer ranges
+    stream = request.GET.get("stream", "").lower() == "true" or (
+        "application/x-ndjson" in request.headers.get("Accept", "")
+    )
+    max_days = 90 if stream else 30
+    if (end_date - start_date).days > max_days:
         return Response(
-            {"error": "Date range cannot exceed 30 days"},
+            {"error": f"Date range cannot exceed {max_days} days"},
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    try:
-        available_slots = SlotController.generate_available_slots(
+    client_id = request.user.profile.pk if request.user.is_authenticated else None
+
+    if stream:
+        slots = SlotController.iter_available_slots(
             provider=service.provider,
             service=service,
             start_date=start_date,
             end_date=end_date,
             buffer_minutes=buffer_minutes,
+            busy_intervals=SlotHoldStore.get_held_intervals(
+                service.provider_id, exclude_client_id=client_id
+            ),
+        )
+        return StreamingHttpResponse(
+            (
+                json.dumps(slot, cls=JSONEncoder) + "\n"
+                for slot in SlotController.in_timezone(slots, display_tz)
+            ),
+            content_type="application/x-ndjson",
+        )
+
+    try:
+        available_slots = schedule_cache.get_or_set(
+            service.provider_id,
+            ("slots", service.id, start_date, end_date, buffer_minutes, get_language()),
+            lambda: SlotController.get_available_slots(
+                provider=service.provider,
+                service=service,
+                start_date=start_date,
+                end_date=end_date,
+                buffer_minutes=buffer_minutes,
+            ),
+        )
+
+        # The cached listing may predate slots that have started since
+        now = timezone.now()
+        available_slots = [slot for slot in available_slots if slot["start_time"] > now]
+
+        # Holds live outside the schedule version, so they are applied per request
+        available_slots = SlotHoldStore.exclude_held_slots(
+            service.provider_id,
+            available_slots,
+            client_id=client_id,
+            capacity=service.provider.capacity,
         )
 
-        return Response(available_slots, status=status.HTTP_200_OK)
+        return Response(
+            list(SlotController.in_timezone(available_slots, display_tz)),
+            status=status.HTTP_200_OK,
+        )
 
     except Exception as e:
         logger.error(f"Error generating available slots: {str(e)}")
@@ -222,6 +508,247 @@ def get_available_slots(request, service_id):
         )
 
 
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def get_chain_slots(request, provider_id):
+    """
+    Get start times at which several services of a provider fit back to back
+    """
+    provider = get_object_or_404(Profile, id=provider_id)
+
+    try:
+        service_ids = [
+            uuid.UUID(service_id)
+            for service_id in request.GET.get("service_ids", "").split(",")
+            if service_id
+        ]
+    except ValueError:
+        return Response(
+            {"error": "service_ids must be comma-separated service ids"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        start_date = datetime.strptime(request.GET["start_date"], "%Y-%m-%d").date()
+        end_date = datetime.strptime(request.GET["end_date"], "%Y-%m-%d").date()
+    except KeyError:
+        return Response(
+            {"error": "start_date and end_date parameters are required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    except ValueError:
+        return Response(
+            {"error": "Invalid date format. Use YYYY-MM-DD"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if start_date > end_date:
+        return Response(
+            {"error": "start_date must be before or equal to end_date"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if (end_date - start_date).days > 30:
+        return Response(
+            {"error": "Date range cannot exceed 30 days"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        services = SlotController.load_chain_services(service_ids)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if services[0].provider_id != provider.pk:
+        return Response(
+            {"error": "Services do not belong to this provider"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    client_id = request.user.profile.pk if request.user.is_authenticated else None
+
+    try:
+        chain_slots = SlotController.get_chain_slots(
+            provider,
+            services,
+            start_date,
+            end_date,
+            busy_intervals=SlotHoldStore.get_held_intervals(
+                provider.pk, exclude_client_id=client_id
+            ),
+        )
+        return Response(chain_slots, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.error(f"Error generating chain slots: {str(e)}")
+        return Response(
+            {"error": "Failed to generate available slots"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+class EarliestSlotsPagination(PageNumberPagination):
+    """
+    Page numbers over the earliest slots without computing all of them:
+    page n only needs the first n * page_size slots, plus one to tell
+    whether another page follows, so no total count is reported
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+
+    def slots_needed(self, request, limit):
+        """How many of the earliest slots the requested page needs"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            self.page_number = 0
+        if self.page_number < 1:
+            raise NotFound(self.invalid_page_message.format(page_number=1))
+        return min(limit, self.page_number * self.page_size + 1)
+
+    def paginate_slots(self, slots):
+        """The requested page of slots, fetched with slots_needed()"""
+        end = self.page_number * self.page_size
+        self.has_next = len(slots) > end
+        page = slots[end - self.page_size : end]
+        if not page and self.page_number > 1:
+            raise NotFound(
+                self.invalid_page_message.format(
+                    page_number=self.page_number,
+                    message="That page contains no results",
+                )
+            )
+        return page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.page_query_param,
+            self.page_number + 1,
+        )
+
+    def get_previous_link(self):
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def get_earliest_category_slots(request, category_id):
+    """
+    Get the earliest available slots across all providers of a service category
+    """
+    category = get_object_or_404(ServiceCategory, id=category_id, is_active=True)
+
+    try:
+        start_date = (
+            datetime.strptime(request.GET["start_date"], "%Y-%m-%d").date()
+            if request.GET.get("start_date")
+            else timezone.localdate()
+        )
+        end_date = (
+            datetime.strptime(request.GET["end_date"], "%Y-%m-%d").date()
+            if request.GET.get("end_date")
+            else start_date + timedelta(days=6)
+        )
+    except ValueError:
+        return Response(
+            {"error": "Invalid date format. Use YYYY-MM-DD"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if start_date > end_date:
+        return Response(
+            {"error": "start_date must be before or equal to end_date"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if (end_date - start_date).days > 14:  # Limit to 14 days
+        return Response(
+            {"error": "Date range cannot exceed 14 days"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    latitude = request.GET.get("latitude")
+    longitude = request.GET.get("longitude")
+    if bool(latitude) != bool(longitude):
+        return Response(
+            {"error": "latitude and longitude must be provided together"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        display_tz = _requested_timezone(request)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        limit = min(int(request.GET.get("limit", 50)), 200)
+        radius_km = min(float(request.GET.get("radius_km", 10)), 100)
+        if latitude:
+            latitude, longitude = float(latitude), float(longitude)
+        else:
+            latitude = longitude = None
+    except ValueError:
+        return Response(
+            {"error": "limit, radius_km, latitude and longitude must be numbers"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # Written as "not > 0" so that a NaN radius is refused too
+    if limit < 1 or not radius_km > 0:
+        return Response(
+            {"error": "limit and radius_km must be positive"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # Only as many slots as the requested page needs are looked for
+    paginator = EarliestSlotsPagination()
+    needed = paginator.slots_needed(request, limit)
+
+    try:
+        slots = SlotController.get_earliest_slots_for_category(
+            category,
+            start_date,
+            end_date,
+            limit=needed,
+            latitude=latitude,
+            longitude=longitude,
+            radius_km=radius_km,
+            client_id=(
+                request.user.profile.pk if request.user.is_authenticated else None
+            ),
+        )
+    except Exception as e:
+        logger.error(f"Error finding earliest slots: {str(e)}")
+        return Response(
+            {"error": "Failed to find available slots"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    page = paginator.paginate_slots(slots)
+    if display_tz is not None:
+        page = list(SlotController.in_timezone(page, display_tz))
+    return paginator.get_paginated_response(page)
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def create_appointment(request):
@@ -244,6 +771,7 @@ def create_appointment(request):
                 scheduled_until=serializer.validated_data["scheduled_until"],
                 amount=serializer.validated_data["amount"],
                 currency=serializer.validated_data.get("currency", "XAF"),
+                hold_token=serializer.validated_data.get("hold_token"),
             )
 
             response_serializer = AppointmentSerializer(appointment)
@@ -261,6 +789,236 @@ def create_appointment(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def create_appointment_chain(request):
+    """
+    Book several services of one provider back to back (payment pending)
+    """
+    if request.user.role != "client":
+        return Response(
+            {"error": "Only clients can create appointments"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    serializer = AppointmentChainCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        appointments = AppointmentController.create_appointment_chain(
+            client=request.user.profile,
+            services=serializer.validated_data["services"],
+            scheduled_for=serializer.validated_data["scheduled_for"],
+            currency=serializer.validated_data["currency"],
+            hold_token=serializer.validated_data.get("hold_token"),
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error creating appointment chain: {str(e)}")
+        return Response(
+            {"error": "Failed to create appointments"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    response_serializer = AppointmentSerializer(appointments, many=True)
+    return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def create_appointment_series(request):
+    """
+    Book a recurring appointment (same time every week or every few weeks)
+    in one request
+    """
+    if request.user.role != "client":
+        return Response(
+            {"error": "Only clients can create appointments"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    serializer = AppointmentSeriesCreateSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    try:
+        series, occurrences = AppointmentController.create_appointment_series(
+            client=request.user.profile,
+            service=data["service"],
+            scheduled_for=data["scheduled_for"],
+            scheduled_until=data["scheduled_until"],
+            occurrences=data["occurrences"],
+            amount=data["amount"],
+            currency=data["currency"],
+            interval_weeks=data["interval_weeks"],
+            skip_conflicts=data["skip_conflicts"],
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.error(f"Error creating appointment series: {str(e)}")
+        return Response(
+            {"error": "Failed to create appointment series"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    if series is None:
+        return Response(
+            {
+                "error": "Some occurrences conflict with existing bookings",
+                "occurrences": occurrences,
+            },
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    return Response(
+        {
+            "series": AppointmentSeriesSerializer(series).data,
+            "occurrences": occurrences,
+        },
+        status=status.HTTP_201_CREATED,
+    )
+
+
+@api_view(["GET", "POST"])
+@permission_classes([IsAuthenticated])
+def manage_waitlist(request):
+    """
+    List the client's waitlist entries or join the waitlist for a service
+    """
+    if request.user.role != "client":
+        return Response(
+            {"error": "Only clients can join waitlists"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    client = request.user.profile
+
+    if request.method == "GET":
+        entries = WaitlistController.get_client_waitlist(
+            client, request.GET.get("status")
+        )
+        serializer = WaitlistEntrySerializer(entries, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    serializer = WaitlistEntrySerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        entry = WaitlistController.join_waitlist(
+            client=client,
+            service=serializer.validated_data["service"],
+            window_start=serializer.validated_data["window_start"],
+            window_end=serializer.validated_data["window_end"],
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(WaitlistEntrySerializer(entry).data, status=status.HTTP_201_CREATED)
+
+
+@api_view(["DELETE"])
+@permission_classes([IsAuthenticated])
+def leave_waitlist(request, entry_id):
+    """
+    Stop waiting for a slot
+    """
+    if request.user.role != "client":
+        return Response(
+            {"error": "Only clients can join waitlists"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    if WaitlistController.leave_waitlist(request.user.profile, entry_id):
+        return Response(
+            {"message": "Waitlist entry cancelled"},
+            status=status.HTTP_204_NO_CONTENT,
+        )
+    return Response(
+        {"error": "Active waitlist entry not found"},
+        status=status.HTTP_404_NOT_FOUND,
+    )
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def create_slot_hold(request, service_id):
+    """
+    Hold a slot for the client while they go through checkout
+    """
+    if request.user.role != "client":
+        return Response(
+            {"error": "Only clients can hold slots"},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    service = get_object_or_404(Service, id=service_id, is_active=True)
+    serializer = SlotHoldCreateSerializer(
+        data=request.data, context={"service": service}
+    )
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    scheduled_for = serializer.validated_data["scheduled_for"]
+    scheduled_until = serializer.validated_data["scheduled_until"]
+
+    # Other holds are arbitrated by SlotHoldStore.place; only bookings are checked here
+    if not BusySweep(
+        SlotController.get_busy_intervals(
+            service.provider, scheduled_for, scheduled_until
+        ),
+        service.provider.capacity,
+    ).is_free(scheduled_for, scheduled_until):
+        return Response(
+            {"error": "Selected time slot is no longer available"},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    try:
+        hold = SlotHoldStore.place(
+            service.provider_id,
+            request.user.profile.pk,
+            scheduled_for,
+            scheduled_until,
+            serializer.validated_data.get("hold_minutes"),
+            capacity=service.provider.capacity,
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
+
+    return Response(
+        {
+            "hold_token": hold["token"],
+            "service_id": service.id,
+            "scheduled_for": hold["scheduled_for"],
+            "scheduled_until": hold["scheduled_until"],
+            "expires_at": hold["expires_at"],
+        },
+        status=status.HTTP_201_CREATED,
+    )
+
+
+@api_view(["DELETE"])
+@permission_classes([IsAuthenticated])
+def release_slot_hold(request, hold_token):
+    """
+    Release a slot hold before it expires
+    """
+    hold = SlotHoldStore.get(hold_token)
+    if hold is None or hold["client_id"] != str(request.user.profile.pk):
+        return Response(
+            {"error": "Slot hold not found or expired"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    SlotHoldStore.release(hold_token)
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def confirm_appointment_payment(request, appointment_id):
@@ -271,7 +1029,7 @@ def confirm_appointment_payment(request, appointment_id):
         Appointment, id=appointment_id, client=request.user.profile
     )
 
-    if appointment.status != "pending":
+    if appointment.status != "pending" or appointment.payment_status != "pending":
         return Response(
             {"error": "Appointment is not in pending state"},
             status=status.HTTP_400_BAD_REQUEST,
@@ -284,11 +1042,23 @@ def confirm_appointment_payment(request, appointment_id):
         )
 
         if payment_result["success"]:
-            confirmed_appointment = AppointmentController.confirm_appointment(
-                appointment_id
-            )
-            appointment.payment_status = "held_in_escrow"
-            appointment.save()
+            try:
+                confirmed_appointment = AppointmentController.confirm_appointment(
+                    appointment_id
+                )
+            except ValueError as e:
+                # Expired (and possibly rebooked) while the client was paying
+                PaymentController.refund_escrow_to_client(appointment_id)
+                logger.warning(
+                    f"Refunded payment for appointment {appointment_id}: {str(e)}"
+                )
+                return Response(
+                    {
+                        "error": "Appointment is no longer pending; "
+                        "the payment has been refunded"
+                    },
+                    status=status.HTTP_409_CONFLICT,
+                )
 
             response_serializer = AppointmentSerializer(confirmed_appointment)
             return Response(response_serializer.data, status=status.HTTP_200_OK)
@@ -413,8 +1183,12 @@ def get_monthly_calendar(request, provider_id, year, month):
     provider = get_object_or_404(Profile, id=provider_id)
 
     try:
-        monthly_overview = CalendarController.get_monthly_availability_overview(
-            provider, year, month
+        monthly_overview = schedule_cache.get_or_set(
+            provider.pk,
+            ("calendar", year, month, get_language()),
+            lambda: CalendarController.get_monthly_availability_overview(
+                provider, year, month
+            ),
         )
 
         # Convert to list for serialization
@@ -448,8 +1222,12 @@ def get_day_availability_details(request, provider_id, year, month, day):
 
     try:
         target_date = date(year, month, day)
-        day_details = CalendarController.get_day_availability_details(
-            provider, target_date
+        day_details = schedule_cache.get_or_set(
+            provider.pk,
+            ("day", target_date, get_language()),
+            lambda: CalendarController.get_day_availability_details(
+                provider, target_date
+            ),
         )
 
         return Response(day_details, status=status.HTTP_200_OK)
@@ -512,3 +1290,13 @@ def get_appointment_detail(request, appointment_id):
 
     serializer = AppointmentSerializer(appointment)
     return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+# Monitoring
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def get_schedule_cache_stats(request):
+    """
+    Get hit/miss counters of the slot and calendar response cache
+    """
+    return Response(schedule_cache.stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,141 @@
+# apps/appointments/waitlist.py
+from datetime import datetime
+from typing import List, Tuple
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.formats import date_format
+
+from apps.notifications.models import Notification
+from mubaku.services.translation_service import auto_translate_instance
+from .intervals import merge_intervals
+from .models import WaitlistEntry
+
+logger = logging.getLogger(__name__)
+
+
+class WaitlistMatcher:
+    """
+    Tells waiting clients when a provider's time is freed by a cancellation,
+    reschedule or expiry, so they do not have to poll the slot endpoint.
+
+    A freed interval matches an active entry when the overlap of the two
+    can hold the entry's service. Candidates come from one range query on
+    the partial (provider, window_start, window_end) index; notifications
+    are written with one bulk_create, oldest registration first, and the
+    matched entries are closed with one UPDATE.
+    """
+
+    @staticmethod
+    def notify_limit() -> int:
+        return settings.WAITLIST_NOTIFY_LIMIT
+
+    @staticmethod
+    def find_matches(
+        provider_id, freed_intervals: List[Tuple[datetime, datetime]]
+    ) -> List[WaitlistEntry]:
+        """
+        Active entries that fit in any freed interval, oldest first. The rows
+        are locked, so this must run inside a transaction.
+        """
+        now = timezone.now()
+        freed_intervals = [
+            (max(start, now), end)
+            for start, end in merge_intervals(freed_intervals)
+            if end > now
+        ]
+        if not freed_intervals:
+            return []
+
+        overlaps = Q()
+        for start, end in freed_intervals:
+            overlaps |= Q(window_start__lt=end, window_end__gt=start)
+
+        # Rows another worker is notifying right now are skipped
+        candidates = (
+            WaitlistEntry.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(overlaps, provider_id=provider_id, status="active")
+            .select_related("client__user", "service")
+            .order_by("created_at")
+        )
+
+        matches = []
+        for entry in candidates:
+            for start, end in freed_intervals:
+                overlap = min(end, entry.window_end) - max(start, entry.window_start)
+                if overlap >= entry.service.duration:
+                    entry.freed_start = max(start, entry.window_start)
+                    matches.append(entry)
+                    break
+            if len(matches) >= WaitlistMatcher.notify_limit():
+                break
+
+        return matches
+
+    @staticmethod
+    @transaction.atomic
+    def notify_freed_intervals(
+        provider_id, freed_intervals: List[Tuple[datetime, datetime]]
+    ) -> int:
+        """Notify matching entries of the freed time; returns how many"""
+        matches = WaitlistMatcher.find_matches(provider_id, freed_intervals)
+        if not matches:
+            return 0
+
+        # Registration order decides who hears first
+        notifications = [
+            WaitlistMatcher._build_notification(entry) for entry in matches
+        ]
+        WaitlistEntry.objects.filter(pkid__in=[entry.pkid for entry in matches]).update(
+            status="notified", notified_at=timezone.now()
+        )
+        Notification.objects.bulk_create(notifications)
+
+        # bulk_create skips the notification translation signal
+        transaction.on_commit(
+            lambda: [
+                auto_translate_instance(notification, ["title", "message"])
+                for notification in notifications
+            ]
+        )
+
+        logger.info(
+            f"Notified {len(matches)} waitlist entries for provider {provider_id}"
+        )
+        return len(matches)
+
+    @staticmethod
+    def _build_notification(entry: WaitlistEntry) -> Notification:
+        starts_at = date_format(
+            timezone.localtime(entry.freed_start), "DATETIME_FORMAT"
+        )
+        return Notification(
+            user=entry.client.user,
+            title="A slot just opened up",
+            message=(
+                f"{entry.service.name} is now available from {starts_at}; "
+                "book it before someone else does."
+            ),
+            notification_type="slot_available",
+            related_entity_type="waitlist_entry",
+            related_entity_id=entry.pkid,
+        )
+
+    @staticmethod
+    def notify_on_commit(
+        provider_id, freed_intervals: List[Tuple[datetime, datetime]]
+    ) -> None:
+        """Run notify_freed_intervals once the current transaction commits"""
+
+        def notify():
+            try:
+                WaitlistMatcher.notify_freed_intervals(provider_id, freed_intervals)
+            except Exception as e:
+                logger.error(
+                    f"Error notifying waitlist for provider {provider_id}: {str(e)}"
+                )
+
+        transaction.on_commit(notify)
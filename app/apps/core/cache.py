@@ -0,0 +1,79 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+
+
+class VersionedCache:
+    """
+    Cache whose entries are addressed through a per-scope version counter.
+
+    Bumping a scope's version makes all of its entries unreachable, so nothing
+    ever has to be deleted by hand; orphaned entries simply expire. Versions
+    start from a timestamp so a counter evicted from the backend cannot come
+    back at a value that old entries were stored under.
+    """
+
+    def __init__(self, namespace: str, timeout: int = 300):
+        self.namespace = namespace
+        self.timeout = timeout
+
+    def _version_key(self, scope) -> str:
+        return f"{self.namespace}:version:{scope}"
+
+    def _stats_key(self, name: str) -> str:
+        return f"{self.namespace}:stats:{name}"
+
+    def get_version(self, scope) -> int:
+        key = self._version_key(scope)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+        return version
+
+    def bump(self, scope) -> None:
+        key = self._version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+    def make_key(self, scope, *parts) -> str:
+        digest = hashlib.md5(repr(parts).encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{scope}:{self.get_version(scope)}:{digest}"
+
+    def get_or_set(self, scope, parts, compute):
+        """Return the cached value for parts, computing and storing it on a miss"""
+        key = self.make_key(scope, *parts)
+        value = cache.get(key)
+
+        if value is not None:
+            self._count("hits")
+            return value
+
+        self._count("misses")
+        value = compute()
+        cache.set(key, value, timeout=self.timeout)
+        return value
+
+    def _count(self, name: str) -> None:
+        key = self._stats_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            if not cache.add(key, 1, timeout=None):
+                cache.incr(key)
+
+    def stats(self) -> dict:
+        hits = cache.get(self._stats_key("hits")) or 0
+        misses = cache.get(self._stats_key("misses")) or 0
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+    def reset_stats(self) -> None:
+        cache.delete_many([self._stats_key("hits"), self._stats_key("misses")])
@@ -0,0 +1,130 @@
+import math
+from typing import List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two (latitude, longitude) points in km"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    delta_phi = phi2 - phi1
+    delta_lambda = math.radians(lon2 - lon1)
+
+    a = (
+        math.sin(delta_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def bounding_box(
+    latitude: float, longitude: float, radius_km: float
+) -> Tuple[float, float, float, float]:
+    """
+    (min_lat, max_lat, min_lon, max_lon) of a box containing the circle of
+    radius_km around the point. Cheap to filter on with the
+    (latitude, longitude) index; exact distances are checked afterwards.
+    """
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat < 1e-6:
+        delta_lon = 180.0
+    else:
+        delta_lon = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)), 180.0)
+
+    return (
+        max(latitude - delta_lat, -90.0),
+        min(latitude + delta_lat, 90.0),
+        longitude - delta_lon,
+        longitude + delta_lon,
+    )
+
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Cells of about 4 x 2 cm, so any coarser cell is a prefix of the stored hash
+GEOHASH_PRECISION = 12
+
+
+def geohash_encode(
+    latitude: float, longitude: float, precision: int = GEOHASH_PRECISION
+) -> str:
+    """
+    Geohash of a point: nearby points share prefixes, so a prefix is a
+    cell that can be looked up as a range of an ordinary index
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    value = bits = 0
+    even = True
+    while len(chars) < precision:
+        coordinate, bounds = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (bounds[0] + bounds[1]) / 2
+        if coordinate >= middle:
+            value = value * 2 + 1
+            bounds[0] = middle
+        else:
+            value *= 2
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            value = bits = 0
+    return "".join(chars)
+
+
+def _geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """(height, width) in degrees of the geohash cells of a precision"""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def _next_prefix(prefix: str) -> Optional[str]:
+    """The first geohash after every hash starting with prefix (None: none)"""
+    prefix = prefix.rstrip(GEOHASH_ALPHABET[-1])
+    if not prefix:
+        return None
+    return prefix[:-1] + GEOHASH_ALPHABET[GEOHASH_ALPHABET.index(prefix[-1]) + 1]
+
+
+def geohash_ranges(
+    min_lat: float, max_lat: float, min_lon: float, max_lon: float, max_cells: int = 16
+) -> List[Tuple[str, Optional[str]]]:
+    """
+    Sorted [start, end) ranges of geohashes covering a bounding_box, made
+    of the smallest cells that cover it with at most max_cells cells.
+    Adjacent cells are merged; end is None when a range runs to the last
+    geohash. Longitudes past +/-180 wrap around.
+    """
+    precision = 1
+    while precision < GEOHASH_PRECISION:
+        height, width = _geohash_cell_size(precision + 1)
+        rows = math.floor((max_lat + 90) / height) - math.floor((min_lat + 90) / height)
+        columns = math.floor(max_lon / width) - math.floor(min_lon / width)
+        if (rows + 1) * (columns + 1) > max_cells:
+            break
+        precision += 1
+
+    height, width = _geohash_cell_size(precision)
+    last_row = round(180 / height) - 1
+    first_column = math.floor((min_lon + 180) / width)
+    last_column = min(
+        math.floor((max_lon + 180) / width), first_column + round(360 / width) - 1
+    )
+    cells = set()
+    for row in range(
+        max(math.floor((min_lat + 90) / height), 0),
+        min(math.floor((max_lat + 90) / height), last_row) + 1,
+    ):
+        for column in range(first_column, last_column + 1):
+            longitude = (column + 0.5) * width % 360 - 180
+            cells.add(geohash_encode(-90 + (row + 0.5) * height, longitude, precision))
+
+    ranges = []
+    for cell in sorted(cells):
+        if ranges and ranges[-1][1] == cell:
+            ranges[-1] = (ranges[-1][0], _next_prefix(cell))
+        else:
+            ranges.append((cell, _next_prefix(cell)))
+    return ranges
@@ -0,0 +1,114 @@
+import base64
+import json
+from datetime import datetime
+from typing import Sequence
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps microseconds, which DjangoJSONEncoder rounds off datetimes"""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset (cursor) pagination.
+
+    Rows are ordered by ordering, whose last field must be unique (e.g.
+    pkid), and the cursor holds the ordering values of the last row sent.
+    The next page is fetched with a (a, b) > (x, y) filter and a LIMIT, so
+    every page costs one query however deep it is and however large the
+    table, with no COUNT and no OFFSET. Fields prefixed with "-" sort
+    descending. Ordering fields must not be null.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, ordering: Sequence[str] = ("pkid",)):
+        self.ordering = tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        def fetch(cursor, limit):
+            return list(self.after(queryset, cursor)[:limit])
+
+        return self.paginate_fetch(fetch, request)
+
+    def after(self, queryset, cursor):
+        """queryset sorted by ordering, from the row after cursor (if any)"""
+        queryset = queryset.order_by(*self.ordering)
+        return queryset if cursor is None else queryset.filter(self._after(cursor))
+
+    def paginate_fetch(self, fetch, request):
+        """
+        Paginate another source sorted by ordering (e.g. a search index):
+        fetch(cursor, limit) returns up to limit rows after cursor, or from
+        the start when cursor is None
+        """
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        rows = fetch(self.decode_cursor(request), self.page_size + 1)
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    def _after(self, cursor: Sequence) -> Q:
+        """Rows after cursor: (a > x) | (a = x & b > y) | ..., < if descending"""
+        condition = Q()
+        for index in reversed(range(len(self.ordering))):
+            field = self.ordering[index].lstrip("-")
+            lookup = "lt" if self.ordering[index].startswith("-") else "gt"
+            step = Q(**{f"{field}__{lookup}": cursor[index]})
+            if condition:
+                step |= Q(**{field: cursor[index]}) & condition
+            condition = step
+        return condition
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, ""))
+        except ValueError:
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(cursor, list) or len(cursor) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, row) -> str:
+        values = [getattr(row, field.lstrip("-")) for field in self.ordering]
+        return base64.urlsafe_b64encode(
+            json.dumps(values, cls=CursorEncoder).encode()
+        ).decode()
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
@@ -1,3 +1,57 @@
-from django.test import TestCase
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .geo import (
+    _next_prefix,
+    bounding_box,
+    geohash_encode,
+    geohash_ranges,
+    haversine_km,
+)
+
+
+def in_ranges(geohash, ranges):
+    return any(
+        start <= geohash and (end is None or geohash < end) for start, end in ranges
+    )
+
+
+class GeohashTests(SimpleTestCase):
+    def test_encode_known_point(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    def test_points_on_a_cell_edge_go_to_the_upper_cell(self):
+        self.assertEqual(geohash_encode(0.0, 0.0, 4), "s000")
+        self.assertEqual(geohash_encode(-1e-9, -1e-9, 4), "7zzz")
+
+    def test_next_prefix(self):
+        self.assertEqual(_next_prefix("u4pr"), "u4ps")
+        self.assertEqual(_next_prefix("u4pz"), "u4q")
+        self.assertIsNone(_next_prefix("zz"))
+
+    def test_ranges_cover_a_box_across_cell_edges(self):
+        # (0, 0) is a corner of the four top-level cells
+        box = bounding_box(0.0, 0.0, 2)
+        ranges = geohash_ranges(*box)
+
+        min_lat, max_lat, min_lon, max_lon = box
+        for latitude in (min_lat, 0.0, max_lat - 1e-9):
+            for longitude in (min_lon, 0.0, max_lon - 1e-9):
+                self.assertTrue(
+                    in_ranges(geohash_encode(latitude, longitude), ranges),
+                    (latitude, longitude),
+                )
+        self.assertFalse(in_ranges(geohash_encode(0.5, 0.5), ranges))
+        self.assertLessEqual(len(ranges), 16)
+
+    def test_ranges_wrap_around_the_antimeridian(self):
+        ranges = geohash_ranges(*bounding_box(0.0, 179.99, 5))
+
+        self.assertTrue(in_ranges(geohash_encode(0.0, 179.995), ranges))
+        self.assertTrue(in_ranges(geohash_encode(0.0, -179.995), ranges))
+        self.assertFalse(in_ranges(geohash_encode(0.0, 0.0), ranges))
+
+    def test_haversine(self):
+        paris, london = (48.8566, 2.3522), (51.5074, -0.1278)
+
+        self.assertAlmostEqual(haversine_km(*paris, *london), 343.5, delta=0.5)
+        self.assertEqual(haversine_km(*paris, *paris), 0)
@@ -0,0 +1,52 @@
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone, tzinfo
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MINUTE = timedelta(minutes=1)
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> tzinfo:
+    """The ZoneInfo for an IANA name (e.g. "Africa/Douala"), raising ValueError"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone: {name}")
+
+
+def validate_timezone(value: str) -> None:
+    try:
+        get_zone(value)
+    except ValueError:
+        raise ValidationError(
+            _("%(value)s is not a valid time zone"), params={"value": value}
+        )
+
+
+def to_epoch_minutes(value: datetime) -> int:
+    """Whole minutes since the Unix epoch, rounded down"""
+    return (value - EPOCH) // MINUTE
+
+
+def to_epoch_minutes_ceil(value: datetime) -> int:
+    """Whole minutes since the Unix epoch, rounded up"""
+    return -((EPOCH - value) // MINUTE)
+
+
+def from_epoch_minutes(minutes: int, tz: tzinfo) -> datetime:
+    """The aware datetime, in tz, of an epoch minute"""
+    return datetime.fromtimestamp(minutes * 60, tz)
+
+
+def wall_clock_minutes(target_date: date, target_time: time, tz: tzinfo) -> int:
+    """
+    Epoch minute of a wall-clock time on a given day in tz. An ambiguous
+    time (clocks going back) resolves to its first occurrence; a time
+    skipped by clocks going forward maps to the instant it would have had
+    before the change, i.e. one that reads later on the clock.
+    """
+    return to_epoch_minutes(datetime.combine(target_date, target_time, tzinfo=tz))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 01:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "notifications",
+            "0002_notification_message_en_notification_message_fr_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="notification",
+            name="notification_type",
+            field=models.CharField(
+                choices=[
+                    ("appointment_reminder", "Appointment Reminder"),
+                    ("payment_confirmation", "Payment Confirmation"),
+                    ("booking_confirmation", "Booking Confirmation"),
+                    ("review_request", "Review Request"),
+                    ("promotional", "Promotional"),
+                    ("slot_available", "Slot Available"),
+                ],
+                max_length=50,
+            ),
+        ),
+    ]
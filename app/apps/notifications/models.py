@@ -10,6 +10,7 @@ class Notification(TimeStampedUUIDModel):
         ("booking_confirmation", _("Booking Confirmation")),
         ("review_request", _("Review Request")),
         ("promotional", _("Promotional")),
+        ("slot_available", _("Slot Available")),
     )
 
     user = models.ForeignKey(
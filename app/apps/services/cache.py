@@ -0,0 +1,10 @@
+# apps/services/cache.py
+from django.conf import settings
+
+from apps.core.cache import VersionedCache
+
+# Public category listings. Any write to a category or a service bumps the
+# "categories" scope, since a service write can change a category's count.
+catalog_cache = VersionedCache("catalog", timeout=settings.CATALOG_CACHE_TIMEOUT)
+
+CATEGORIES_SCOPE = "categories"
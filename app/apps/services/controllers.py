@@ -1,14 +1,26 @@
 # apps/services/views.py
 import logging
-from django.db.models import Count, Avg, Q
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db.models import Count, Avg, CharField, DateTimeField, Q, Value
+from django.db.models.functions import Coalesce, NullIf
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from modeltranslation.utils import (
+    build_localized_fieldname,
+    get_language,
+    resolution_order,
+)
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 
+from apps.core.pagination import KeysetPagination
 
+from . import indexing
+from .cache import CATEGORIES_SCOPE, catalog_cache
 from .models import ServiceCategory, Service
+from .search import apply_search
 from .serializers import (
     ServiceCategorySerializer,
     ServiceCategoryCreateSerializer,
@@ -21,6 +33,99 @@ from .serializers import (
 
 logger = logging.getLogger(__name__)
 
+# Everything ServiceSerializer reads, loaded with the services in one query
+SERVICE_LIST_FIELDS = (
+    "id",
+    "pkid",
+    "name",
+    "description",
+    "category",
+    "provider",
+    "duration",
+    "price",
+    "currency",
+    "is_active",
+    "next_available_at",
+    "created_at",
+    "updated_at",
+    "category__name",
+    "provider__business_name",
+    "provider__is_verified_provider",
+    "provider__user__first_name",
+    "provider__user__last_name",
+)
+# Sort key for services with nothing bookable, so they come last
+NEVER_AVAILABLE = datetime(9999, 12, 31, tzinfo=dt_timezone.utc)
+
+
+def apply_availability_filters(services, request):
+    """
+    Filter services on the precomputed next_available_at column:
+    ?available_today=true keeps services bookable before the end of today.
+    Sorting with ?ordering=next_available is done by paginate_services.
+    """
+    available_today = request.GET.get("available_today")
+    if available_today and available_today.lower() == "true":
+        now = timezone.localtime()
+        end_of_today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        services = services.filter(
+            next_available_at__gt=now,
+            next_available_at__lt=end_of_today + timedelta(days=1),
+        )
+
+    return services
+
+
+def _localized_name():
+    """The name shown in the active language, with modeltranslation's fallbacks"""
+    return Coalesce(
+        *(
+            NullIf(build_localized_fieldname("name", language), Value(""))
+            for language in resolution_order(get_language())
+        ),
+        Value(""),
+        output_field=CharField(),
+    )
+
+
+def paginate_services(services, request, ranked=False):
+    """
+    One page of services, ordered by name, best match first when ranked
+    (annotated by apply_search) or, with ?ordering=next_available, soonest
+    bookable first. Categories, providers and their users are loaded in the
+    same query and pages are keyset-paginated, so a page costs one query
+    whatever the size of the catalog.
+    """
+    ordering = ("sort_key", "pkid")
+    if request.GET.get("ordering") == "next_available":
+        services = services.annotate(
+            sort_key=Coalesce(
+                "next_available_at",
+                Value(NEVER_AVAILABLE, output_field=DateTimeField()),
+            )
+        )
+    elif ranked:
+        ordering = ("-search_rank", "pkid")
+    else:
+        services = services.annotate(sort_key=_localized_name())
+
+    paginator = KeysetPagination(ordering=ordering)
+    page = paginator.paginate_queryset(
+        services.select_related("category", "provider__user").only(
+            *SERVICE_LIST_FIELDS
+        ),
+        request,
+    )
+    serializer = ServiceSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
+
+
+def with_service_counts(categories):
+    """Annotate each category's number of active services in the same query"""
+    return categories.annotate(
+        active_service_count=Count("service", filter=Q(service__is_active=True))
+    )
+
 
 # Service Category Views
 
@@ -29,16 +134,26 @@ logger = logging.getLogger(__name__)
 @permission_classes([AllowAny])
 def get_all_categories(request):
     """Get all active service categories"""
-    categories = ServiceCategory.objects.filter(is_active=True)
-    serializer = ServiceCategorySerializer(categories, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def list_categories():
+        categories = with_service_counts(ServiceCategory.objects.filter(is_active=True))
+        return ServiceCategorySerializer(categories, many=True).data
+
+    data = catalog_cache.get_or_set(
+        CATEGORIES_SCOPE, ("list", get_language()), list_categories
+    )
+    return Response(data, status=status.HTTP_200_OK)
 
 
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def get_category_detail(request, category_id):
     """Get specific service category details"""
-    category = get_object_or_404(ServiceCategory, id=category_id, is_active=True)
+    category = get_object_or_404(
+        with_service_counts(ServiceCategory.objects.all()),
+        id=category_id,
+        is_active=True,
+    )
     serializer = ServiceCategorySerializer(category)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -123,18 +238,73 @@ def get_all_services(request):
     if max_price:
         services = services.filter(price__lte=max_price)
 
-    search = request.GET.get("search")
+    search = request.GET.get("search", "").strip()
     if search:
-        services = services.filter(
-            Q(name__icontains=search) | Q(description__icontains=search)
-        )
+        services = apply_search(services, search)
 
     verified_only = request.GET.get("verified_only")
     if verified_only and verified_only.lower() == "true":
         services = services.filter(provider__is_verified_provider=True)
 
-    serializer = ServiceSerializer(services, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    services = apply_availability_filters(services, request)
+
+    return paginate_services(services, request, ranked=bool(search))
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def search_services(request):
+    """Search active services in English and French, best matches first"""
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return Response(
+            {"error": "q parameter is required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # Availability lives in next_available_at, which only the database has
+    # up to date
+    uses_availability = request.GET.get("available_today") or request.GET.get(
+        "ordering"
+    )
+    if indexing.index_available() and not uses_availability:
+        try:
+            return paginate_indexed_search(query, request)
+        except indexing.UNAVAILABLE_ERRORS as e:
+            indexing.mark_unavailable(e)
+
+    services = apply_search(Service.objects.filter(is_active=True), query)
+    services = apply_availability_filters(services, request)
+
+    return paginate_services(services, request, ranked=True)
+
+
+def paginate_indexed_search(query, request):
+    """
+    One page of services ranked by Elasticsearch, loaded from the database
+    in one query in the same shape as paginate_services
+    """
+
+    def fetch(cursor, limit):
+        hits = indexing.search_services(query, cursor, limit)
+        services = (
+            Service.objects.filter(pkid__in=[pkid for pkid, _ in hits], is_active=True)
+            .select_related("category", "provider__user")
+            .only(*SERVICE_LIST_FIELDS)
+            .in_bulk()
+        )
+        rows = []
+        for pkid, score in hits:
+            # Skips services deactivated since they were last indexed
+            if pkid in services:
+                services[pkid].search_rank = score
+                rows.append(services[pkid])
+        return rows
+
+    paginator = KeysetPagination(ordering=("-search_rank", "pkid"))
+    page = paginator.paginate_fetch(fetch, request)
+    serializer = ServiceSerializer(page, many=True)
+    return paginator.get_paginated_response(serializer.data)
 
 
 @api_view(["GET"])
@@ -220,8 +390,7 @@ def get_my_services(request):
         )
 
     services = Service.objects.filter(provider=request.user.profile)
-    serializer = ServiceSerializer(services, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return paginate_services(services, request)
 
 
 @api_view(["GET"])
@@ -261,8 +430,9 @@ def get_provider_services(request, provider_id):
             status=status.HTTP_404_NOT_FOUND,
         )
 
-    serializer = ServiceSerializer(services, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    services = apply_availability_filters(services, request)
+
+    return paginate_services(services, request)
 
 
 @api_view(["GET"])
@@ -271,6 +441,6 @@ def get_category_services(request, category_id):
     """Get all services for a specific category"""
     category = get_object_or_404(ServiceCategory, id=category_id, is_active=True)
     services = Service.objects.filter(category=category, is_active=True)
+    services = apply_availability_filters(services, request)
 
-    serializer = ServiceSerializer(services, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return paginate_services(services, request)
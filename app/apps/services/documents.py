@@ -0,0 +1,154 @@
+# apps/services/documents.py
+"""
+Elasticsearch documents for the service catalog.
+
+Signals never write to Elasticsearch directly (ignore_signals): saves are
+queued in SearchIndexEntry and written in batches by sync_search_index, and
+indices are (re)built behind aliases by reindex_search. See
+apps.services.indexing.
+"""
+from django.db.models import Avg, Count, Q
+from django_elasticsearch_dsl import Document, fields
+from django_elasticsearch_dsl.registries import registry
+
+from apps.users.models import Profile
+from .models import Service, ServiceCategory
+
+INDEX_SETTINGS = {"number_of_shards": 1, "number_of_replicas": 0}
+
+
+def _location(profile):
+    if profile.latitude is None or profile.longitude is None:
+        return None
+    return {"lat": float(profile.latitude), "lon": float(profile.longitude)}
+
+
+def _provider_name(profile):
+    return profile.business_name or profile.user.get_fullname
+
+
+def _rating(instance):
+    rating = getattr(instance, "rating", None)
+    return round(float(rating), 2) if rating is not None else None
+
+
+@registry.register_document
+class ServiceDocument(Document):
+    name_en = fields.TextField(analyzer="english")
+    name_fr = fields.TextField(analyzer="french")
+    description_en = fields.TextField(analyzer="english")
+    description_fr = fields.TextField(analyzer="french")
+    category_id = fields.LongField()
+    category_name_en = fields.TextField(attr="category.name_en", analyzer="english")
+    category_name_fr = fields.TextField(attr="category.name_fr", analyzer="french")
+    provider_id = fields.LongField()
+    provider_name = fields.TextField()
+    is_verified_provider = fields.BooleanField(attr="provider.is_verified_provider")
+    duration_minutes = fields.IntegerField()
+    rating = fields.FloatField()
+    review_count = fields.IntegerField()
+    location = fields.GeoPointField()
+
+    class Index:
+        name = "services"
+        settings = INDEX_SETTINGS
+
+    class Django:
+        model = Service
+        fields = ["pkid", "price", "currency"]
+        ignore_signals = True
+        queryset_pagination = 500
+
+    def get_queryset(self):
+        """Active services, with everything the document reads in one query"""
+        return (
+            Service.objects.filter(is_active=True)
+            .select_related("category", "provider__user")
+            .annotate(
+                rating=Avg("provider__reviews_received__rating"),
+                review_count=Count("provider__reviews_received"),
+            )
+        )
+
+    def prepare_provider_name(self, instance):
+        return _provider_name(instance.provider)
+
+    def prepare_duration_minutes(self, instance):
+        return int(instance.duration.total_seconds() // 60)
+
+    def prepare_rating(self, instance):
+        return _rating(instance)
+
+    def prepare_location(self, instance):
+        return _location(instance.provider)
+
+
+@registry.register_document
+class ServiceCategoryDocument(Document):
+    name_en = fields.TextField(analyzer="english")
+    name_fr = fields.TextField(analyzer="french")
+    description_en = fields.TextField(analyzer="english")
+    description_fr = fields.TextField(analyzer="french")
+    service_count = fields.IntegerField(attr="active_service_count")
+
+    class Index:
+        name = "service_categories"
+        settings = INDEX_SETTINGS
+
+    class Django:
+        model = ServiceCategory
+        fields = ["pkid"]
+        ignore_signals = True
+
+    def get_queryset(self):
+        return ServiceCategory.objects.filter(is_active=True).annotate(
+            active_service_count=Count("service", filter=Q(service__is_active=True))
+        )
+
+
+@registry.register_document
+class ProviderDocument(Document):
+    name = fields.TextField()
+    business_name_en = fields.TextField(analyzer="english")
+    business_name_fr = fields.TextField(analyzer="french")
+    description_en = fields.TextField(analyzer="english")
+    description_fr = fields.TextField(analyzer="french")
+    city = fields.TextField(fields={"raw": fields.KeywordField()})
+    country = fields.KeywordField()
+    is_verified_provider = fields.BooleanField()
+    capacity = fields.IntegerField()
+    rating = fields.FloatField()
+    review_count = fields.IntegerField()
+    location = fields.GeoPointField()
+
+    class Index:
+        name = "providers"
+        settings = INDEX_SETTINGS
+
+    class Django:
+        model = Profile
+        fields = ["pkid"]
+        ignore_signals = True
+        queryset_pagination = 500
+
+    def get_queryset(self):
+        return (
+            Profile.objects.filter(user__role="provider")
+            .select_related("user")
+            .annotate(
+                rating=Avg("reviews_received__rating"),
+                review_count=Count("reviews_received"),
+            )
+        )
+
+    def prepare_name(self, instance):
+        return _provider_name(instance)
+
+    def prepare_country(self, instance):
+        return str(instance.country)
+
+    def prepare_rating(self, instance):
+        return _rating(instance)
+
+    def prepare_location(self, instance):
+        return _location(instance)
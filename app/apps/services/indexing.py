@@ -0,0 +1,272 @@
+# apps/services/indexing.py
+"""
+Keeps the Elasticsearch catalog indices in step with the database.
+
+Writes are queued, not sent inline: signals upsert a SearchIndexEntry per
+changed object inside the saving transaction, and sync_batch (run by the
+sync_search_index command) claims queued entries, reloads their objects
+and sends one bulk request per document type. A service whose category
+or provider changed is re-queued, since its document embeds their names,
+rating and location.
+
+Each document type is read through an alias (its index name) and written
+through a "<name>-write" alias. reindex_search builds a fresh index, adds
+it to the write alias so queued changes reach both while it loads, then
+swaps the read alias over and drops the old index. Writes carry an
+external version (the change time in microseconds), so a row loaded from
+an older snapshot never overwrites a newer change or revives a deletion.
+"""
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from elasticsearch import ApiError, NotFoundError, TransportError
+from elasticsearch.helpers import bulk
+from elasticsearch_dsl.connections import connections
+
+from .documents import ProviderDocument, ServiceCategoryDocument, ServiceDocument
+from .models import SearchIndexEntry, Service
+
+logger = logging.getLogger(__name__)
+
+DOCUMENTS = {
+    "service": ServiceDocument,
+    "category": ServiceCategoryDocument,
+    "provider": ProviderDocument,
+}
+WRITE_ALIAS_SUFFIX = "-write"
+_UNAVAILABLE_KEY = "search_index:unavailable"
+
+
+class SearchIndexError(Exception):
+    pass
+
+
+# Errors meaning Elasticsearch cannot be used right now
+UNAVAILABLE_ERRORS = (ApiError, TransportError, SearchIndexError)
+
+
+def enqueue(document: str, object_ids) -> None:
+    """
+    Queue documents for (re)indexing. The entries commit or roll back with
+    the current transaction, so the worker only sees committed changes.
+    """
+    if not settings.SEARCH_INDEX_ENABLED:
+        return
+
+    SearchIndexEntry.objects.bulk_create(
+        [
+            SearchIndexEntry(document=document, object_id=object_id)
+            for object_id in set(object_ids)
+        ],
+        update_conflicts=True,
+        unique_fields=["document", "object_id"],
+        update_fields=["updated_at"],
+    )
+
+
+def _version(moment: datetime) -> int:
+    return int(moment.timestamp() * 1_000_000)
+
+
+def get_client():
+    return connections.get_connection()
+
+
+def write_indices(client, document) -> list:
+    """Indices a document type is written to: those behind its write alias"""
+    name = document._index._name
+    try:
+        return list(client.indices.get_alias(name=name + WRITE_ALIAS_SUFFIX).body)
+    except NotFoundError:
+        if client.indices.exists(index=name):
+            return [name]
+    raise SearchIndexError(f"No '{name}' index; run reindex_search first")
+
+
+def index_actions(document, instances, indices):
+    doc = document()
+    for instance in instances:
+        source = doc.prepare(instance)
+        for index in indices:
+            yield {
+                "_op_type": "index",
+                "_index": index,
+                "_id": instance.pk,
+                "_source": source,
+                "version": _version(instance.updated_at),
+                "version_type": "external_gte",
+            }
+
+
+def delete_actions(entries, indices):
+    for entry in entries:
+        for index in indices:
+            yield {
+                "_op_type": "delete",
+                "_index": index,
+                "_id": entry.object_id,
+                "version": _version(entry.updated_at),
+                "version_type": "external_gte",
+            }
+
+
+def send(client, actions) -> int:
+    """
+    Bulk-write actions, ignoring version conflicts (a newer write already
+    landed) and deletes of documents that were never indexed
+    """
+    success, errors = bulk(client, actions, raise_on_error=False, refresh=False)
+    for error in errors:
+        result = next(iter(error.values()))
+        if result.get("status") not in (404, 409):
+            raise SearchIndexError(f"Bulk indexing failed: {result}")
+    return success
+
+
+def sync_batch(batch_size: int = 500) -> int:
+    """
+    Write up to batch_size queued documents and remove their queue entries.
+    Entries stay queued if Elasticsearch fails. Returns how many were
+    processed.
+    """
+    client = get_client()
+    with transaction.atomic():
+        entries = list(
+            SearchIndexEntry.objects.select_for_update(skip_locked=True).order_by(
+                "updated_at"
+            )[:batch_size]
+        )
+        if not entries:
+            return 0
+
+        by_document = {}
+        for entry in entries:
+            by_document.setdefault(entry.document, {})[entry.object_id] = entry
+
+        # Services embed category and provider details
+        for document, field in (
+            ("category", "category_id"),
+            ("provider", "provider_id"),
+        ):
+            if document in by_document:
+                enqueue(
+                    "service",
+                    Service.objects.filter(
+                        **{f"{field}__in": by_document[document]}
+                    ).values_list("pkid", flat=True),
+                )
+
+        for document, pending in by_document.items():
+            document_class = DOCUMENTS[document]
+            indices = write_indices(client, document_class)
+            instances = list(
+                document_class().get_queryset().filter(pk__in=pending.keys())
+            )
+            found = {instance.pk for instance in instances}
+            send(client, index_actions(document_class, instances, indices))
+            send(
+                client,
+                delete_actions(
+                    [entry for pk, entry in pending.items() if pk not in found],
+                    indices,
+                ),
+            )
+
+        SearchIndexEntry.objects.filter(pkid__in=[e.pkid for e in entries]).delete()
+    return len(entries)
+
+
+def reindex(document, keep_old: bool = False, log=logger.info) -> str:
+    """
+    Build a new index for document from the database and swap its alias
+    over without a gap in reads or writes. Returns the new index name.
+    """
+    client = get_client()
+    alias = document._index._name
+    write_alias = alias + WRITE_ALIAS_SUFFIX
+    new_index = f"{alias}-{timezone.now():%Y%m%d%H%M%S%f}"
+
+    if client.indices.exists_alias(name=alias):
+        old_indices = list(client.indices.get_alias(name=alias).body)
+    elif client.indices.exists(index=alias):
+        # A plain index from before aliases were used
+        old_indices = [alias]
+    else:
+        old_indices = []
+
+    document._index.clone(name=new_index).create()
+    # From here on queued changes are written to the old and new indices
+    client.indices.update_aliases(
+        actions=[
+            {"add": {"index": index, "alias": write_alias}}
+            for index in old_indices + [new_index]
+        ]
+    )
+    log(f"Created {new_index}, loading {alias}")
+
+    loaded = send(
+        client,
+        index_actions(document, document().get_indexing_queryset(), [new_index]),
+    )
+    client.indices.refresh(index=new_index)
+
+    swap = [{"add": {"index": new_index, "alias": alias}}]
+    for index in old_indices:
+        if index == alias:
+            swap.append({"remove_index": {"index": index}})
+        else:
+            swap.append({"remove": {"index": index, "alias": alias}})
+            swap.append({"remove": {"index": index, "alias": write_alias}})
+    client.indices.update_aliases(actions=swap)
+    log(f"Loaded {loaded} documents, {alias} now reads from {new_index}")
+
+    if not keep_old:
+        for index in old_indices:
+            if index != alias:
+                client.indices.delete(index=index, ignore_unavailable=True)
+    return new_index
+
+
+def index_available() -> bool:
+    """False for a while after Elasticsearch failed, so requests skip it"""
+    return settings.SEARCH_INDEX_ENABLED and not cache.get(_UNAVAILABLE_KEY)
+
+
+def mark_unavailable(error) -> None:
+    logger.warning(f"Search index unavailable, using the database: {error}")
+    cache.set(_UNAVAILABLE_KEY, True, timeout=settings.SEARCH_INDEX_RETRY_SECONDS)
+
+
+def search_services(text: str, cursor, limit: int):
+    """
+    Active services best matching text, as (pkid, score) pairs sorting
+    after cursor ([score, pkid] of the last row of the previous page)
+    """
+    search = (
+        ServiceDocument.search()
+        .query(
+            "multi_match",
+            query=text,
+            fields=[
+                "name_en^3",
+                "name_fr^3",
+                "category_name_en^2",
+                "category_name_fr^2",
+                "provider_name^2",
+                "description_en",
+                "description_fr",
+            ],
+            fuzziness="AUTO",
+        )
+        .sort({"_score": {"order": "desc"}}, {"pkid": {"order": "asc"}})
+        .source(False)
+        .extra(size=limit, track_total_hits=False)
+    )
+    if cursor is not None:
+        search = search.extra(search_after=cursor)
+
+    return [(int(hit.meta.id), hit.meta.score) for hit in search.execute()]
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.services.indexing import DOCUMENTS, reindex
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild search indices from the database into new indices and swap "
+        "their aliases over, without interrupting searches or queued writes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "documents",
+            nargs="*",
+            choices=sorted(DOCUMENTS),
+            help="Document types to rebuild (all by default)",
+        )
+        parser.add_argument(
+            "--keep-old",
+            action="store_true",
+            help="Keep the previous indices instead of deleting them",
+        )
+
+    def handle(self, *args, **options):
+        for name in options["documents"] or sorted(DOCUMENTS):
+            started = time.perf_counter()
+            index = reindex(
+                DOCUMENTS[name], keep_old=options["keep_old"], log=self.stdout.write
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Rebuilt {name} into {index} in "
+                    f"{time.perf_counter() - started:.2f}s"
+                )
+            )
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.services.indexing import UNAVAILABLE_ERRORS, sync_batch
+
+
+class Command(BaseCommand):
+    help = "Send queued service, category and provider changes to Elasticsearch in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500, help="Queue entries per bulk request"
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running, polling the queue every --interval seconds when idle",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=2.0, help="Idle poll interval in seconds"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options["batch_size"], 1)
+
+        while True:
+            started = time.perf_counter()
+            synced = 0
+            try:
+                while True:
+                    processed = sync_batch(batch_size)
+                    synced += processed
+                    if processed < batch_size:
+                        break
+            except UNAVAILABLE_ERRORS as e:
+                # Entries stay queued and are retried on the next pass
+                self.stderr.write(f"Search index sync failed: {e}")
+                if not options["loop"]:
+                    raise
+
+            if synced or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Synced {synced} search documents in "
+                        f"{time.perf_counter() - started:.2f}s"
+                    )
+                )
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
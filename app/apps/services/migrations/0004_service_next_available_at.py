@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("services", "0003_alter_servicecategory_image_url"),
+        ("users", "0006_profile_availability_schedule_en_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="service",
+            name="next_available_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="service",
+            index=models.Index(
+                fields=["is_active", "next_available_at"],
+                name="services_se_is_acti_926c88_idx",
+            ),
+        ),
+    ]
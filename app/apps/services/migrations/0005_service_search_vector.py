@@ -0,0 +1,60 @@
+# Generated by Django 5.2 on 2026-10-18 02:04
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+SEARCH_INDEXES = (
+    ("service_search_vector_gin", "gin (search_vector)"),
+    ("service_name_en_trgm", "gin (name_en gin_trgm_ops)"),
+    ("service_name_fr_trgm", "gin (name_fr gin_trgm_ops)"),
+)
+
+
+def add_search_indexes(apps, schema_editor):
+    """
+    Index the search vector and the translated names for trigram matching,
+    then fill the vector for existing services. Full-text search is
+    PostgreSQL-only; other backends search with icontains.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, definition in SEARCH_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON services_service USING {definition}"
+        )
+
+    Service = apps.get_model("services", "Service")
+    Service.objects.update(
+        search_vector=SearchVector("name_en", weight="A", config="english")
+        + SearchVector("name_fr", weight="A", config="french")
+        + SearchVector("description_en", weight="B", config="english")
+        + SearchVector("description_fr", weight="B", config="french")
+    )
+
+
+def remove_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, _ in SEARCH_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("services", "0004_service_next_available_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="service",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(add_search_indexes, remove_search_indexes),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-18 02:11
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("services", "0005_service_search_vector"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchIndexEntry",
+            fields=[
+                (
+                    "pkid",
+                    models.BigAutoField(
+                        editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                (
+                    "id",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "document",
+                    models.CharField(
+                        choices=[
+                            ("service", "Service"),
+                            ("category", "Service category"),
+                            ("provider", "Provider"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+            ],
+            options={
+                "verbose_name": "Search index entry",
+                "verbose_name_plural": "Search index entries",
+                "indexes": [
+                    models.Index(
+                        fields=["updated_at"], name="services_se_updated_5ac083_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("document", "object_id"),
+                        name="unique_search_index_entry",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 import uuid
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from apps.core.models import TimeStampedUUIDModel
@@ -32,6 +33,12 @@ class Service(TimeStampedUUIDModel):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     currency = models.CharField(max_length=3, default="XAF")
     is_active = models.BooleanField(default=True)
+    # Start of the earliest bookable slot, kept up to date by
+    # apps.appointments.next_available; null when nothing is free in the horizon
+    next_available_at = models.DateTimeField(blank=True, null=True, editable=False)
+    # Weighted en/fr name and description lexemes, kept up to date by
+    # apps.services.search on PostgreSQL; always null on other backends
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = _("Service")
@@ -40,8 +47,40 @@ class Service(TimeStampedUUIDModel):
             models.Index(fields=["provider"]),
             models.Index(fields=["category"]),
             models.Index(fields=["is_active"]),
+            models.Index(fields=["is_active", "next_available_at"]),
         ]
         ordering = ["name"]
 
     def __str__(self):
         return f"{self.name} - {self.provider.user.get_fullname}"
+
+
+class SearchIndexEntry(TimeStampedUUIDModel):
+    """
+    A search document waiting to be rewritten (or removed, if its object is
+    gone) by sync_search_index. Written in the same transaction as the
+    change, one row per document and object: enqueueing again only moves
+    updated_at.
+    """
+
+    DOCUMENT_CHOICES = (
+        ("service", _("Service")),
+        ("category", _("Service category")),
+        ("provider", _("Provider")),
+    )
+
+    document = models.CharField(max_length=16, choices=DOCUMENT_CHOICES)
+    object_id = models.BigIntegerField()
+
+    class Meta:
+        verbose_name = _("Search index entry")
+        verbose_name_plural = _("Search index entries")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["document", "object_id"], name="unique_search_index_entry"
+            )
+        ]
+        indexes = [models.Index(fields=["updated_at"])]
+
+    def __str__(self):
+        return f"{self.document} {self.object_id}"
@@ -0,0 +1,95 @@
+# apps/services/search.py
+"""
+Bilingual service search.
+
+On PostgreSQL, services carry a search_vector over their English and French
+names (weight A) and descriptions (weight B), each parsed with its own
+language's text search configuration and backed by a GIN index. Queries
+match either language and fall back to trigram word similarity on the
+names (pg_trgm's word_similarity_threshold), so "brads" still finds
+"Braids". Other backends (SQLite in development) scan the same four
+columns with icontains.
+
+search_rank is an integer on every backend so that ranked pages can be
+keyset-paginated on it: a float rank would have to survive the trip
+through the cursor and compare equal to its recomputed value.
+"""
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import BigIntegerField, Case, F, IntegerField, Q, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest
+
+SEARCH_LANGUAGES = (("en", "english"), ("fr", "french"))
+
+# PostgreSQL ranks are floats; they are scaled and rounded to integers
+RANK_SCALE = 1_000_000
+
+SERVICE_SEARCH_VECTOR = (
+    SearchVector("name_en", weight="A", config="english")
+    + SearchVector("name_fr", weight="A", config="french")
+    + SearchVector("description_en", weight="B", config="english")
+    + SearchVector("description_fr", weight="B", config="french")
+)
+
+
+def refresh_search_vectors(services) -> None:
+    """Recompute search_vector for the given services (PostgreSQL only)"""
+    if connection.vendor == "postgresql":
+        services.update(search_vector=SERVICE_SEARCH_VECTOR)
+
+
+def apply_search(services, text: str):
+    """
+    Services matching text, annotated with search_rank (higher is better)
+    """
+    text = text.strip()
+    if connection.vendor != "postgresql":
+        return _search_services_fallback(services, text)
+
+    query = None
+    for _, config in SEARCH_LANGUAGES:
+        language_query = SearchQuery(text, config=config, search_type="websearch")
+        query = language_query if query is None else query | language_query
+
+    return services.filter(
+        Q(search_vector=query)
+        | Q(name_en__trigram_word_similar=text)
+        | Q(name_fr__trigram_word_similar=text)
+    ).annotate(
+        search_rank=Cast(
+            (
+                Coalesce(SearchRank(F("search_vector"), query), Value(0.0))
+                + Coalesce(
+                    Greatest(
+                        TrigramWordSimilarity(text, "name_en"),
+                        TrigramWordSimilarity(text, "name_fr"),
+                    ),
+                    Value(0.0),
+                )
+            )
+            * Value(RANK_SCALE),
+            BigIntegerField(),
+        ),
+    )
+
+
+def _search_services_fallback(services, text: str):
+    """Substring match on both languages, names ranked above descriptions"""
+    name_match = Q()
+    description_match = Q()
+    for language, _ in SEARCH_LANGUAGES:
+        name_match |= Q(**{f"name_{language}__icontains": text})
+        description_match |= Q(**{f"description_{language}__icontains": text})
+
+    return services.filter(name_match | description_match).annotate(
+        search_rank=Case(
+            When(name_match, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    )
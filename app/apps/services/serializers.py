@@ -24,7 +24,11 @@ class ServiceCategorySerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "created_at", "updated_at", "service_count"]
 
     def get_service_count(self, obj):
-        return obj.service_set.filter(is_active=True).count()
+        # Annotated by with_service_counts for listings; counted otherwise
+        count = getattr(obj, "active_service_count", None)
+        if count is None:
+            count = obj.service_set.filter(is_active=True).count()
+        return count
 
 
 class ServiceCategoryCreateSerializer(serializers.ModelSerializer):
@@ -70,10 +74,17 @@ class ServiceSerializer(serializers.ModelSerializer):
             "currency",
             "price_display",
             "is_active",
+            "next_available_at",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["id", "created_at", "updated_at", "provider"]
+        read_only_fields = [
+            "id",
+            "created_at",
+            "updated_at",
+            "provider",
+            "next_available_at",
+        ]
 
     def get_duration_minutes(self, obj):
         """Convert duration to total minutes"""
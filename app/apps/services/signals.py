@@ -1,10 +1,15 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.db import transaction
 from django.core.exceptions import ObjectDoesNotExist
 import logging
 from mubaku.services.translation_service import auto_translate_instance
+from apps.reviews.models import Review
+from apps.users.models import Profile
+from .cache import CATEGORIES_SCOPE, catalog_cache
+from .indexing import enqueue
 from .models import ServiceCategory, Service
+from .search import refresh_search_vectors
 
 logger = logging.getLogger(__name__)
 
@@ -141,3 +146,50 @@ def auto_translate_service(sender, instance, created, **kwargs):
             logger.error(
                 f"Error scheduling translation for Service {instance.pk}: {str(e)}"
             )
+
+
+@receiver(post_save, sender=Service)
+def update_service_search_vector(sender, instance, **kwargs):
+    """Names and descriptions (including translations) feed the search vector"""
+    refresh_search_vectors(Service.objects.filter(pk=instance.pk))
+
+
+# ===== CATALOG CACHE SIGNALS =====
+@receiver(post_save, sender=ServiceCategory)
+@receiver(post_delete, sender=ServiceCategory)
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def catalog_changed(sender, instance, **kwargs):
+    """Category listings show names and active service counts"""
+    transaction.on_commit(lambda: catalog_cache.bump(CATEGORIES_SCOPE))
+
+
+# ===== SEARCH INDEX SIGNALS =====
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def queue_service_document(sender, instance, **kwargs):
+    enqueue("service", [instance.pk])
+
+
+@receiver(post_save, sender=ServiceCategory)
+@receiver(post_delete, sender=ServiceCategory)
+def queue_category_document(sender, instance, **kwargs):
+    enqueue("category", [instance.pk])
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def queue_provider_document(sender, instance, **kwargs):
+    """
+    Anyone who applied may have a provider document to write or, once
+    rejected or demoted, to remove
+    """
+    if instance.provider_application_status or instance.user.role == "provider":
+        enqueue("provider", [instance.pk])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def queue_reviewed_provider_document(sender, instance, **kwargs):
+    """Provider and service documents carry the provider's rating"""
+    enqueue("provider", [instance.provider_id])
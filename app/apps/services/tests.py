@@ -1,3 +1,518 @@
-from django.test import TestCase
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+from elasticsearch import ConnectionError as ConnectionFailed, NotFoundError
+from elasticsearch_dsl.connections import connections
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.users.models import User
+
+from . import controllers, indexing
+from .models import SearchIndexEntry, Service, ServiceCategory
+
+
+def create_profile(role="client", **fields):
+    """A user of role and its profile, with fields set on the profile"""
+    suffix = uuid.uuid4().hex[:12]
+    user = User(
+        username=f"test_{suffix}",
+        first_name="Test",
+        last_name=role.title(),
+        email=f"test_{suffix}@example.com",
+        role=role,
+    )
+    user.set_unusable_password()
+    user.save()
+
+    profile = user.profile
+    if fields:
+        for name, value in fields.items():
+            setattr(profile, name, value)
+        profile.save()
+    return profile
+
+
+def create_services(count, category, provider=None):
+    """
+    count services named "Service 00", "Service 01"... by provider, or each
+    by a new provider when none is given
+    """
+    return [
+        Service.objects.create(
+            provider=provider or create_profile("provider"),
+            category=category,
+            name=f"Service {index:02d}",
+            duration=timedelta(minutes=30),
+            price=Decimal("5000.00"),
+        )
+        for index in range(count)
+    ]
+
+
+class CatalogQueryTests(TestCase):
+    """A page of services costs the same number of queries at any catalog size"""
+
+    def setUp(self):
+        self.category = ServiceCategory.objects.create(name="Hair")
+        self.provider = create_profile("provider")
+
+    def count_queries(self, view, user=None, **kwargs):
+        request = APIRequestFactory().get("/")
+        if user is not None:
+            force_authenticate(request, user=user)
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), len(response.data["results"])
+
+    def assert_constant_queries(self, view, add_services, user=None, **kwargs):
+        add_services(2)
+        small = self.count_queries(view, user, **kwargs)
+        add_services(30)
+        large = self.count_queries(view, user, **kwargs)
+
+        self.assertEqual(small[1], 2)
+        self.assertEqual(large[1], 20)
+        self.assertEqual(small[0], large[0])
+
+    def test_all_services(self):
+        self.assert_constant_queries(
+            controllers.get_all_services,
+            lambda count: create_services(count, self.category),
+        )
+
+    def test_category_services(self):
+        self.assert_constant_queries(
+            controllers.get_category_services,
+            lambda count: create_services(count, self.category),
+            category_id=self.category.id,
+        )
+
+    def test_my_services(self):
+        self.assert_constant_queries(
+            controllers.get_my_services,
+            lambda count: create_services(count, self.category, self.provider),
+            user=self.provider.user,
+        )
+
+
+class ServicePaginationTests(TestCase):
+    def setUp(self):
+        self.services = create_services(25, ServiceCategory.objects.create(name="Hair"))
+
+    def get_page(self, **params):
+        request = APIRequestFactory().get("/", {"page_size": 10, **params})
+        return controllers.get_all_services(request).data
+
+    def test_next_page_follows_the_last_row(self):
+        first = self.get_page()
+        cursor = parse_qs(urlparse(first["next"]).query)["cursor"][0]
+        second = self.get_page(cursor=cursor)
+
+        self.assertEqual(
+            [service["name"] for service in first["results"] + second["results"]],
+            [f"Service {index:02d}" for index in range(20)],
+        )
+
+    def test_last_page_has_no_next_link(self):
+        page = self.get_page()
+        names = []
+        while True:
+            names += [service["name"] for service in page["results"]]
+            if page["next"] is None:
+                break
+            cursor = parse_qs(urlparse(page["next"]).query)["cursor"][0]
+            page = self.get_page(cursor=cursor)
+
+        self.assertEqual(len(page["results"]), 5)
+        self.assertEqual(names, [service.name for service in self.services])
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(
+            controllers.get_all_services(
+                APIRequestFactory().get("/", {"cursor": "not-a-cursor"})
+            ).status_code,
+            404,
+        )
+
+
+class ServiceAvailabilityFilterTests(TestCase):
+    def setUp(self):
+        self.now = timezone.make_aware(datetime(2026, 11, 4, 12))
+        now = mock.patch("django.utils.timezone.now", return_value=self.now)
+        now.start()
+        self.addCleanup(now.stop)
+
+        later_today, tomorrow, started, never = create_services(
+            4, ServiceCategory.objects.create(name="Hair")
+        )
+        for service, next_available_at in (
+            (later_today, self.now + timedelta(hours=5)),
+            (tomorrow, self.now + timedelta(days=1)),
+            (started, self.now - timedelta(hours=1)),
+            (never, None),
+        ):
+            Service.objects.filter(pk=service.pk).update(
+                next_available_at=next_available_at
+            )
+
+    def names(self, **params):
+        names = []
+        page = controllers.get_all_services(
+            APIRequestFactory().get("/", {"page_size": 2, **params})
+        ).data
+        while True:
+            names += [service["name"] for service in page["results"]]
+            if page["next"] is None:
+                return names
+            cursor = parse_qs(urlparse(page["next"]).query)["cursor"][0]
+            page = controllers.get_all_services(
+                APIRequestFactory().get(
+                    "/", {"page_size": 2, "cursor": cursor, **params}
+                )
+            ).data
+
+    def test_available_today_keeps_services_bookable_before_midnight(self):
+        self.assertEqual(self.names(available_today="true"), ["Service 00"])
+
+    def test_ordering_by_next_available_puts_never_available_last(self):
+        self.assertEqual(
+            self.names(ordering="next_available"),
+            ["Service 02", "Service 00", "Service 01", "Service 03"],
+        )
+
+
+@mock.patch("apps.services.signals.auto_translate_instance")
+class CategoryListingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hair, self.nails, self.spa = (
+            ServiceCategory.objects.create(name=name)
+            for name in ("Hair", "Nails", "Spa")
+        )
+        create_services(3, self.hair)
+        inactive = create_services(2, self.nails)[0]
+        inactive.is_active = False
+        inactive.save()
+
+    def listed_counts(self):
+        response = controllers.get_all_categories(APIRequestFactory().get("/"))
+        return {row["name"]: row["service_count"] for row in response.data}
+
+    def test_annotated_counts_match_counting_each_category(self, translate):
+        annotated = {
+            category.name: category.active_service_count
+            for category in controllers.with_service_counts(
+                ServiceCategory.objects.all()
+            )
+        }
+
+        self.assertEqual(
+            annotated,
+            {
+                category.name: Service.objects.filter(
+                    category=category, is_active=True
+                ).count()
+                for category in ServiceCategory.objects.all()
+            },
+        )
+        self.assertEqual(annotated, {"Hair": 3, "Nails": 1, "Spa": 0})
+
+    def test_service_writes_refresh_the_cached_counts(self, translate):
+        self.assertEqual(self.listed_counts(), {"Hair": 3, "Nails": 1, "Spa": 0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            added = create_services(1, self.spa)[0]
+        self.assertEqual(self.listed_counts()["Spa"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            added.is_active = False
+            added.save()
+        self.assertEqual(self.listed_counts()["Spa"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Service.objects.filter(category=self.hair).first().delete()
+        self.assertEqual(self.listed_counts()["Hair"], 2)
+
+
+@skipUnless(connection.vendor != "postgresql", "Substring fallback search")
+class FallbackSearchTests(TestCase):
+    def setUp(self):
+        services = create_services(8, ServiceCategory.objects.create(name="Hair"))
+        # Names outrank descriptions; within a rank, older rows come first
+        for service in services[1::3]:
+            service.name_en = f"Braids {service.name}"
+        for service in services[::2]:
+            service.description_en = "Knotless braids"
+        Service.objects.bulk_update(services, ["name_en", "description_en"])
+        self.services = services
+
+    def search(self, **params):
+        request = APIRequestFactory().get("/", {"q": "braids", **params})
+        return controllers.search_services(request).data
+
+    def expected(self):
+        """pkids matched by name, then pkids matched by description only"""
+        by_name = [service.pk for service in self.services[1::3]]
+        by_description = [
+            service.pk for service in self.services[::2] if service.pk not in by_name
+        ]
+        return by_name, by_description
+
+    def test_rank_is_an_integer_with_names_first(self):
+        by_name, by_description = self.expected()
+
+        ranked = controllers.apply_search(Service.objects.all(), "braids").order_by(
+            "-search_rank", "pkid"
+        )
+
+        self.assertEqual(
+            [(service.pk, service.search_rank) for service in ranked],
+            [(pk, 2) for pk in by_name] + [(pk, 1) for pk in by_description],
+        )
+
+    def test_ranked_pages_have_no_duplicates_or_gaps(self):
+        pkids = {str(service.id): service.pk for service in self.services}
+        page = self.search(page_size=2)
+        seen = []
+        while True:
+            seen += [pkids[service["id"]] for service in page["results"]]
+            if page["next"] is None:
+                break
+            cursor = parse_qs(urlparse(page["next"]).query)["cursor"][0]
+            page = self.search(page_size=2, cursor=cursor)
+
+        by_name, by_description = self.expected()
+        self.assertEqual(seen, by_name + by_description)
+
+
+class FakeResponse(dict):
+    @property
+    def body(self):
+        return self
+
+
+class FakeIndices:
+    def __init__(self, es):
+        self.es = es
+
+    def exists(self, index):
+        return index in self.es.documents
+
+    def exists_alias(self, name):
+        return bool(self.es.resolve_alias(name))
+
+    def get_alias(self, name):
+        indices = self.es.resolve_alias(name)
+        if not indices:
+            meta = ApiResponseMeta(
+                status=404,
+                http_version="1.1",
+                headers=HttpHeaders(),
+                duration=0,
+                node=NodeConfig("http", "localhost", 9200),
+            )
+            raise NotFoundError("alias missing", meta, {})
+        return FakeResponse({index: {"aliases": {name: {}}} for index in indices})
+
+    def create(self, index, **kwargs):
+        self.es.documents[index] = {}
+        self.es.aliases[index] = set()
+
+    def update_aliases(self, actions):
+        for action in actions:
+            (operation, target) = next(iter(action.items()))
+            if operation == "add":
+                self.es.aliases[target["index"]].add(target["alias"])
+            elif operation == "remove":
+                self.es.aliases[target["index"]].discard(target["alias"])
+            else:
+                self.delete(target["index"])
+
+    def refresh(self, index):
+        pass
+
+    def delete(self, index, **kwargs):
+        self.es.documents.pop(index, None)
+        self.es.aliases.pop(index, None)
+
+
+class FakeElasticsearch:
+    """
+    The part of the Elasticsearch client the indexing code uses, in memory:
+    indices, aliases, versioned bulk writes and a substring search. Raises
+    a connection error on every call while down is set.
+    """
+
+    def __init__(self):
+        self.documents = {}  # index -> {id: (version, source, None once deleted)}
+        self.aliases = {}  # index -> aliases
+        self.indices = FakeIndices(self)
+        self.down = False
+
+    def options(self, **kwargs):
+        return self
+
+    def resolve_alias(self, name):
+        return [index for index, aliases in self.aliases.items() if name in aliases]
+
+    def resolve(self, name):
+        return [name] if name in self.documents else self.resolve_alias(name)
+
+    def sources(self, name):
+        """id -> source of the live documents behind an index or alias"""
+        (index,) = self.resolve(name)
+        return {
+            doc_id: source
+            for doc_id, (_, source) in self.documents[index].items()
+            if source is not None
+        }
+
+    def bulk(self, actions):
+        if self.down:
+            raise ConnectionFailed("Elasticsearch is down")
+
+        success, errors = 0, []
+        for action in actions:
+            (index,) = self.resolve(action["_index"])
+            documents = self.documents[index]
+            doc_id = str(action["_id"])
+            version, source = documents.get(doc_id, (None, None))
+            if version is not None and action["version"] < version:
+                errors.append({action["_op_type"]: {"status": 409}})
+            elif action["_op_type"] == "delete" and source is None:
+                errors.append({"delete": {"status": 404}})
+            else:
+                documents[doc_id] = (action["version"], action.get("_source"))
+                success += 1
+        return success, errors
+
+    def search(self, index, body, **kwargs):
+        if self.down:
+            raise ConnectionFailed("Elasticsearch is down")
+
+        if isinstance(index, list):
+            (index,) = index
+        text = body["query"]["multi_match"]["query"].lower()
+        hits = []
+        for doc_id, source in self.sources(index).items():
+            score = float(str(source).lower().count(text))
+            if score:
+                hits.append({"_id": doc_id, "_score": score, "pkid": source["pkid"]})
+        hits.sort(key=lambda hit: (-hit["_score"], hit["pkid"]))
+        if "search_after" in body:
+            score, pkid = body["search_after"]
+            hits = [
+                hit for hit in hits if (-hit["_score"], hit["pkid"]) > (-score, pkid)
+            ]
+        hits = [
+            {"_index": index, "_id": hit["_id"], "_score": hit["_score"]}
+            for hit in hits[: body["size"]]
+        ]
+        return FakeResponse({"hits": {"hits": hits}})
+
+
+@override_settings(SEARCH_INDEX_ENABLED=True)
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.es = FakeElasticsearch()
+        connections.add_connection("default", self.es)
+        self.addCleanup(connections.configure, **settings.ELASTICSEARCH_DSL)
+        bulk = mock.patch.object(
+            indexing, "bulk", lambda client, actions, **kwargs: client.bulk(actions)
+        )
+        bulk.start()
+        self.addCleanup(bulk.stop)
+
+        self.category = ServiceCategory.objects.create(name="Hair")
+        self.services = create_services(3, self.category)
+        for document in indexing.DOCUMENTS.values():
+            indexing.reindex(document, log=lambda message: None)
+        SearchIndexEntry.objects.all().delete()
+
+    def search(self, query):
+        request = APIRequestFactory().get("/", {"q": query})
+        return controllers.search_services(request)
+
+    def test_sync_batch_drains_the_queue(self):
+        renamed, removed = self.services[:2]
+        renamed.name = "Braids"
+        renamed.save()
+        removed.is_active = False
+        removed.save()
+        added = create_services(1, self.category)[0]
+        queued = SearchIndexEntry.objects.filter(document="service").count()
+
+        batches = []
+        while batch := indexing.sync_batch(batch_size=2):
+            batches.append(batch)
+
+        self.assertEqual(queued, 3)
+        self.assertGreater(len(batches), 1)
+        self.assertFalse(SearchIndexEntry.objects.exists())
+        documents = self.es.sources("services")
+        self.assertEqual(documents[str(renamed.pk)]["name_en"], "Braids")
+        self.assertNotIn(str(removed.pk), documents)
+        self.assertIn(str(added.pk), documents)
+
+    def test_failed_sync_keeps_entries_queued(self):
+        self.services[0].name = "Braids"
+        self.services[0].save()
+        self.es.down = True
+
+        with self.assertRaises(indexing.UNAVAILABLE_ERRORS):
+            indexing.sync_batch()
+
+        self.assertEqual(SearchIndexEntry.objects.count(), 1)
+
+    def test_reindex_swaps_the_alias_to_a_new_index(self):
+        (old_index,) = self.es.resolve("services")
+        create_services(1, self.category)
+
+        call_command("reindex_search", "service", stdout=StringIO())
+
+        (new_index,) = self.es.resolve("services")
+        self.assertNotEqual(new_index, old_index)
+        self.assertNotIn(old_index, self.es.documents)
+        self.assertEqual(self.es.resolve_alias("services-write"), [new_index])
+        self.assertEqual(len(self.es.sources("services")), 4)
+
+    def test_reindex_keep_old_detaches_the_previous_index(self):
+        (old_index,) = self.es.resolve("services")
+
+        indexing.reindex(
+            indexing.DOCUMENTS["service"], keep_old=True, log=lambda message: None
+        )
+
+        self.assertIn(old_index, self.es.documents)
+        self.assertEqual(self.es.aliases[old_index], set())
+
+    def test_search_is_served_from_the_index(self):
+        with mock.patch.object(controllers, "apply_search", side_effect=AssertionError):
+            response = self.search("Service 01")
+
+        self.assertEqual(
+            [service["name"] for service in response.data["results"]], ["Service 01"]
+        )
+
+    def test_search_falls_back_to_the_database_when_the_index_fails(self):
+        self.es.down = True
+
+        response = self.search("Service")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertFalse(indexing.index_available())
@@ -31,6 +31,7 @@ urlpatterns = [
     # Service endpoints
     path("", controllers.get_all_services, name="service-list"),
     path("create/", controllers.create_service, name="service-create"),
+    path("search/", controllers.search_services, name="service-search"),
     path("<uuid:service_id>/", controllers.get_service_detail, name="service-detail"),
     path(
         "<uuid:service_id>/update/", controllers.update_service, name="service-update"
@@ -5,12 +5,15 @@ from django.db import transaction
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 
+from apps.core.pagination import KeysetPagination
 
 from .exceptions import NotYourProfileException, ProfileNotFoundException
 from apps.users.models import Profile, User
+from .nearby import nearby_providers, nearest_first
 from .serializers import (
+    NearbyProviderSerializer,
     ProfileSerializer,
     UpdateProfileSerializer,
     UnifiedProfileSerializer,
@@ -481,6 +484,69 @@ def verify_provider(request, id):
         raise ProfileNotFoundException("Profile does not exist")
 
 
+# Provider Search
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def get_nearby_providers(request):
+    """
+    Providers within radius_km (default 10, at most 100) of latitude and
+    longitude, nearest first, optionally offering a service of category
+    (pkid), verified only, or rated at least min_rating
+    """
+    try:
+        latitude = float(request.GET["latitude"])
+        longitude = float(request.GET["longitude"])
+        radius_km = min(float(request.GET.get("radius_km", 10)), 100)
+        category = request.GET.get("category")
+        category = int(category) if category else None
+        min_rating = request.GET.get("min_rating")
+        min_rating = float(min_rating) if min_rating else None
+    except KeyError:
+        return Response(
+            {"error": "latitude and longitude are required"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    except ValueError:
+        return Response(
+            {
+                "error": "latitude, longitude, radius_km, category and min_rating "
+                "must be numbers"
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or radius_km <= 0:
+        return Response(
+            {"error": "Invalid latitude, longitude or radius_km"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    verified_only = request.GET.get("verified_only", "").lower() == "true"
+    paginator = KeysetPagination(ordering=("distance_km", "pkid"))
+
+    def fetch(cursor, limit):
+        def search(ring_km):
+            providers = nearby_providers(
+                latitude,
+                longitude,
+                ring_km,
+                category=category,
+                verified_only=verified_only,
+                min_rating=min_rating,
+            )
+            return paginator.after(providers, cursor)
+
+        return nearest_first(
+            search, radius_km, limit, start_km=cursor[0] if cursor else 0.0
+        )
+
+    page = paginator.paginate_fetch(fetch, request)
+    serializer = NearbyProviderSerializer(page, many=True, context={"request": request})
+    return paginator.get_paginated_response(serializer.data)
+
+
 # Utility Views
 
 
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 01:43
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0007_profile_business_account"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="capacity",
+            field=models.PositiveSmallIntegerField(
+                default=1,
+                help_text="How many appointments the provider can serve at once.",
+                validators=[django.core.validators.MinValueValidator(1)],
+                verbose_name="Capacity",
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 01:50
+
+import apps.core.timezones
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0008_profile_capacity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="timezone",
+            field=models.CharField(
+                default="Africa/Douala",
+                help_text="IANA time zone of the provider's working hours.",
+                max_length=64,
+                validators=[apps.core.timezones.validate_timezone],
+                verbose_name="Time zone",
+            ),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2 on 2026-10-18 02:17
+
+from django.db import DatabaseError, migrations, models, transaction
+
+from apps.core.geo import geohash_encode
+
+# Must match the expression apps.users.nearby filters on for PostgreSQL to
+# use the index
+LOCATION_GIST_INDEX = (
+    "CREATE INDEX IF NOT EXISTS profile_location_gist ON users_profile "
+    "USING gist ((ST_SetSRID(ST_MakePoint("
+    "longitude::double precision, latitude::double precision), 4326)::geography)) "
+    "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+)
+
+
+def fill_geohashes(apps, schema_editor):
+    Profile = apps.get_model("users", "Profile")
+    profiles = Profile.objects.filter(
+        latitude__isnull=False, longitude__isnull=False
+    ).only("pkid", "latitude", "longitude")
+
+    batch = []
+    for profile in profiles.iterator(chunk_size=2000):
+        profile.geohash = geohash_encode(
+            float(profile.latitude), float(profile.longitude)
+        )
+        batch.append(profile)
+        if len(batch) == 2000:
+            Profile.objects.bulk_update(batch, ["geohash"])
+            batch = []
+    Profile.objects.bulk_update(batch, ["geohash"])
+
+
+def add_location_index(apps, schema_editor):
+    """
+    Index profile locations as PostGIS geographies when the server has
+    PostGIS; without it nearby searches use the geohash index
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+    except DatabaseError:
+        return
+    schema_editor.execute(LOCATION_GIST_INDEX)
+
+
+def remove_location_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("DROP INDEX IF EXISTS profile_location_gist")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0009_profile_timezone"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="geohash",
+            field=models.CharField(
+                blank=True, editable=False, max_length=12, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="profile",
+            index=models.Index(
+                fields=["geohash"], name="users_profi_geohash_a6886c_idx"
+            ),
+        ),
+        migrations.RunPython(fill_geohashes, migrations.RunPython.noop),
+        migrations.RunPython(add_location_index, remove_location_index),
+    ]
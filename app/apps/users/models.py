@@ -1,4 +1,6 @@
 import uuid
+from django.conf import settings
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -10,7 +12,9 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from phonenumber_field.modelfields import PhoneNumberField
 from django_countries.fields import CountryField
+from apps.core.geo import geohash_encode
 from apps.core.models import Gender, TimeStampedUUIDModel
+from apps.core.timezones import get_zone, validate_timezone
 from .managers import CustomUserManager
 
 
@@ -126,6 +130,8 @@ class Profile(TimeStampedUUIDModel):
     longitude = models.DecimalField(
         max_digits=11, decimal_places=8, blank=True, null=True
     )
+    # Kept in step with latitude/longitude by save(), for nearby lookups
+    geohash = models.CharField(max_length=12, blank=True, null=True, editable=False)
     is_verified_provider = models.BooleanField(
         verbose_name=_("Is Verified provider"),
         default=False,
@@ -142,6 +148,30 @@ class Profile(TimeStampedUUIDModel):
         default="basic",
     )
     subscription_expires_at = models.DateTimeField(blank=True, null=True)
+    # Appointments the provider can serve at the same time (chairs, staff)
+    capacity = models.PositiveSmallIntegerField(
+        verbose_name=_("Capacity"),
+        default=1,
+        validators=[MinValueValidator(1)],
+        help_text=_("How many appointments the provider can serve at once."),
+    )
+    # Working hours are wall-clock times in this zone
+    timezone = models.CharField(
+        verbose_name=_("Time zone"),
+        max_length=64,
+        default=settings.TIME_ZONE,
+        validators=[validate_timezone],
+        help_text=_("IANA time zone of the provider's working hours."),
+    )
+    # Staff profiles point at the business account they work for, whose
+    # owner can manage their schedules in bulk
+    business_account = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        related_name="staff_profiles",
+        blank=True,
+        null=True,
+    )
 
     # Provider Application Tracking (ADD THESE)
     provider_application_status = models.CharField(
@@ -176,6 +206,7 @@ class Profile(TimeStampedUUIDModel):
     class Meta:
         indexes = [
             models.Index(fields=["latitude", "longitude"]),
+            models.Index(fields=["geohash"]),
             models.Index(fields=["is_verified_provider"]),
             models.Index(fields=["provider_application_status"]),  # ADD THIS INDEX
         ]
@@ -183,6 +214,21 @@ class Profile(TimeStampedUUIDModel):
     def __str__(self) -> str:
         return f"{self.user.username}'s Profile"
 
+    def save(self, *args, **kwargs):
+        if self.latitude is None or self.longitude is None:
+            self.geohash = None
+        else:
+            self.geohash = geohash_encode(float(self.latitude), float(self.longitude))
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
+        super().save(*args, **kwargs)
+
+    @property
+    def tzinfo(self):
+        return get_zone(self.timezone)
+
     @property
     def joined_date(self):
         return self.user.date_joined.strftime("%b %d, %Y")
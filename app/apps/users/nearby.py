@@ -0,0 +1,190 @@
+# apps/users/nearby.py
+"""
+Providers near a point, nearest first.
+
+Candidates are found through the geohash index: the circle's bounding box
+is covered by a few geohash cells, each a range of the index, then cut to
+the exact haversine distance, computed in the query so results can be
+sorted and keyset-paginated on it. When the database has PostGIS (see
+migration users 0010), a GiST index on the profiles' geography is used
+instead, with ST_DWithin and ST_Distance. Pages are searched in rings
+growing out from the last provider sent (nearest_first), so a page costs
+about the same in a dense city as in the countryside.
+"""
+import math
+
+from django.db import connections
+from django.db.models import (
+    Avg,
+    BooleanField,
+    Count,
+    Exists,
+    Field,
+    FloatField,
+    Func,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import (
+    ASin,
+    Cast,
+    Coalesce,
+    Cos,
+    Least,
+    Power,
+    Sin,
+    Sqrt,
+)
+
+from apps.core.geo import EARTH_RADIUS_KM, bounding_box, geohash_ranges
+from apps.reviews.models import Review
+from apps.services.models import Service
+from .models import Profile, User
+
+# First ring searched by nearest_first, and how much each next one grows
+RING_START_KM = 1.0
+RING_GROWTH = 4
+
+_postgis_available = {}
+
+
+class _Geography(Func):
+    """A (longitude, latitude) point as a PostGIS geography"""
+
+    template = "ST_SetSRID(ST_MakePoint(%(expressions)s), 4326)::geography"
+    output_field = Field()
+
+
+class _DWithin(Func):
+    function = "ST_DWithin"
+    output_field = BooleanField()
+
+
+class _Distance(Func):
+    function = "ST_Distance"
+    output_field = FloatField()
+
+
+def postgis_available(using: str = "default") -> bool:
+    """Whether the database has the PostGIS extension (checked once)"""
+    if using not in _postgis_available:
+        connection = connections[using]
+        available = False
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'postgis'")
+                available = cursor.fetchone() is not None
+        _postgis_available[using] = available
+    return _postgis_available[using]
+
+
+def _haversine_km(latitude: float, longitude: float):
+    """Distance in km from the point to each profile, as an expression"""
+    profile_lat = Cast("latitude", FloatField()) * (math.pi / 180)
+    profile_lon = Cast("longitude", FloatField()) * (math.pi / 180)
+    lat, lon = math.radians(latitude), math.radians(longitude)
+
+    a = Power(Sin((profile_lat - lat) / 2), 2) + math.cos(lat) * Cos(
+        profile_lat
+    ) * Power(Sin((profile_lon - lon) / 2), 2)
+    # Rounding can push a above 1 for antipodal points
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(Least(a, Value(1.0))))
+
+
+def _within_geohash_cells(latitude: float, longitude: float, radius_km: float) -> Q:
+    """
+    Profiles in the geohash cells covering the circle. Left as the only
+    indexed condition, so the geohash index leads the plan.
+    """
+    cells = Q()
+    for start, end in geohash_ranges(*bounding_box(latitude, longitude, radius_km)):
+        cell = Q(geohash__gte=start)
+        if end is not None:
+            cell &= Q(geohash__lt=end)
+        cells |= cell
+    return cells
+
+
+def nearby_providers(
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    category=None,
+    verified_only: bool = False,
+    min_rating: float = None,
+):
+    """
+    Providers within radius_km of the point, annotated with distance_km,
+    rating (None without reviews) and review_count. Sort on
+    ("distance_km", "pkid") for nearest first.
+    """
+    # The role is checked per candidate: as a join or an IN list it can
+    # lead the plan and scan every provider before the location filter
+    providers = Profile.objects.filter(
+        Exists(User.objects.filter(pk=OuterRef("user_id"), role="provider")),
+        latitude__isnull=False,
+        longitude__isnull=False,
+    )
+
+    if postgis_available(providers.db):
+        location = _Geography(
+            Cast("longitude", FloatField()), Cast("latitude", FloatField())
+        )
+        point = _Geography(Value(longitude), Value(latitude))
+        providers = providers.filter(
+            _DWithin(location, point, Value(radius_km * 1000))
+        ).annotate(distance_km=_Distance(location, point) / 1000)
+    else:
+        providers = (
+            providers.filter(_within_geohash_cells(latitude, longitude, radius_km))
+            .annotate(distance_km=_haversine_km(latitude, longitude))
+            .filter(distance_km__lte=radius_km)
+        )
+
+    if category is not None:
+        providers = providers.filter(
+            Exists(
+                Service.objects.filter(
+                    provider=OuterRef("pk"), category=category, is_active=True
+                )
+            )
+        )
+
+    if verified_only:
+        providers = providers.filter(is_verified_provider=True)
+
+    # Subqueries rather than joins, so the distance keyset filter is not
+    # pushed into a GROUP BY
+    reviews = Review.objects.filter(provider=OuterRef("pk")).values("provider")
+    providers = providers.annotate(
+        rating=Subquery(reviews.annotate(value=Avg("rating")).values("value")),
+        review_count=Coalesce(
+            Subquery(reviews.annotate(value=Count("pk")).values("value")),
+            Value(0),
+            output_field=IntegerField(),
+        ),
+    )
+    if min_rating is not None:
+        providers = providers.filter(rating__gte=min_rating)
+
+    return providers.select_related("user")
+
+
+def nearest_first(search, radius_km: float, limit: int, start_km: float = 0.0):
+    """
+    The first limit rows of search(ring_km), the providers within ring_km
+    sorted by distance, for rings growing out from start_km (the distance
+    of the last row already sent) until limit rows are found or radius_km
+    is reached. Nothing outside a ring is nearer than what is in it, so a
+    page in a dense area computes distances for the nearby providers only.
+    """
+    step_km = RING_START_KM
+    while True:
+        ring_km = min(start_km + step_km, radius_km)
+        rows = list(search(ring_km)[:limit])
+        if len(rows) == limit or ring_km >= radius_km:
+            return rows
+        step_km *= RING_GROWTH
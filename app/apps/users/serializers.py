@@ -106,6 +106,8 @@ class ProfileSerializer(serializers.ModelSerializer):
             "description",
             "subscription_tier",
             "subscription_expires_at",
+            "capacity",
+            "timezone",
             # Provider application fields
             "provider_application_status",
             "provider_application_date",
@@ -158,6 +160,8 @@ class UpdateProfileSerializer(serializers.ModelSerializer):
             "latitude",
             "longitude",
             "description",
+            "capacity",
+            "timezone",
             # Additional provider details
             "years_of_experience",
             "certifications",
@@ -347,3 +351,40 @@ class ProviderApplicationStatusSerializer(serializers.ModelSerializer):
             "username",
             "email",
         ]
+
+
+class NearbyProviderSerializer(serializers.ModelSerializer):
+    """
+    Provider found by a nearby search, with the distance, rating and
+    review_count annotated by apps.users.nearby.nearby_providers
+    """
+
+    full_name = serializers.CharField(source="user.get_fullname", read_only=True)
+    country = CountryField(name_only=True)
+    distance_km = serializers.SerializerMethodField()
+    rating = serializers.SerializerMethodField()
+    review_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Profile
+        fields = [
+            "id",
+            "pkid",
+            "full_name",
+            "business_name",
+            "profile_photo",
+            "city",
+            "country",
+            "latitude",
+            "longitude",
+            "is_verified_provider",
+            "distance_km",
+            "rating",
+            "review_count",
+        ]
+
+    def get_distance_km(self, obj):
+        return round(obj.distance_km, 2)
+
+    def get_rating(self, obj):
+        return round(float(obj.rating), 2) if obj.rating is not None else None
@@ -1,3 +1,133 @@
+import math
+import uuid
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
+
 from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from apps.core.geo import EARTH_RADIUS_KM, geohash_encode
+
+from . import controllers
+from .models import User
+from .nearby import nearby_providers
+
+# Akwa, Douala
+ORIGIN = (4.05, 9.70)
+
+
+def create_profile(role="client", **fields):
+    """A user of role and its profile, with fields set on the profile"""
+    suffix = uuid.uuid4().hex[:12]
+    user = User(
+        username=f"test_{suffix}",
+        first_name="Test",
+        last_name=role.title(),
+        email=f"test_{suffix}@example.com",
+        role=role,
+    )
+    user.set_unusable_password()
+    user.save()
+
+    profile = user.profile
+    if fields:
+        for name, value in fields.items():
+            setattr(profile, name, value)
+        profile.save()
+    return profile
+
+
+def create_located(km_north, km_east=0.0, role="provider", origin=ORIGIN):
+    """A profile located km_north and km_east of origin"""
+    latitude = origin[0] + math.degrees(km_north / EARTH_RADIUS_KM)
+    longitude = origin[1] + math.degrees(
+        km_east / (EARTH_RADIUS_KM * math.cos(math.radians(origin[0])))
+    )
+    return create_profile(
+        role,
+        latitude=Decimal(f"{latitude:.8f}"),
+        longitude=Decimal(f"{longitude:.8f}"),
+    )
+
+
+class NearbyProvidersTests(TestCase):
+    def nearby(self, radius_km, origin=ORIGIN):
+        return list(
+            nearby_providers(*origin, radius_km).order_by("distance_km", "pkid")
+        )
+
+    def test_profile_save_keeps_the_geohash_in_step(self):
+        profile = create_located(1)
+        self.assertEqual(
+            profile.geohash,
+            geohash_encode(float(profile.latitude), float(profile.longitude)),
+        )
+
+        profile.latitude = None
+        profile.save()
+        profile.refresh_from_db()
+        self.assertIsNone(profile.geohash)
+
+    def test_providers_within_the_radius_nearest_first(self):
+        far = create_located(20)
+        middle = create_located(0, 3)
+        near = create_located(-0.5)
+        create_located(0.1, role="client")
+        create_profile("provider")
+
+        providers = self.nearby(10)
+
+        self.assertEqual(providers, [near, middle])
+        self.assertAlmostEqual(providers[0].distance_km, 0.5, places=2)
+        self.assertAlmostEqual(providers[1].distance_km, 3, places=2)
+        self.assertIn(far, self.nearby(25))
+
+    def test_neighbours_across_geohash_cell_edges_are_found(self):
+        # (0, 0) is a corner of the four top-level geohash cells
+        origin = (0.0, 0.0)
+        corners = [
+            create_located(north, east, origin=origin)
+            for north in (-0.3, 0.3)
+            for east in (-0.3, 0.3)
+        ]
+
+        self.assertEqual(
+            {profile.geohash[0] for profile in corners}, {"7", "e", "k", "s"}
+        )
+        self.assertEqual(set(self.nearby(1, origin)), set(corners))
+
+    def test_circle_excludes_the_corners_of_its_bounding_box(self):
+        # About 1.41 km away diagonally, inside the 1 km circle's box
+        create_located(1, 1)
+
+        self.assertEqual(self.nearby(1), [])
+
+
+class NearbyProvidersViewTests(TestCase):
+    def get(self, **params):
+        request = APIRequestFactory().get(
+            "/", {"latitude": ORIGIN[0], "longitude": ORIGIN[1], **params}
+        )
+        return controllers.get_nearby_providers(request)
+
+    def test_pages_follow_growing_rings(self):
+        providers = [create_located(km) for km in (30, 0.5, 12, 2, 5)]
+
+        distances = []
+        response = self.get(radius_km=50, page_size=2)
+        while True:
+            distances += [row["distance_km"] for row in response.data["results"]]
+            if response.data["next"] is None:
+                break
+            cursor = parse_qs(urlparse(response.data["next"]).query)["cursor"][0]
+            response = self.get(radius_km=50, page_size=2, cursor=cursor)
+
+        self.assertEqual(len(distances), len(providers))
+        self.assertEqual(distances, sorted(distances))
+        self.assertAlmostEqual(distances[-1], 30, places=1)
 
-# Create your tests here.
+    def test_missing_or_invalid_coordinates_are_rejected(self):
+        request = APIRequestFactory().get("/", {"latitude": 4})
+        self.assertEqual(controllers.get_nearby_providers(request).status_code, 400)
+        self.assertEqual(self.get(radius_km="far").status_code, 400)
+        self.assertEqual(self.get(radius_km=-1).status_code, 400)
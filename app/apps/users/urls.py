@@ -8,6 +8,12 @@ urlpatterns = [
     path("me/", controllers.get_current_user_profile, name="my_profile"),
     path("me/data/", controllers.get_current_user_data, name="current_user_data"),
     path("me/unified/", controllers.unified_profile_view, name="unified_profile"),
+    # Provider search
+    path(
+        "providers/nearby/",
+        controllers.get_nearby_providers,
+        name="nearby_providers",
+    ),
     # Role management
     path(
         "<uuid:user_id>/update-role/",
@@ -30,6 +30,7 @@ DJANGO_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 LOCAL_APPS = [
@@ -117,8 +118,18 @@ WSGI_APPLICATION = "mubaku.wsgi.application"
 
 # Elastic Search
 ELASTICSEARCH_DSL = {
-    "default": {"hosts": "http://elasticsearch:9200"},
+    "default": {
+        "hosts": env("ELASTICSEARCH_URL", default="http://elasticsearch:9200"),
+        "request_timeout": env.int("ELASTICSEARCH_TIMEOUT", default=5),
+    },
 }
+# Index writes are queued by signals and sent in bulk by sync_search_index
+ELASTICSEARCH_DSL_AUTOSYNC = False
+# Serve service search from Elasticsearch (and queue index writes); the
+# database answers whenever the index is off or unreachable
+SEARCH_INDEX_ENABLED = env.bool("SEARCH_INDEX_ENABLED", default=False)
+# Seconds searches skip Elasticsearch after it failed
+SEARCH_INDEX_RETRY_SECONDS = env.int("SEARCH_INDEX_RETRY_SECONDS", default=30)
 
 
 # Cors settings
@@ -160,6 +171,29 @@ if CACHE_BACKEND == "django_redis.cache.RedisCache":
         "CLIENT_CLASS": env("OPTIONS_CLIENT_CLASS", default="django_redis.client.DefaultClient"),
     }
 
+# Appointment slot materialization
+SLOT_MATERIALIZATION_ENABLED = env.bool("SLOT_MATERIALIZATION_ENABLED", default=False)
+SLOT_MATERIALIZATION_HORIZON_DAYS = env.int(
+    "SLOT_MATERIALIZATION_HORIZON_DAYS", default=60
+)
+# Seconds a cached slot/calendar response lives; entries are also invalidated
+# immediately by the provider's schedule version
+SCHEDULE_CACHE_TIMEOUT = env.int("SCHEDULE_CACHE_TIMEOUT", default=300)
+# Seconds the public category list lives; category and service writes
+# invalidate it immediately
+CATALOG_CACHE_TIMEOUT = env.int("CATALOG_CACHE_TIMEOUT", default=600)
+# Default lifetime in minutes of a checkout slot hold (capped at 30)
+SLOT_HOLD_MINUTES = env.int("SLOT_HOLD_MINUTES", default=10)
+# Unpaid pending appointments older than this are expired by the
+# expire_pending_appointments command, freeing their slots
+PENDING_APPOINTMENT_EXPIRY_MINUTES = env.int(
+    "PENDING_APPOINTMENT_EXPIRY_MINUTES", default=30
+)
+# How far ahead Service.next_available_at looks for a free slot
+NEXT_AVAILABLE_HORIZON_DAYS = env.int("NEXT_AVAILABLE_HORIZON_DAYS", default=30)
+# Most waitlist entries notified (oldest first) when a slot is freed
+WAITLIST_NOTIFY_LIMIT = env.int("WAITLIST_NOTIFY_LIMIT", default=20)
+
 # CSRF Settings
 CSRF_TRUSTED_ORIGINS = [
     "https://mubakulifestyle.com",
@@ -176,6 +210,9 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Take the write lock when a transaction starts so concurrent bookings
+        # are serialized (SQLite has no row locks or exclusion constraints)
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
     }
 }
 